@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Compare AST memory and serialization cost: slotted nodes and the binary
+format against dict-backed nodes and the JSON dump.
+
+    python benchmarks/bench_ast.py [--pins 100000] [--repeat 3]
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from dataclasses import fields, make_dataclass
+
+from core.ast import serialize
+from core.ast.nodes import ASTFunction, ASTGpioInit, ASTModule
+
+
+def best_of(repeat: int, fn) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def bytes_per_node(cls, pins: int) -> float:
+    """Traced allocation per node, strings shared as they are after YAML loading."""
+    modes = ("output", "up", "high")
+    names = [f"P{i}" for i in range(pins)]
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    nodes = [cls(n, *modes) for n in names]
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del nodes
+    return size / pins
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pins", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # the pre-__slots__ node shape, for comparison
+    DictGpioInit = make_dataclass("DictGpioInit", [(f.name, f.type) for f in fields(ASTGpioInit)])
+
+    print(f"bytes per GPIO node: dict {bytes_per_node(DictGpioInit, args.pins):.0f}, "
+          f"slots {bytes_per_node(ASTGpioInit, args.pins):.0f}")
+
+    mod = ASTModule([ASTFunction("main", [], [
+        ASTGpioInit(f"P{i}", "output", "up", "high") for i in range(args.pins)
+    ])], "bench")
+    json_text = json.dumps(mod, default=serialize.to_json_obj, indent=2)
+    blob = serialize.dumps(mod)
+
+    rows = [
+        ("JSON dump (indent=2)", best_of(args.repeat, lambda: json.dumps(
+            mod, default=serialize.to_json_obj, indent=2)), len(json_text.encode())),
+        ("binary dump", best_of(args.repeat, lambda: serialize.dumps(mod)), len(blob)),
+        ("binary load", best_of(args.repeat, lambda: serialize.loads(blob)), len(blob)),
+    ]
+    print(f"{args.pins} GPIO nodes (best of {args.repeat}):")
+    for label, t, size in rows:
+        print(f"  {label:<22} {t * 1e3:9.1f} ms  {size / 1024:9.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark `load_config` on a synthetic board with many GPIO entries.
+
+    python benchmarks/bench_config.py [--pins 10000] [--repeat 5]
+
+Compares the pure-Python SafeLoader, libyaml's CSafeLoader, and a warm
+ConfigCache snapshot hit, then measures what the default resource-conflict
+check (core.conflicts) adds to an uncached load.
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+import yaml
+
+import core.config as config
+from core.config import ConfigCache, load_config
+from core.conflicts import find_conflicts
+
+
+def synthetic_board(pins: int) -> dict:
+    return {
+        "name": f"synthetic_{pins}",
+        "gpio": [
+            {"pin": f"P{chr(65 + i // 1000 % 26)}{i}", "mode": "output", "pull": "up", "speed": "high"}
+            for i in range(pins)
+        ],
+        # GPIO pin numbers are the entry index, so PZ0/PZ1 are never taken
+        "uart": [{"name": "UART1", "tx": "PZ0", "rx": "PZ1", "baudrate": 115200}],
+        "timer": [{"name": "TIM2", "prescaler": 7999, "period": 1000}],
+    }
+
+
+def best_of(repeat: int, fn) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pins", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "board.yaml"
+        path.write_text(yaml.safe_dump(synthetic_board(args.pins)))
+        cache = ConfigCache(Path(tmp) / "cache")
+        load_config(path, cache=cache)  # populate
+
+        rows = []
+        with mock.patch.object(config, "SafeLoader", yaml.SafeLoader):
+            rows.append(("SafeLoader (pure Python)", best_of(args.repeat, lambda: load_config(path))))
+        if yaml.__with_libyaml__:
+            with mock.patch.object(config, "SafeLoader", yaml.CSafeLoader):
+                rows.append(("CSafeLoader (libyaml)", best_of(args.repeat, lambda: load_config(path))))
+        rows.append(("ConfigCache hit", best_of(args.repeat, lambda: load_config(path, cache=cache))))
+
+        checked = best_of(args.repeat, lambda: load_config(path))
+        unchecked = best_of(args.repeat, lambda: load_config(path, check=False))
+        cfg = load_config(path)
+        check_only = best_of(args.repeat, lambda: find_conflicts(cfg))
+
+    print(f"load_config, {args.pins} GPIO entries (best of {args.repeat}):")
+    base = rows[0][1]
+    for label, t in rows:
+        print(f"  {label:<26} {t * 1e3:9.1f} ms  x{base / t:6.1f}")
+    print("conflict check:")
+    print(f"  {'load_config, check=False':<26} {unchecked * 1e3:9.1f} ms")
+    print(f"  {'load_config (default)':<26} {checked * 1e3:9.1f} ms")
+    print(f"  {'find_conflicts alone':<26} {check_only * 1e3:9.1f} ms  "
+          f"({check_only / unchecked:.1%} of an uncached load)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Codegen throughput across board sizes and targets.
+
+    python benchmarks/bench_suite.py [--sizes 10,100,1000,10000,100000]
+                                     [--repeat 3] [--baseline FILE]
+                                     [--save-baseline] [--threshold 0.25]
+
+Times load_config, build_ast, ast_to_llvm_ir, CodeGenerator.generate and
+compile_module (llvmlite and llc) for each target. The full
+C -> IR -> ELF pipeline is timed as well. Each case runs in a fresh
+process so its peak RSS is its own. Cases whose tools (llvmlite, llc,
+clang, ...) are missing are skipped.
+
+The best times and peak RSS are compared against a stored run
+(--baseline, default benchmarks/baseline.json). Anything slower or bigger
+than the threshold (default 25%) is reported and makes the run exit 1.
+Timings are machine-specific, so no baseline is shipped: --save-baseline
+records the current run instead. A --baseline FILE that does not exist is
+an error; only the default path may be missing (nothing is compared).
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import multiprocessing
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+from core.targets import TARGET_CONFIG
+
+TEMPLATES = Path(__file__).resolve().parent.parent / "core" / "templates"
+DEFAULT_SIZES = (10, 100, 1_000, 10_000, 100_000)
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+# absolute slack so sub-millisecond cases do not flap on timer noise
+NOISE = {"seconds": 1e-3, "rss_kib": 1024}
+
+
+def synthetic_board(peripherals: int) -> dict:
+    """A board with `peripherals` entries: 80% GPIO, 10% UART, 10% timers."""
+    uarts = max(1, peripherals // 10)
+    timers = max(1, peripherals // 10)
+    pins = max(1, peripherals - uarts - timers)
+    return {
+        "name": f"synthetic_{peripherals}",
+        "gpio": [
+            {"pin": f"P{chr(65 + i % 20)}{i // 20}", "mode": "output", "pull": "up", "speed": "high"}
+            for i in range(pins)
+        ],
+        # ports U/V are left to the UARTs so no pin is claimed twice
+        "uart": [
+            {"name": f"UART{i + 1}", "tx": f"PU{i}", "rx": f"PV{i}", "baudrate": 115200}
+            for i in range(uarts)
+        ],
+        "timer": [
+            {"name": f"TIM{i + 1}", "prescaler": 7999, "period": 1000}
+            for i in range(timers)
+        ],
+    }
+
+
+# Each case: (name, per-target?, required tools) -> setup(board_path, target)
+# returning the zero-argument callable to time.
+
+def _load_config(path, target):
+    from core.config import load_config
+    return lambda: load_config(path)
+
+
+def _build_ast(path, target):
+    from core.ast.builder import build_ast
+    from core.config import load_config
+    cfg = load_config(path)
+    return lambda: build_ast(cfg)
+
+
+def _ast_to_llvm_ir(path, target):
+    from core.ast.builder import build_ast
+    from core.config import load_config
+    from core.ir.codegen import ast_to_llvm_ir
+    cfg = load_config(path)
+    ast_mod = build_ast(cfg)
+    tc = TARGET_CONFIG[target]
+    return lambda: str(ast_to_llvm_ir(
+        ast_mod, module_name=cfg.name,
+        target_triple=tc["triple"], cpu=tc["cpu"], features=tc["features"],
+    ))
+
+
+def _generate(path, target):
+    from core.config import load_config
+    from core.generator import CodeGenerator, make_environment
+    cfg = load_config(path)
+    env = make_environment(TEMPLATES)
+    out = path.parent / f"out-{target}"
+    return lambda: CodeGenerator(cfg, TEMPLATES, out, target, env=env).generate()
+
+
+def _compile_module(backend):
+    def setup(path, target):
+        from core.ir.backend import compile_module
+        ir_text = _ast_to_llvm_ir(path, target)()
+        tc = TARGET_CONFIG[target]
+        return lambda: compile_module(
+            ir_text, target_triple=tc["triple"], cpu=tc["cpu"],
+            features=tc["features"], backend=backend,
+        )
+    return setup
+
+
+def _build_firmware(path, target):
+    from core.config import load_config
+    from core.pipeline import build_firmware
+    cfg = load_config(path)
+
+    def run():
+        out = path.parent / f"fw-{target}"
+        shutil.rmtree(out, ignore_errors=True)  # time a full, not a no-op, build
+        build_firmware(cfg, TEMPLATES, out, target)
+    return run
+
+
+CASES = {
+    "load_config": (_load_config, False, ()),
+    "build_ast": (_build_ast, False, ()),
+    "ast_to_llvm_ir": (_ast_to_llvm_ir, True, ("llvmlite",)),
+    "generate": (_generate, True, ()),
+    "compile_module[llvmlite]": (_compile_module("llvmlite"), True, ("llvmlite",)),
+    "compile_module[llc]": (_compile_module("llc"), True, ("llvmlite", "llc")),
+    "build_firmware": (_build_firmware, True, ("clang", "llvm-link", "llc")),
+}
+
+
+def _missing(tools) -> list:
+    missing = []
+    for tool in tools:
+        if tool == "llvmlite":
+            if importlib.util.find_spec("llvmlite") is None:
+                missing.append(tool)
+        elif shutil.which(tool) is None:
+            missing.append(tool)
+    return missing
+
+
+def _measure(case: str, board_path: Path, target: str, repeat: int):
+    """Run in a child process: best-of-`repeat` seconds and peak RSS (KiB)."""
+    setup = CASES[case][0]
+    # CodeGenerator prints the plugin registry on every run
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn = setup(board_path, target)
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - t0)
+    return best, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_suite(sizes, targets, cases, repeat, log=print) -> dict:
+    """
+    Time every (case, target, size) combination.
+
+    Returns:
+        "case[target]/size" -> {"seconds", "rss_kib", "peripherals"}.
+    """
+    results = {}
+    runnable = []
+    for case in cases:
+        missing = _missing(CASES[case][2])
+        if missing:
+            log(f"skip {case}: {', '.join(missing)} not found")
+        else:
+            runnable.append(case)
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            board = Path(tmp) / f"board-{n}" / "board.yaml"
+            board.parent.mkdir()
+            board.write_text(yaml.safe_dump(synthetic_board(n)))
+            for case in runnable:
+                per_target = CASES[case][1]
+                for target in (targets if per_target else [None]):
+                    key = f"{case}[{target}]/{n}" if target else f"{case}/{n}"
+                    with ctx.Pool(1, maxtasksperchild=1) as pool:
+                        seconds, rss = pool.apply(_measure, (case, board, target or targets[0], repeat))
+                    results[key] = {"seconds": seconds, "rss_kib": rss, "peripherals": n}
+                    log(f"{key:<40} {seconds * 1e3:10.1f} ms {1 / seconds:10.1f} boards/s "
+                        f"{n / seconds:12.0f} periph/s {rss / 1024:8.1f} MiB")
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Keys whose time or peak RSS exceeds the baseline by more than `threshold`."""
+    regressions = []
+    for key, cur in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        for metric in ("seconds", "rss_kib"):
+            if cur[metric] > base[metric] * (1 + threshold) + NOISE[metric]:
+                regressions.append(
+                    f"{key} {metric}: {base[metric]:.4g} -> {cur[metric]:.4g} "
+                    f"(+{(cur[metric] / base[metric] - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Comma-separated peripheral counts")
+    parser.add_argument("--target", action="append", choices=TARGET_CONFIG.keys(),
+                        help="Target(s) for per-target cases (default: all)")
+    parser.add_argument("--case", action="append", choices=CASES.keys(),
+                        help="Case(s) to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", type=Path, default=None,
+                        help=f"Stored run to compare against (default: {DEFAULT_BASELINE})")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Write this run's results to --baseline instead of comparing")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed slowdown / RSS growth as a fraction (default 0.25)")
+    args = parser.parse_args(argv)
+    baseline = args.baseline or DEFAULT_BASELINE
+    if args.baseline and not args.save_baseline and not baseline.exists():
+        # an explicit baseline must be checked, not silently skipped
+        parser.error(f"baseline {baseline} does not exist; create it with --save-baseline")
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    targets = args.target or list(TARGET_CONFIG)
+    results = run_suite(sizes, targets, args.case or list(CASES), args.repeat)
+
+    if args.save_baseline:
+        baseline.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline written to {baseline}")
+        return 0
+    if not baseline.exists():
+        print(f"No baseline at {baseline}; run with --save-baseline to create one")
+        return 0
+    regressions = compare(results, json.loads(baseline.read_text()), args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    print(f"{len(regressions)} regression(s) against {baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,29 +1,254 @@
 #!/usr/bin/env python3
 
+import time
+
+_T0 = time.perf_counter()
+
 import argparse
+import atexit
+import os
 import sys
 import logging
 import json
+import signal
 from pathlib import Path
 
-from core.config     import load_config
-from core.generator  import CodeGenerator
-from core.ir_generator import LLVMIRGenerator
+# Heavy dependencies (pydantic, jinja2, llvmlite) are imported inside the
+# code paths that need them so --version/--help and --emit-ast start fast.
+from core.targets    import TARGET_CONFIG
 
 VERSION = "2.0.0"
 
-# Predefined target configurations for object emission
-TARGET_CONFIG = {
-    "x86":   {"triple": "x86_64-pc-linux-gnu",    "cpu": "generic",    "features": ""},
-    "stm32": {"triple": "armv7-none-eabi",       "cpu": "cortex-m3",  "features": "+thumb2"},
-    "imx7":  {"triple": "aarch64-none-linux-gnu","cpu": "generic",    "features": ""},
-}
+# Modules whose presence in sys.modules --profile-startup reports.
+HEAVY_MODULES = ("yaml", "pydantic", "jinja2", "llvmlite")
 
 """
 Command‐line entry for Embedded Codegen.
 Handles config loading, templates, AST/IR/obj emission, and standard codegen.
 """
 
+def _setup_logging(verbose: int) -> logging.Logger:
+    # Logging setup 
+    level = logging.WARNING
+    if verbose == 1:
+        level = logging.INFO
+    elif verbose >= 2:
+        level = logging.DEBUG
+
+    logging.basicConfig(
+        level=level,
+        format="%(asctime)s %(levelname)-5s %(name)s: %(message)s",
+        datefmt="%H:%M:%S",
+    )
+    return logging.getLogger("embedded-codegen")
+
+
+def _startup_report(marks: dict) -> None:
+    """Print --profile-startup timings (ms since CLI import) to stderr."""
+    marks["exit"] = time.perf_counter()
+    prev = _T0
+    print("startup profile (ms since cli import):", file=sys.stderr)
+    for stage, t in marks.items():
+        print(f"  {stage:<12} {(t - _T0) * 1e3:8.1f}  (+{(t - prev) * 1e3:.1f})", file=sys.stderr)
+        prev = t
+    loaded = [m for m in HEAVY_MODULES if m in sys.modules]
+    print(f"  heavy modules: {', '.join(loaded) or 'none'}", file=sys.stderr)
+
+
+def _timings_report(rec, table: bool, json_path: str) -> None:
+    """Print the --timings table to stderr and/or write --timings-json."""
+    if table:
+        print(rec.table(), file=sys.stderr)
+    if json_path:
+        rec.write_json(Path(json_path))
+
+
+def _parse_targets(value: str) -> list:
+    """`--target` value: a target name, a comma-separated list, or "all"."""
+    if value == "all":
+        return list(TARGET_CONFIG)
+    names = [v.strip() for v in value.split(",") if v.strip()]
+    bad = [n for n in names if n not in TARGET_CONFIG] or ([] if names else [value])
+    if bad:
+        choices = ", ".join(map(repr, [*TARGET_CONFIG, "all"]))
+        raise argparse.ArgumentTypeError(f"invalid choice: {bad[0]!r} (choose from {choices})")
+    return names
+
+
+def _write_output(dest: str, data: bytes) -> None:
+    """Write `data` to the file `dest`, or straight to stdout for "-"."""
+    if dest == "-":
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
+    else:
+        Path(dest).write_bytes(data)
+
+
+def _parse_timestamp(value: str):
+    """`--timestamp` value: "now", "none", a Unix time or an ISO 8601 date."""
+    import datetime
+
+    if value in ("now", "none"):
+        return None if value == "none" else value
+    try:
+        if value.isdigit():
+            return datetime.datetime.fromtimestamp(int(value), tz=datetime.timezone.utc)
+        return datetime.datetime.fromisoformat(value)
+    except (ValueError, OverflowError, OSError):
+        raise argparse.ArgumentTypeError(
+            f"invalid timestamp {value!r} (use now, none, a Unix time or an ISO 8601 date)"
+        ) from None
+
+
+def generate_many_main(argv):
+    """
+    `embedded-codegen generate-many CONFIG... --target T [--target T ...]`
+
+    Batch C/DTS generation over a directory, glob or list of board YAMLs.
+    Prints one line per board/target and a summary; exits non-zero if any
+    board failed.
+    """
+    from core.batch import expand_configs, generate_many
+    from core.cache import user_cache_dir
+    from core.template_cache import default_template_cache_dir
+
+    parser = argparse.ArgumentParser(
+        prog="embedded-codegen generate-many",
+        description="Generate C/DTS for many board configs in one run",
+    )
+    parser.add_argument("configs", nargs="+",
+                        help="Board YAML files, directories, or glob patterns")
+    parser.add_argument("--target", action="append", required=True,
+                        choices=TARGET_CONFIG.keys(),
+                        help="Target platform (repeat for several)")
+    parser.add_argument("--template-dir", default="templates",
+                        help="Template directory for C code generation")
+    parser.add_argument("--out-dir", default="out",
+                        help="Root output directory (<out-dir>/<board>/<target>)")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only rewrite generated files whose inputs changed")
+    parser.add_argument("--config-cache", default=None,
+                        help="Validated-config snapshot directory "
+                             "(default: ~/.cache/embedded-codegen/configs)")
+    parser.add_argument("--no-config-cache", action="store_true",
+                        help="Always parse and validate the YAML config")
+    parser.add_argument("--template-cache", default=None,
+                        help="Compiled-template cache directory "
+                             "(default: ~/.cache/embedded-codegen/templates)")
+    parser.add_argument("--no-template-cache", action="store_true",
+                        help="Disable the persistent compiled-template cache")
+    parser.add_argument("-v", "--verbose",
+                        action="count", default=0,
+                        help="Increase verbosity (use -vv for DEBUG)")
+    args = parser.parse_args(argv)
+
+    log = _setup_logging(args.verbose)
+    configs = expand_configs(args.configs)
+    if not configs:
+        parser.error("no board configs matched")
+
+    start = time.perf_counter()
+    try:
+        results = generate_many(
+            configs,
+            args.target,
+            Path(args.template_dir),
+            Path(args.out_dir),
+            jobs=args.jobs,
+            incremental=args.incremental,
+            template_cache=None if args.no_template_cache
+            else Path(args.template_cache or default_template_cache_dir()),
+            config_cache=None if args.no_config_cache
+            else Path(args.config_cache or user_cache_dir("configs")),
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    elapsed = time.perf_counter() - start
+
+    failed = [r for r in results if not r.ok]
+    for r in results:
+        status = "ok  " if r.ok else "FAIL"
+        line = f"{status} {r.config} [{r.target}] {r.seconds:.3f}s"
+        print(line if r.ok else f"{line}: {r.error}")
+    print(f"{len(results) - len(failed)}/{len(results)} succeeded in {elapsed:.2f}s")
+    log.info("Batch finished: %d failed", len(failed))
+    return 1 if failed else 0
+
+
+def serve_main(argv):
+    """
+    `embedded-codegen serve --socket PATH`
+
+    Run the codegen daemon (see core.server) until interrupted.
+    """
+    parser = argparse.ArgumentParser(
+        prog="embedded-codegen serve",
+        description="Serve generate/emit-ir/emit-obj requests over a Unix socket",
+    )
+    parser.add_argument("--socket", required=True, help="Unix domain socket path")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Concurrent requests (default: CPU count)")
+    parser.add_argument("--idle-timeout", type=float, default=None, metavar="SECONDS",
+                        help="Close connections idle this long so they free their "
+                             "worker (default: 10; 0 to never close)")
+    parser.add_argument("--template-dir", default="templates",
+                        help="Default template directory for generate requests")
+    parser.add_argument("--config-cache", default=None,
+                        help="Validated-config snapshot directory "
+                             "(default: ~/.cache/embedded-codegen/configs)")
+    parser.add_argument("--no-config-cache", action="store_true",
+                        help="Always parse and validate the YAML config")
+    parser.add_argument("--template-cache", default=None,
+                        help="Compiled-template cache directory "
+                             "(default: ~/.cache/embedded-codegen/templates)")
+    parser.add_argument("--no-template-cache", action="store_true",
+                        help="Disable the persistent compiled-template cache")
+    parser.add_argument("--obj-cache", default=None,
+                        help="Object cache directory "
+                             "(default: ~/.cache/embedded-codegen/objects)")
+    parser.add_argument("--no-obj-cache", action="store_true",
+                        help="Always compile, bypassing the object cache")
+    parser.add_argument("-v", "--verbose",
+                        action="count", default=0,
+                        help="Increase verbosity (use -vv for DEBUG)")
+    args = parser.parse_args(argv)
+
+    log = _setup_logging(args.verbose)
+    from core.config import ConfigCache
+    from core.ir.object_cache import ObjectCache
+    from core.server import DEFAULT_IDLE_TIMEOUT, CodegenServer, CodegenService, DaemonRunningError
+    from core.template_cache import default_template_cache_dir
+
+    service = CodegenService(
+        Path(args.template_dir),
+        template_cache=None if args.no_template_cache
+        else Path(args.template_cache or default_template_cache_dir()),
+        obj_cache=None if args.no_obj_cache else ObjectCache(args.obj_cache),
+        config_cache=None if args.no_config_cache else ConfigCache(args.config_cache),
+    )
+    service.warm_up()
+
+    idle_timeout = DEFAULT_IDLE_TIMEOUT if args.idle_timeout is None else args.idle_timeout
+    try:
+        server = CodegenServer(Path(args.socket), service, workers=args.jobs,
+                               idle_timeout=idle_timeout or None)
+    except DaemonRunningError as e:
+        log.error("%s", e)
+        return 1
+    # treat SIGTERM like Ctrl-C so the socket file is cleaned up
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    log.warning("Listening on %s", args.socket)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
 def main():
 
     """
@@ -31,140 +256,352 @@ def main():
 
     Args:
         config: Path to board YAML.
+        config_cache: Validated-config snapshot dir (--no-config-cache to skip).
+        no_conflict_check: Skip the pin/name/alt-func conflict check.
         template_dir: Directory of Jinja2 templates.
         out_dir: Output directory for C/DTS files.
-        target: One of {x86, stm32, imx7}.
-        emit_ast: Path to dump JSON AST.
-        emit_ir: Path to dump LLVM IR.
-        emit_obj: Path to output object file.
+        target: One or more of {x86, stm32, imx7}, or "all".
+        from_ast: Binary AST to start from instead of config.
+        emit_ast: Path to dump the AST.
+        ast_format: --emit-ast format: json (default) or the compact binary
+            format read back by --from-ast.
+        emit_ir: Path to dump LLVM IR ("-" for stdout; target-neutral
+            without --target).
+        emit_obj: Path to output object file ("-" for stdout).
+        obj_cache: Object cache dir for --emit-obj (--no-obj-cache to skip).
+        obj_backend: auto, llvmlite (in-process) or llc.
+        opt_level: O0..O3/Os/Oz for --emit-obj and --llvm-ir (default: per
+            target); with --emit-ir, optimize the dumped IR.
+        no_internalize: Keep every symbol external in the --llvm-ir link.
+        runtime_cache: Pre-linked runtime library dir for --llvm-ir
+            (--no-runtime-cache to compile every source per board).
         llvm_ir: Flag to emit textual IR via Jinja templates.
+        jobs: Render threads, and concurrent clang processes for --llvm-ir.
+        incremental: Keep unchanged outputs (and their mtimes) between runs.
+        timestamp: "Generated on" stamp (now, none, Unix time or ISO date).
+        reproducible: Use SOURCE_DATE_EPOCH or no timestamp, never the clock.
+        stream: Render templates chunk-wise into the output files.
+        template_cache: Compiled-template cache dir (--no-template-cache to skip).
+        plugin_cache: Rendered plugin output cache dir, used with a fixed
+            timestamp (--no-plugin-cache to skip).
+        profile_startup: Print per-stage startup latency on exit.
+        timings: Print wall/CPU time and bytes written per stage on exit.
+        timings_json: Write the per-stage timings as JSON to this path.
+        profile_dir: Dump a cProfile .prof file per stage into this dir.
         verbose: Verbosity level (-v/-vv).
 
     Returns:
         Exit code (0 success, non-zero on error).
     """
 
+    if len(sys.argv) > 1 and sys.argv[1] == "generate-many":
+        sys.exit(generate_many_main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        sys.exit(serve_main(sys.argv[2:]))
+
     parser = argparse.ArgumentParser(
-        description="Embedded Peripheral Code Generator"
+        description="Embedded Peripheral Code Generator",
+        epilog="Batch mode: embedded-codegen generate-many --help; "
+               "daemon: embedded-codegen serve --help",
     )
 
     # Core options
-    parser.add_argument("--config",      required=True, help="Path to YAML board config")
+    parser.add_argument("--config",      help="Path to YAML board config")
+    parser.add_argument("--config-cache", default=None,
+                        help="Validated-config snapshot directory "
+                             "(default: ~/.cache/embedded-codegen/configs)")
+    parser.add_argument("--no-config-cache", action="store_true",
+                        help="Always parse and validate the YAML config")
+    parser.add_argument("--no-conflict-check", action="store_true",
+                        help="Skip the check for double-assigned pins, duplicate UART/timer "
+                             "names and alt-funcs the target does not accept")
     parser.add_argument("--template-dir", default="templates",
                         help="Template directory for C code generation")
     parser.add_argument("--out-dir",     default="out",
                         help="Output directory for generated code")
-    parser.add_argument("--target",      choices=TARGET_CONFIG.keys(),
-                        help="Target platform (required for codegen or object emission)")
+    parser.add_argument("--target",      nargs="+", type=_parse_targets, metavar="TARGET",
+                        help="Target platform(s): x86, stm32, imx7, a comma-separated list or "
+                             "'all' (required for codegen or object emission); with several, "
+                             "each gets <out-dir>/<target>/ and shared files are rendered once")
     parser.add_argument("-v", "--verbose",
                         action="count", default=0,
                         help="Increase verbosity (use -vv for DEBUG)")
     parser.add_argument("--version",
                         action="version", version=f"%(prog)s v{VERSION}")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Report per-stage startup latency and loaded heavy modules on exit")
+    parser.add_argument("--timings", action="store_true",
+                        help="Print wall/CPU time and bytes written per stage "
+                             "(config, AST, each render/plugin, each toolchain step) on exit")
+    parser.add_argument("--timings-json", metavar="PATH", default=None,
+                        help="Write the per-stage timings as JSON to PATH")
+    parser.add_argument("--profile-dir", metavar="DIR", default=None,
+                        help="Run every stage under cProfile and dump <stage>-<n>.prof files to DIR")
 
     # AST / IR / Object flags
-    parser.add_argument("--emit-ast", help="Dump the in-memory AST to JSON")
-    parser.add_argument("--emit-ir",  help="Emit LLVM IR text to file")
-    parser.add_argument("--emit-obj", help="Compile IR to an object file")
+    parser.add_argument("--emit-ast", help="Dump the in-memory AST (see --ast-format)")
+    parser.add_argument("--ast-format", choices=["json", "binary"], default="json",
+                        help="--emit-ast format: human-readable JSON (default) or the "
+                             "compact binary format read by --from-ast")
+    parser.add_argument("--from-ast", help="Start from a binary AST written by "
+                                           "--emit-ast --ast-format binary instead of "
+                                           "--config (for --emit-ir/--emit-obj)")
+    parser.add_argument("--emit-ir",  help="Emit LLVM IR text to file ('-' for stdout)")
+    parser.add_argument("--emit-obj", help="Compile IR to an object file ('-' for stdout)")
+    parser.add_argument("--obj-cache", default=None,
+                        help="Object cache directory for --emit-obj "
+                             "(default: ~/.cache/embedded-codegen/objects)")
+    parser.add_argument("--no-obj-cache", action="store_true",
+                        help="Always compile, bypassing the object cache")
+    parser.add_argument("--obj-backend", choices=("auto", "llvmlite", "llc"), default="auto",
+                        help="Object emitter: in-process llvmlite, external llc, "
+                             "or auto (llvmlite with llc fallback)")
+    parser.add_argument("--opt-level", choices=("O0", "O1", "O2", "O3", "Os", "Oz"), default=None,
+                        help="IR optimization level for --emit-obj/--llvm-ir (default: per target, "
+                             "Oz for stm32); also optimizes --emit-ir output when given")
+    parser.add_argument("--no-internalize", action="store_true",
+                        help="Skip LTO-style internalization of the --llvm-ir linked module")
+    parser.add_argument("--runtime-cache", default=None,
+                        help="Per-target runtime library cache for --llvm-ir "
+                             "(default: ~/.cache/embedded-codegen/runtime)")
+    parser.add_argument("--no-runtime-cache", action="store_true",
+                        help="Compile board-independent sources (hal.c, syscalls.c) for every board")
+
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only rewrite generated files whose inputs changed")
+    parser.add_argument("--timestamp", type=_parse_timestamp, default="now", metavar="WHEN",
+                        help="'Generated on' stamp in every header: now (default; SOURCE_DATE_EPOCH "
+                             "wins when set), none, a Unix time or an ISO 8601 date")
+    parser.add_argument("--reproducible", action="store_true",
+                        help="Byte-identical outputs for identical inputs: stamp with "
+                             "SOURCE_DATE_EPOCH if set, else omit the timestamp")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream template output straight to disk (flat memory for huge boards)")
+    parser.add_argument("--template-cache", default=None,
+                        help="Compiled-template cache directory "
+                             "(default: ~/.cache/embedded-codegen/templates)")
+    parser.add_argument("--no-template-cache", action="store_true",
+                        help="Disable the persistent compiled-template cache")
+    parser.add_argument("--plugin-cache", default=None,
+                        help="Rendered peripheral plugin output cache, used with a fixed "
+                             "timestamp (default: ~/.cache/embedded-codegen/plugins)")
+    parser.add_argument("--no-plugin-cache", action="store_true",
+                        help="Render every peripheral plugin, even if its config slice is unchanged")
 
     # Legacy “run full C->IR pipeline” flag
     parser.add_argument("--llvm-ir", action="store_true",
                         help="After C codegen, run the LLVM-IR pipeline")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Parallel render threads and --llvm-ir clang jobs "
+                             "(default: CPU count)")
 
     args = parser.parse_args()
 
+    if args.from_ast:
+        if not (args.emit_ast or args.emit_ir or args.emit_obj):
+            parser.error("--from-ast only feeds --emit-ast, --emit-ir or --emit-obj")
+    elif not args.config:
+        parser.error("--config is required unless --from-ast is given")
+
     # --target is only optional if just dumping AST or IR.
-    if not (args.emit_ast or args.emit_ir) and not args.target:
+    targets = list(dict.fromkeys(t for group in args.target or () for t in group))
+    if not (args.emit_ast or args.emit_ir) and not targets:
         parser.error("--target is required for code generation or object emission")
+    if (args.emit_ir or args.emit_obj) and len(targets) > 1:
+        parser.error("--emit-ir and --emit-obj take a single --target")
+    if args.emit_ir and args.opt_level and not targets:
+        parser.error("--opt-level with --emit-ir needs a --target")
+    target = targets[0] if targets else None
+    timestamp = args.timestamp
+    if args.reproducible and timestamp == "now" and not os.environ.get("SOURCE_DATE_EPOCH"):
+        timestamp = None
 
-    # Logging setup 
-    level = logging.WARNING
-    if args.verbose == 1:
-        level = logging.INFO
-    elif args.verbose >= 2:
-        level = logging.DEBUG
-
-    logging.basicConfig(
-        level=level,
-        format="%(asctime)s %(levelname)-5s %(name)s: %(message)s",
-        datefmt="%H:%M:%S",
-    )
-    log = logging.getLogger("embedded-codegen")
+    log = _setup_logging(args.verbose)
     log.debug("CLI args: %s", vars(args))
 
+    marks = {"args": time.perf_counter()}
+    if args.profile_startup:
+        atexit.register(_startup_report, marks)
+    from core import timing
+    if args.timings or args.timings_json or args.profile_dir:
+        rec = timing.enable(args.profile_dir)
+        atexit.register(_timings_report, rec, args.timings, args.timings_json)
+
     try:
-        # 1) Load + validate board config
-        cfg = load_config(Path(args.config))
-        log.info(
-            "Loaded board config: %s (GPIO=%d, UART=%d, TIMER=%d)",
-            cfg.name, len(cfg.gpio), len(cfg.uart), len(cfg.timer),
-        )
+        # 1) Load + validate board config (or a previously emitted AST)
+        cfg = None
+        if args.from_ast:
+            from core.ast.serialize import load_ast
+
+            with timing.stage("load-ast"):
+                ast_mod = load_ast(Path(args.from_ast))
+            marks["ast"] = time.perf_counter()
+            log.info("Loaded AST for %s from %s", ast_mod.name, args.from_ast)
+        else:
+            from core.config import ConfigCache, load_config
+
+            cfg_cache = None if args.no_config_cache else ConfigCache(args.config_cache)
+            with timing.stage("config"):
+                cfg = load_config(Path(args.config), cache=cfg_cache,
+                                  check=not args.no_conflict_check, targets=targets)
+            marks["config"] = time.perf_counter()
+            log.info(
+                "Loaded board config: %s (GPIO=%d, UART=%d, TIMER=%d)",
+                cfg.name, len(cfg.gpio), len(cfg.uart), len(cfg.timer),
+            )
 
         # 2) If any of the AST/IR/OBJ flags are set, run the AST->IR->OBJ sub-pipeline:
         if args.emit_ast or args.emit_ir or args.emit_obj:
-            from core.ast.builder import build_ast
-            from core.ir.codegen   import ast_to_llvm_ir
-            from core.ir.backend   import init_llvm, compile_module
+            if cfg is not None:
+                from core.ast.builder import build_ast
 
-            # Build an in-memory AST
-            ast_mod = build_ast(cfg)
+                # Build an in-memory AST
+                with timing.stage("ast"):
+                    ast_mod = build_ast(cfg)
+                marks["ast"] = time.perf_counter()
 
-            # Dump AST?
+            # Dump AST? (JSON for reading, binary for --from-ast)
             if args.emit_ast:
-                with open(args.emit_ast, "w") as f:
-                    json.dump(ast_mod, f, default=lambda o: o.__dict__, indent=2)
+                from core.ast import serialize
+
+                with timing.stage("write/ast"):
+                    if args.ast_format == "binary":
+                        Path(args.emit_ast).write_bytes(serialize.dumps(ast_mod))
+                    else:
+                        with open(args.emit_ast, "w") as f:
+                            json.dump(ast_mod, f, default=serialize.to_json_obj, indent=2)
                 log.info("AST dumped to %s", args.emit_ast)
                 sys.exit(0)
 
             # Convert AST -> LLVM IR
-            tc     = TARGET_CONFIG[args.target]
-            irr_mod = ast_to_llvm_ir(
-                ast_mod,
-                module_name=cfg.name,
-                target_triple=tc["triple"],
-                cpu=tc["cpu"],
-                features=tc["features"],
-            )
-            ir_text = str(irr_mod)
+            from core.ir.codegen   import ast_to_llvm_ir
+
+            # no --target (--emit-ir only): target-neutral IR, no triple or layout
+            tc     = TARGET_CONFIG[target] if target else dict.fromkeys(("triple", "cpu", "features", "opt"))
+            with timing.stage("ir"):
+                irr_mod = ast_to_llvm_ir(
+                    ast_mod,
+                    module_name=ast_mod.name,
+                    target_triple=tc["triple"],
+                    cpu=tc["cpu"],
+                    features=tc["features"],
+                )
+                ir_text = str(irr_mod)
+            marks["ir"] = time.perf_counter()
+            opt_level = args.opt_level or tc["opt"]
 
             # Dump IR?
             if args.emit_ir:
-                Path(args.emit_ir).write_text(ir_text)
-                log.info("LLVM IR written to %s", args.emit_ir)
+                if args.opt_level:
+                    from core.ir.optimize import optimize_ir
+
+                    with timing.stage("opt"):
+                        ir_text = optimize_ir(ir_text, tc["triple"], tc["cpu"], tc["features"],
+                                              args.opt_level)
+                ir_bytes = ir_text.encode("utf-8")
+                with timing.stage("write/ir"):
+                    _write_output(args.emit_ir, ir_bytes)
+                timing.add_bytes("write/ir", len(ir_bytes))
+                log.info("LLVM IR written to %s", "stdout" if args.emit_ir == "-" else args.emit_ir)
                 sys.exit(0)
 
             # Emit object?
             if args.emit_obj:
+                from core.ir.backend   import compile_module
+                from core.ir.target_registry import init_llvm
+                from core.ir.object_cache import ObjectCache
+
                 init_llvm()
+                obj_cache = None if args.no_obj_cache else ObjectCache(args.obj_cache)
                 obj = compile_module(
                     ir_text,
                     target_triple=tc["triple"],
                     cpu=tc["cpu"],
                     features=tc["features"],
+                    cache=obj_cache,
+                    backend=args.obj_backend,
+                    opt_level=opt_level,
                 )
-                Path(args.emit_obj).write_bytes(obj)
-                log.info("Object file emitted to %s", args.emit_obj)
+                with timing.stage("write/obj"):
+                    _write_output(args.emit_obj, obj)
+                timing.add_bytes("write/obj", len(obj))
+                log.info("Object file emitted to %s", "stdout" if args.emit_obj == "-" else args.emit_obj)
+                if obj_cache is not None:
+                    log.info("Object cache %s: %s", obj_cache.directory, obj_cache.stats())
                 sys.exit(0)
 
         # 3) Otherwise, fall back to C codegen (and optional IR pipeline)
+        from core.generator  import CodeGenerator, make_environment, resolve_timestamp
+        from core.plugin_cache import PluginCache
+        from core.template_cache import TemplateBytecodeCache
+
+        bcc = None
+        if not args.no_template_cache:
+            bcc = TemplateBytecodeCache(args.template_cache)
+        env = make_environment(Path(args.template_dir), bytecode_cache=bcc)
+        plugin_cache = None
+        if not args.no_plugin_cache and resolve_timestamp(timestamp)[1]:
+            plugin_cache = PluginCache(args.plugin_cache)
+
         if args.llvm_ir:
-            log.info(">>> Stage 1: C codegen for target %s", args.target)
-            CodeGenerator(cfg,
-                          Path(args.template_dir),
-                          Path(args.out_dir),
-                          args.target).generate()
+            from core.ir.runtime_cache import RuntimeCache
+            from core.pipeline import build_firmware, build_firmware_targets
 
-            log.info(">>> Stage 2: LLVM IR pipeline for target %s", args.target)
-            LLVMIRGenerator(cfg,
-                            Path(args.out_dir),
-                            args.target).generate()
+            runtime_cache = None if args.no_runtime_cache else RuntimeCache(args.runtime_cache)
+            log.info(">>> C codegen + LLVM IR pipeline for target %s", ", ".join(targets))
+            build_args = dict(env=env,
+                              jobs=args.jobs,
+                              stream=args.stream,
+                              opt_level=args.opt_level,
+                              internalize=not args.no_internalize,
+                              runtime_cache=runtime_cache,
+                              timestamp=timestamp,
+                              plugin_cache=plugin_cache)
+            if len(targets) > 1:
+                graphs = build_firmware_targets(cfg, Path(args.template_dir), Path(args.out_dir),
+                                                targets, **build_args)
+            else:
+                graphs = {target: build_firmware(cfg, Path(args.template_dir), Path(args.out_dir),
+                                                 target, **build_args)}
+            for name, graph in graphs.items():
+                log.info("Rebuilt [%s]: %s", name,
+                         ", ".join(n for n in graph.tasks if graph.ran(n)) or "nothing")
+            if runtime_cache is not None:
+                log.info("Runtime cache %s: %s", runtime_cache.directory, runtime_cache.stats())
+        elif len(targets) > 1:
+            from core.generator import generate_targets
 
+            log.info(">>> C codegen for targets %s", ", ".join(targets))
+            with timing.stage("codegen"):
+                generate_targets(cfg,
+                                 Path(args.template_dir),
+                                 Path(args.out_dir),
+                                 targets,
+                                 incremental=args.incremental,
+                                 env=env,
+                                 jobs=args.jobs,
+                                 stream=args.stream,
+                                 timestamp=timestamp,
+                                 plugin_cache=plugin_cache)
         else:
-            log.info(">>> C codegen for target %s", args.target)
-            CodeGenerator(cfg,
-                          Path(args.template_dir),
-                          Path(args.out_dir),
-                          args.target).generate()
+            log.info(">>> C codegen for target %s", target)
+            with timing.stage("codegen"):
+                CodeGenerator(cfg,
+                              Path(args.template_dir),
+                              Path(args.out_dir),
+                              target,
+                              incremental=args.incremental,
+                              env=env,
+                              jobs=args.jobs,
+                              stream=args.stream,
+                              timestamp=timestamp,
+                              plugin_cache=plugin_cache).generate()
+
+        marks["codegen"] = time.perf_counter()
+        if bcc is not None:
+            log.info("Template cache %s: %s", bcc.directory, bcc.stats())
+        if plugin_cache is not None:
+            log.info("Plugin cache %s: %s", plugin_cache.directory, plugin_cache.stats())
 
     except Exception as e:
         log.critical("Error: %s", e, exc_info=True)
@@ -1,14 +1,16 @@
 from core.config import BoardConfig
-from core.ast.nodes import ASTModule, ASTFunction, ASTCall
+from core.ast.nodes import ASTModule, ASTFunction, ASTGpioInit, ASTTimerInit, ASTUartInit
 
 """
-Build ASTModule from BoardConfig: one `main` with init calls.
+Build ASTModule from BoardConfig: one `main` with an init statement per
+peripheral instance.
 """
 
 def build_ast(cfg: BoardConfig) -> ASTModule:
     """
     Create an ASTModule containing a single `main` function.
-    The body contains ASTCall nodes for each enabled peripheral.
+    The body holds one init node per GPIO pin, UART and timer, in that
+    order (the order main.c initializes them in).
 
     Args:
         cfg: BoardConfig instance.
@@ -17,13 +19,10 @@ def build_ast(cfg: BoardConfig) -> ASTModule:
         ASTModule ready for IR generation.
     """
     stmts = []
-    if cfg.gpio:
-        stmts.append(ASTCall("gpio_init", []))
-    if cfg.uart:
-        stmts.append(ASTCall("uart_init", []))
-    if cfg.timer:
-        stmts.append(ASTCall("timer_init", []))
+    stmts.extend(ASTGpioInit(g.pin, g.mode, g.pull, g.speed) for g in cfg.gpio)
+    stmts.extend(ASTUartInit(u.name, u.tx, u.rx, u.baudrate) for u in cfg.uart)
+    stmts.extend(ASTTimerInit(t.name, t.prescaler, t.period) for t in cfg.timer)
 
     main_fn = ASTFunction(name="main", params=[], body=stmts)
-    return ASTModule(functions=[main_fn])
+    return ASTModule(functions=[main_fn], name=cfg.name)
 
@@ -1,25 +1,53 @@
-from dataclasses import dataclass
-from typing import Any, List
+from dataclasses import dataclass, fields
+from typing import Any, Dict, List, Optional
 
 """
-AST node definitions: module, function, statements, calls.
+AST node definitions: module, function, statements, calls, and one
+init statement per peripheral instance.
+
+Nodes are slotted dataclasses: a board can have tens of thousands of init
+nodes, and dropping the per-instance __dict__ roughly halves their size.
 """
 
+# class name -> node class, for loaders (see core.ast.serialize)
+AST_NODE_TYPES: Dict[str, type] = {}
+
+
+def _node(cls):
+    """
+    @dataclass plus __slots__ (dataclass(slots=True) needs Python 3.10).
+    The class is rebuilt with one slot per field and registered by name.
+    """
+    cls = dataclass(cls)
+    ns = dict(cls.__dict__)
+    names = tuple(f.name for f in fields(cls))
+    for name in names:
+        ns.pop(name, None)  # defaults live on in the generated __init__
+    ns.pop("__dict__", None)
+    ns.pop("__weakref__", None)
+    ns["__slots__"] = names
+    cls = type(cls)(cls.__name__, cls.__bases__, ns)
+    AST_NODE_TYPES[cls.__name__] = cls
+    return cls
+
+
 class ASTNode:
     """Base class for all AST nodes."""
-    pass
+    __slots__ = ()
 
-@dataclass
+@_node
 class ASTModule(ASTNode):
     """
     Top-level module containing functions.
 
     Attributes:
         functions: List of ASTFunction objects.
+        name: Module name (the board name when built by build_ast).
     """
     functions: List["ASTFunction"]
+    name: str = ""
 
-@dataclass
+@_node
 class ASTFunction(ASTNode):
     """
     Represents a function with parameters and a body of statements.
@@ -35,9 +63,9 @@ class ASTFunction(ASTNode):
 
 class ASTStmt(ASTNode):
     """Base class for statements."""
-    pass
+    __slots__ = ()
 
-@dataclass
+@_node
 class ASTCall(ASTStmt):
     """
     Represents a call statement to an external init function.
@@ -49,3 +77,48 @@ class ASTCall(ASTStmt):
     func_name: str
     args: List[Any]
 
+
+@_node
+class ASTGpioInit(ASTStmt):
+    """
+    Configure one GPIO pin.
+
+    Attributes:
+        pin: Pin identifier (e.g. "PA5").
+        mode: Pin mode (e.g. "output").
+        pull: Pull-up/down setting, if any.
+        speed: Slew-rate setting, if any.
+    """
+    pin: str
+    mode: str
+    pull: Optional[str] = None
+    speed: Optional[str] = None
+
+@_node
+class ASTUartInit(ASTStmt):
+    """
+    Configure one UART instance.
+
+    Attributes:
+        name: Instance name (e.g. "USART1").
+        tx, rx: TX/RX pins.
+        baudrate: Line speed in baud.
+    """
+    name: str
+    tx: str
+    rx: str
+    baudrate: int
+
+@_node
+class ASTTimerInit(ASTStmt):
+    """
+    Configure one timer instance.
+
+    Attributes:
+        name: Instance name (e.g. "TIM2").
+        prescaler: Clock prescaler.
+        period: Auto-reload period.
+    """
+    name: str
+    prescaler: int
+    period: int
@@ -0,0 +1,123 @@
+import marshal
+import struct
+import sys
+from dataclasses import fields
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Tuple
+
+from core.ast.nodes import AST_NODE_TYPES, ASTModule, ASTNode
+
+"""
+AST serialization: a compact binary format that loads back into nodes, and
+the human-readable JSON dump.
+
+Binary layout:
+
+    MAGIC (6 bytes) | version (u16, little-endian) | marshal payload
+
+The payload is `(schema, tree)`. `schema` lists `(class name, field names)`
+per node type used. In `tree`, every node is a tuple `(type index, *field
+values)`, lists stay lists, and str/int/None values are stored as-is.
+Strings are interned before marshalling so repeated values ("output",
+"high", ...) are stored once.
+"""
+
+MAGIC = b"ECAST\0"
+VERSION = 1
+_HEADER = struct.Struct("<6sH")
+
+
+class ASTFormatError(ValueError):
+    """The file is not a binary AST, or was written by an incompatible version."""
+
+
+def _encode(value: Any, schema: Dict[type, int], order: List[type]):
+    if isinstance(value, ASTNode):
+        cls = type(value)
+        idx = schema.get(cls)
+        if idx is None:
+            idx = schema[cls] = len(order)
+            order.append(cls)
+        return (idx,) + tuple(
+            _encode(getattr(value, f.name), schema, order) for f in fields(cls)
+        )
+    if isinstance(value, list):
+        return [_encode(v, schema, order) for v in value]
+    if isinstance(value, str):
+        return sys.intern(value)
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    raise TypeError(f"Cannot serialize {type(value).__name__} in AST")
+
+
+def dumps(ast_mod: ASTModule) -> bytes:
+    """Encode an AST in the binary format."""
+    schema: Dict[type, int] = {}
+    order: List[type] = []
+    tree = _encode(ast_mod, schema, order)
+    types = tuple((cls.__name__, tuple(f.name for f in fields(cls))) for cls in order)
+    return _HEADER.pack(MAGIC, VERSION) + marshal.dumps((types, tree), 4)
+
+
+def _decoder(types: Tuple[Tuple[str, Tuple[str, ...]], ...]):
+    classes = []
+    for name, names in types:
+        cls = AST_NODE_TYPES.get(name)
+        if cls is None:
+            raise ASTFormatError(f"Unknown AST node type {name!r}")
+        if tuple(f.name for f in fields(cls)) != tuple(names):
+            raise ASTFormatError(f"AST node {name} fields changed: file has {names}")
+        classes.append(cls)
+
+    def decode(value):
+        if type(value) is tuple:
+            return classes[value[0]](*[decode(v) for v in value[1:]])
+        if type(value) is list:
+            return [decode(v) for v in value]
+        return value
+    return decode
+
+
+def loads(data: bytes) -> ASTModule:
+    """
+    Decode an AST written by dumps().
+
+    Raises:
+        ASTFormatError: on a bad header, unsupported version, a truncated
+            or corrupt payload, or node types/fields this tree does not know.
+    """
+    if len(data) < _HEADER.size:
+        raise ASTFormatError("Truncated AST file")
+    magic, version = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ASTFormatError("Not a binary AST file (bad magic)")
+    if version != VERSION:
+        raise ASTFormatError(f"Unsupported AST format version {version} (expected {VERSION})")
+    try:
+        types, tree = marshal.loads(data[_HEADER.size:])
+        mod = _decoder(types)(tree)
+    except ASTFormatError:
+        raise
+    except (EOFError, ValueError, TypeError, IndexError, KeyError, RecursionError) as e:
+        raise ASTFormatError(f"Corrupt AST payload: {e}") from e
+    if not isinstance(mod, ASTModule):
+        raise ASTFormatError("AST file does not hold a module")
+    return mod
+
+
+def dump(ast_mod: ASTModule, f: BinaryIO) -> None:
+    f.write(dumps(ast_mod))
+
+
+def load(f: BinaryIO) -> ASTModule:
+    return loads(f.read())
+
+
+def load_ast(path: Path) -> ASTModule:
+    """Read a binary AST file (see `--emit-ast` / `--from-ast`)."""
+    return loads(Path(path).read_bytes())
+
+
+def to_json_obj(node: ASTNode) -> Dict[str, Any]:
+    """json.dump `default=` hook: a node's fields as a dict."""
+    return {f.name: getattr(node, f.name) for f in fields(node)}
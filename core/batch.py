@@ -0,0 +1,174 @@
+import glob
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence
+
+from jinja2 import Environment
+
+from core.config import ConfigCache, load_config
+from core.generator import CodeGenerator, make_environment, precompile_templates
+from core.template_cache import TemplateBytecodeCache
+
+log = logging.getLogger(__name__)
+
+"""
+Batch C/DTS generation: many board configs x targets in one process tree.
+"""
+
+# Per-process Jinja2 environment and config cache, built once by
+# _init_worker and reused for every board that worker handles.
+_ENV: Optional[Environment] = None
+_CONFIG_CACHE: Optional[ConfigCache] = None
+
+
+@dataclass
+class BoardResult:
+    """
+    Outcome of generating one (config, target) pair.
+
+    Attributes:
+        config: Path to the board YAML.
+        target: Target platform name.
+        out_dir: Where the outputs were written.
+        error: "<ExcType>: message" on failure, None on success.
+        seconds: Wall time spent on this board.
+    """
+    config: Path
+    target: str
+    out_dir: Path
+    error: Optional[str]
+    seconds: float
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def expand_configs(specs: Iterable[str]) -> List[Path]:
+    """
+    Resolve directories, glob patterns and plain paths to a sorted,
+    de-duplicated list of board YAML files.
+    """
+    found = set()
+    for spec in specs:
+        p = Path(spec)
+        if p.is_dir():
+            found.update(p.glob("*.yaml"))
+            found.update(p.glob("*.yml"))
+        elif glob.has_magic(spec):
+            found.update(Path(m) for m in glob.glob(spec, recursive=True))
+        else:
+            found.add(p)
+    return sorted(found)
+
+
+def _check_unique_stems(configs: Sequence[Path]) -> None:
+    """
+    Raise ValueError if two configs would share `out_root/<stem>/`, where
+    parallel workers would overwrite each other's outputs.
+    """
+    by_stem = {}
+    for cfg in configs:
+        by_stem.setdefault(cfg.stem, []).append(cfg)
+    clashes = {stem: paths for stem, paths in by_stem.items() if len(paths) > 1}
+    if clashes:
+        lines = "\n".join(
+            f"  {stem}: {', '.join(map(str, paths))}" for stem, paths in sorted(clashes.items())
+        )
+        raise ValueError(f"Board configs share an output directory name; rename them:\n{lines}")
+
+
+def _init_worker(
+    template_dir: Path,
+    template_cache: Optional[Path],
+    config_cache: Optional[Path] = None,
+) -> None:
+    global _ENV, _CONFIG_CACHE
+    _CONFIG_CACHE = ConfigCache(config_cache) if config_cache else None
+    bcc = TemplateBytecodeCache(template_cache) if template_cache else None
+    _ENV = make_environment(template_dir, bytecode_cache=bcc)
+    precompile_templates(_ENV)
+    if bcc is not None:
+        log.info("Template cache (pid %d): %s", os.getpid(), bcc.stats())
+
+
+def _generate_one(
+    config: Path,
+    target: str,
+    template_dir: Path,
+    out_dir: Path,
+    incremental: bool,
+) -> BoardResult:
+    start = time.perf_counter()
+    try:
+        cfg = load_config(config, cache=_CONFIG_CACHE, targets=(target,))
+        CodeGenerator(
+            cfg, template_dir, out_dir, target, incremental=incremental, env=_ENV, jobs=1
+        ).generate()
+        error = None
+    except Exception as e:
+        log.debug("Board %s (%s) failed", config, target, exc_info=True)
+        error = f"{type(e).__name__}: {e}"
+    return BoardResult(config, target, out_dir, error, time.perf_counter() - start)
+
+
+def generate_many(
+    configs: Sequence[Path],
+    targets: Sequence[str],
+    template_dir: Path,
+    out_root: Path,
+    jobs: int = None,
+    incremental: bool = False,
+    template_cache: Path = None,
+    config_cache: Path = None,
+) -> List[BoardResult]:
+    """
+    Generate C/DTS for every config x target.
+
+    Outputs land in `out_root/<config stem>/<target>/`. Each worker process
+    builds and precompiles the template environment once; with `jobs == 1`
+    everything runs in the calling process. A failing board is recorded in
+    its BoardResult and does not stop the others.
+
+    Args:
+        configs: Board YAML paths (see expand_configs).
+        targets: Target names, each generated for every config.
+        template_dir: Jinja2 template root.
+        out_root: Parent directory for per-board output trees.
+        jobs: Worker processes (default: CPU count).
+        incremental: Forwarded to CodeGenerator.
+        template_cache: Directory for the persistent compiled-template
+            cache shared by all workers; None disables it.
+        config_cache: Directory for validated-config snapshots; None
+            disables it.
+
+    Returns:
+        One BoardResult per (config, target), in input order.
+
+    Raises:
+        ValueError: if two configs have the same file stem (their outputs
+            would land in the same directory).
+    """
+    _check_unique_stems(configs)
+    jobs = jobs or os.cpu_count() or 1
+    work = [
+        (cfg, tgt, template_dir, out_root / cfg.stem / tgt, incremental)
+        for cfg in configs
+        for tgt in targets
+    ]
+    log.info("Generating %d board/target pairs with %d worker(s)", len(work), jobs)
+
+    if jobs == 1 or len(work) <= 1:
+        _init_worker(template_dir, template_cache, config_cache)
+        return [_generate_one(*w) for w in work]
+
+    with ProcessPoolExecutor(
+        max_workers=min(jobs, len(work)),
+        initializer=_init_worker,
+        initargs=(template_dir, template_cache, config_cache),
+    ) as pool:
+        return list(pool.map(_generate_one, *zip(*work)))
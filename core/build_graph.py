@@ -0,0 +1,275 @@
+import asyncio
+import json
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from core import timing
+from core.output import file_digest
+
+log = logging.getLogger(__name__)
+
+"""
+Minimal content-hash build graph.
+
+Each Task names the files it reads and writes. A task is skipped when its
+inputs, its command fingerprint and its outputs all match what the last
+successful run recorded; independent tasks run in parallel.
+"""
+
+
+@dataclass
+class Task:
+    """
+    One node in the build graph.
+
+    Attributes:
+        name: Unique task name.
+        action: Callable doing the work.
+        inputs: Files whose content determines the outputs.
+        outputs: Files the action produces.
+        deps: Names of tasks that must finish first.
+        fingerprint: Extra string folded into the up-to-date check
+            (e.g. the command line).
+        always: Run on every build (the task does its own change tracking).
+        key: Identifier reported in BuildError.failures (default: name).
+        digest: Hash applied to `inputs` (default: the raw file content).
+    """
+    name: str
+    action: Callable[[], None]
+    inputs: List[Path] = field(default_factory=list)
+    outputs: List[Path] = field(default_factory=list)
+    deps: List[str] = field(default_factory=list)
+    fingerprint: str = ""
+    always: bool = False
+    key: Any = None
+    digest: Callable[[Path], str] = file_digest
+
+
+class BuildError(RuntimeError):
+    """
+    One or more tasks failed; their dependents were not run.
+
+    Attributes:
+        failures: Task key -> exception raised by that task.
+
+    Args:
+        message: Overrides the default "N task(s) failed: ..." text.
+    """
+
+    def __init__(self, failures: Dict[Any, Exception], message: Optional[str] = None):
+        self.failures = failures
+        if message is None:
+            names = ", ".join(sorted(getattr(k, "name", str(k)) for k in failures))
+            message = f"{len(failures)} task(s) failed: {names}"
+        super().__init__(message)
+
+
+class BuildGraph:
+    """
+    Tasks plus the hashes recorded by previous builds.
+
+    Tasks may be added in stages: run() executes everything added so far
+    that has not run yet, so a later stage can be planned from an earlier
+    stage's outputs. Call save() once at the end to persist the state.
+
+    Args:
+        state_path: JSON file holding per-task hashes between builds.
+        jobs: Max tasks running at once (default: CPU count).
+    """
+
+    def __init__(self, state_path: Path, jobs: int = None):
+        self.state_path = state_path
+        self.jobs = jobs or os.cpu_count() or 1
+        self.tasks: Dict[str, Task] = {}
+        self.done: Dict[str, bool] = {}  # name -> True if it actually ran
+        self.state: Dict[str, Dict] = {}
+        if state_path.exists():
+            try:
+                self.state = json.loads(state_path.read_text())
+            except (OSError, ValueError) as e:
+                log.warning("Ignoring unreadable build state %s: %s", state_path, e)
+
+    def add(self, task: Task) -> Task:
+        if task.name in self.tasks:
+            raise ValueError(f"Duplicate task {task.name!r}")
+        self.tasks[task.name] = task
+        return task
+
+    def ran(self, name: str) -> bool:
+        """True if `name` executed (rather than being skipped) this build."""
+        return self.done.get(name, False)
+
+    @staticmethod
+    def _hashes(paths: List[Path], digest: Callable[[Path], str] = file_digest) -> Dict[str, Optional[str]]:
+        return {
+            str(p): digest(p) if p.exists() else None
+            for p in paths
+        }
+
+    def _up_to_date(self, task: Task) -> bool:
+        if task.always:
+            return False
+        rec = self.state.get(task.name)
+        if not rec or rec.get("fingerprint") != task.fingerprint:
+            return False
+        if rec.get("inputs") != self._hashes(task.inputs, task.digest):
+            return False
+        outputs = self._hashes(task.outputs)
+        return None not in outputs.values() and rec.get("outputs") == outputs
+
+    def _execute(self, task: Task) -> bool:
+        if self._up_to_date(task):
+            log.debug("Up to date: %s", task.name)
+            return False
+        log.debug("Running %s", task.name)
+        name = f"task/{task.name}"
+        with timing.stage(name):
+            task.action()
+        timing.add_bytes(name, sum(p.stat().st_size for p in task.outputs if p.exists()))
+        return True
+
+    def _record(self, task: Task) -> None:
+        outputs = self._hashes(task.outputs)
+        if None in outputs.values():
+            # nothing reliable to compare against next time
+            self.state.pop(task.name, None)
+            return
+        self.state[task.name] = {
+            "fingerprint": task.fingerprint,
+            "inputs": self._hashes(task.inputs, task.digest),
+            "outputs": outputs,
+        }
+
+    def _pending(self) -> Dict[str, Task]:
+        pending = {n: t for n, t in self.tasks.items() if n not in self.done}
+        for t in pending.values():
+            for d in t.deps:
+                if d not in self.tasks:
+                    raise ValueError(f"Task {t.name!r} depends on unknown task {d!r}")
+        return pending
+
+    def _ready(self, pending: Dict[str, Task], blocked: set) -> List[Task]:
+        """Pop the tasks whose deps are done, after dropping blocked ones."""
+        # drop everything downstream of a failure, to a fixed point
+        changed = True
+        while changed:
+            changed = False
+            for name in sorted(pending):
+                if any(d in blocked for d in pending[name].deps):
+                    blocked.add(name)
+                    del pending[name]
+                    changed = True
+        ready = [pending[n] for n in sorted(pending)
+                 if all(d in self.done for d in pending[n].deps)]
+        for task in ready:
+            del pending[task.name]
+        return ready
+
+    def _settle(self, task: Task, fut, failures: Dict[Any, Exception], blocked: set, ran: List[str]) -> None:
+        try:
+            executed = fut.result()
+        except Exception as e:
+            log.error("Task %s failed: %s", task.name, e)
+            failures[task.key if task.key is not None else task.name] = e
+            blocked.add(task.name)
+            self.state.pop(task.name, None)
+            return
+        self.done[task.name] = executed
+        if executed:
+            ran.append(task.name)
+            self._record(task)
+
+    def run(self) -> List[str]:
+        """
+        Execute every pending task in dependency order, up to `jobs` at a time.
+
+        Returns:
+            Names of the tasks that actually ran (not skipped).
+
+        Raises:
+            BuildError: after all runnable tasks finished, if any failed.
+        """
+        pending = self._pending()
+        failures: Dict[Any, Exception] = {}
+        blocked = set()
+        ran = []
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            running = {}
+            while pending or running:
+                for task in self._ready(pending, blocked):
+                    running[pool.submit(self._execute, task)] = task
+                if not running:
+                    if pending:
+                        raise ValueError(f"Dependency cycle among {sorted(pending)}")
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    self._settle(running.pop(fut), fut, failures, blocked, ran)
+
+        if failures:
+            raise BuildError(failures)
+        return ran
+
+    async def _execute_async(self, task: Task, limit: asyncio.Semaphore) -> bool:
+        loop = asyncio.get_running_loop()
+        async with limit:
+            if await loop.run_in_executor(None, self._up_to_date, task):
+                log.debug("Up to date: %s", task.name)
+                return False
+            log.debug("Running %s", task.name)
+            name = f"task/{task.name}"
+            with timing.stage(name):
+                if asyncio.iscoroutinefunction(task.action):
+                    await task.action()
+                else:
+                    await loop.run_in_executor(None, task.action)
+        timing.add_bytes(name, sum(p.stat().st_size for p in task.outputs if p.exists()))
+        return True
+
+    async def arun(self) -> List[str]:
+        """
+        run() on the running event loop, so several graphs can overlap.
+
+        Coroutine-function actions (e.g. toolchain steps on a
+        core.toolchain.ToolchainRunner) are awaited; plain callables run
+        in the loop's default executor. At most `jobs` tasks of this graph
+        are in flight at once.
+
+        Returns:
+            Names of the tasks that actually ran (not skipped).
+
+        Raises:
+            BuildError: after all runnable tasks finished, if any failed.
+        """
+        pending = self._pending()
+        failures: Dict[Any, Exception] = {}
+        blocked = set()
+        ran = []
+        limit = asyncio.Semaphore(self.jobs)
+        running = {}
+        try:
+            while pending or running:
+                for task in self._ready(pending, blocked):
+                    running[asyncio.ensure_future(self._execute_async(task, limit))] = task
+                if not running:
+                    if pending:
+                        raise ValueError(f"Dependency cycle among {sorted(pending)}")
+                    break
+                finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for fut in finished:
+                    self._settle(running.pop(fut), fut, failures, blocked, ran)
+        finally:
+            for fut in running:
+                fut.cancel()
+
+        if failures:
+            raise BuildError(failures)
+        return ran
+
+    def save(self) -> None:
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        self.state_path.write_text(json.dumps(self.state, indent=2, sort_keys=True) + "\n")
@@ -0,0 +1,69 @@
+import logging
+import os
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+"""
+Shared helpers for the on-disk caches: location and size-bounded eviction.
+"""
+
+APP_NAME = "embedded-codegen"
+
+
+def user_cache_dir(*parts: str) -> Path:
+    """
+    Per-user cache directory, honouring $XDG_CACHE_HOME.
+
+    Args:
+        parts: Sub-directory components (e.g. "templates").
+
+    Returns:
+        `$XDG_CACHE_HOME/embedded-codegen/<parts>` (falls back to ~/.cache).
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base, APP_NAME, *parts)
+
+
+def evict_lru(directory: Path, max_bytes: int, pattern: str = "*") -> int:
+    """
+    Delete least-recently-used files in `directory` until the files matching
+    `pattern` total at most `max_bytes`. Recency is the file mtime, which
+    cache readers bump on every hit.
+
+    Returns:
+        Number of files removed.
+    """
+    entries = []
+    total = 0
+    for path in directory.glob(pattern):
+        try:
+            st = path.stat()
+        except OSError:
+            continue  # removed by a concurrent process
+        entries.append((st.st_mtime, st.st_size, path))
+        total += st.st_size
+
+    removed = 0
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            path.unlink()
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+
+    if removed:
+        log.debug("Evicted %d cache entries from %s", removed, directory)
+    return removed
+
+
+def touch(path: Path) -> None:
+    """Mark a cache entry as recently used."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
@@ -1,8 +1,23 @@
+import functools
+import hashlib
+import json
 import logging
+import os
+import pickle
+import tempfile
 from pathlib import Path
 import yaml
+import pydantic
 from pydantic import BaseModel, ValidationError
-from typing import List, Optional
+from typing import Iterable, List, Optional
+
+from core.cache import evict_lru, touch, user_cache_dir
+from core.conflicts import ResourceConflictError, check_conflicts, check_target_conflicts
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader
 
 log = logging.getLogger(__name__)
 
@@ -29,7 +44,7 @@ Load & validate board YAML into Pydantic model.
 """
 
 class BoardConfig(BaseModel):
-     """
+    """
     Schema for the board under test.
 
     Attributes:
@@ -42,12 +57,92 @@ class BoardConfig(BaseModel):
     timer: List[Timer] = []
 
 
-def load_config(path: Path) -> BoardConfig:
+class ConfigCache:
+    """
+    On-disk snapshots of validated BoardConfigs, keyed on the YAML file's
+    content hash plus the schema, so unchanged boards skip both YAML parsing
+    and model validation.
+
+    Snapshots are pickled models: unpickling restores the validated fields
+    without re-running validation. Only configs that passed the resource
+    conflict check are stored. Entries are evicted LRU by total size.
+
+    Attributes:
+        hits, misses: Lookup counters for this process.
+    """
+
+    def __init__(self, directory: Path = None, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = Path(directory) if directory else user_cache_dir("configs")
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, data: bytes) -> Path:
+        h = hashlib.sha256(_schema_fingerprint().encode("utf-8"))
+        h.update(data)
+        return self.directory / f"{h.hexdigest()}.pickle"
+
+    def get(self, data: bytes) -> Optional[BoardConfig]:
+        path = self._path(data)
+        try:
+            cfg = pickle.loads(path.read_bytes())
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            # stale or foreign snapshot (ImportError, TypeError, ...): reparse
+            log.debug("Ignoring unreadable config snapshot %s: %s", path, e)
+            cfg = None
+        if not isinstance(cfg, BoardConfig):
+            self.misses += 1
+            return None
+        touch(path)
+        self.hits += 1
+        return cfg
+
+    def put(self, data: bytes, cfg: BoardConfig) -> None:
+        path = self._path(data)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(cfg, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        evict_lru(self.directory, self.max_bytes, "*.pickle")
+
+    def stats(self) -> str:
+        return f"{self.hits} hits, {self.misses} misses"
+
+
+@functools.lru_cache(maxsize=None)
+def _schema_fingerprint() -> str:
+    # a schema or pydantic upgrade must invalidate old snapshots
+    schema = json.dumps(BoardConfig.model_json_schema(), sort_keys=True)
+    return f"{pydantic.VERSION}\0{schema}\0conflict-check-v1"
+
+
+def load_config(
+    path: Path,
+    cache: ConfigCache = None,
+    check: bool = True,
+    targets: Iterable[str] = (),
+) -> BoardConfig:
 
-     """Load and validate a YAML board config.
+    """Load and validate a YAML board config.
+
+    Uses libyaml's CSafeLoader when PyYAML was built with it.
 
     Args:
         path: Path to the YAML file defining name, gpio, uart, timer lists.
+        cache: Optional ConfigCache; on a hit the stored snapshot is returned
+            without parsing or validating.
+        check: Run the cross-peripheral conflict check (core.conflicts).
+            Unchecked configs are never stored in the cache.
+        targets: Targets the config is loaded for; their own rules (e.g.
+            STM32 alt-func names) are checked too, also on a cache hit.
 
     Returns:
         A `BoardConfig` instance with validated fields.
@@ -55,15 +150,27 @@ def load_config(path: Path) -> BoardConfig:
     Raises:
         yaml.YAMLError: if the YAML is invalid.
         ValidationError: if required fields are missing/invalid.
+        ResourceConflictError: if pins or names are assigned twice, or an
+            alt-func is invalid for one of `targets`.
     """
 
     log.debug("Opening YAML config at %s", path)
-    with open(path, "r") as f:
-        try:
-            raw = yaml.safe_load(f)
-        except yaml.YAMLError as ye:
-            log.error("YAML parse error in %s: %s", path, ye)
-            raise
+    with open(path, "rb") as f:
+        data = f.read()
+
+    if cache is not None:
+        cfg = cache.get(data)
+        if cfg is not None:
+            log.debug("Config %r loaded from snapshot cache", cfg.name)
+            if check:
+                check_target_conflicts(cfg, targets)
+            return cfg
+
+    try:
+        raw = yaml.load(data, Loader=SafeLoader)
+    except yaml.YAMLError as ye:
+        log.error("YAML parse error in %s: %s", path, ye)
+        raise
 
     if not isinstance(raw, dict):
         log.error("Top-level YAML is not a mapping")
@@ -75,6 +182,14 @@ def load_config(path: Path) -> BoardConfig:
         log.error("Config validation error: %s", ve)
         raise
 
+    if check:
+        try:
+            check_conflicts(cfg, targets)
+        except ResourceConflictError as ce:
+            log.error("Config resource conflicts: %s", ce)
+            raise
+
     log.info("Config %r validated successfully", cfg.name)
+    if cache is not None and check:
+        cache.put(data, cfg)
     return cfg
-
@@ -0,0 +1,150 @@
+import logging
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Iterable, List
+
+if TYPE_CHECKING:  # core.config runs the check from load_config
+    from core.config import BoardConfig
+
+log = logging.getLogger(__name__)
+
+"""
+Cross-peripheral resource checks for a validated BoardConfig.
+
+Field validation (pydantic) looks at one entry at a time; this stage looks
+across entries: every pin claimed by a GPIO or a UART tx/rx line, and every
+UART and timer name. Each resource kind is hashed once (a set() pass in C
+for the clean case, a dict index only when something repeats), so checking
+stays O(n) on boards with 100k+ entries and runs by default from
+load_config.
+
+Rules that depend on the target (GPIO alternate-function naming) only run
+for the targets a caller names; see TARGET_ALT_FUNCS.
+"""
+
+# target -> (valid alt_func values, how to describe them); targets not
+# listed (x86, imx7 with its own mux-mode scheme) accept any alt_func
+TARGET_ALT_FUNCS = {
+    "stm32": (re.compile(r"AF(?:[0-9]|1[0-5])"), "AF0..AF15"),
+}
+
+
+@dataclass(frozen=True)
+class Conflict:
+    """
+    One resource claimed more than once, or an invalid setting.
+
+    Attributes:
+        kind: "pin", "uart-name", "timer-name" or "alt-func".
+        resource: The pin, name or alt-func value concerned.
+        owners: Config locations involved, e.g. "gpio[3]", "uart[0].tx".
+        detail: For "alt-func", the target and the values it accepts.
+    """
+    kind: str
+    resource: str
+    owners: tuple
+    detail: str = ""
+
+    def __str__(self):
+        where = ", ".join(self.owners)
+        if self.kind == "alt-func":
+            return f"invalid alt_func {self.resource!r} at {where} ({self.detail})"
+        what = {"pin": "pin", "uart-name": "UART name", "timer-name": "timer name"}[self.kind]
+        return f"{what} {self.resource} assigned {len(self.owners)} times: {where}"
+
+
+class ResourceConflictError(ValueError):
+    """
+    A board config double-assigns pins or names, or uses invalid alt-funcs.
+
+    Attributes:
+        conflicts: Every Conflict found, in config order.
+    """
+
+    def __init__(self, board: str, conflicts: List[Conflict]):
+        self.conflicts = conflicts
+        lines = "\n".join(f"  - {c}" for c in conflicts)
+        super().__init__(f"{len(conflicts)} resource conflict(s) in board {board!r}:\n{lines}")
+
+
+def _duplicates(keys: List[str]) -> Dict[str, List[int]]:
+    """key -> positions in `keys`, for every key occurring more than once."""
+    if len(set(keys)) == len(keys):
+        # the common, clean case: one hashing pass in C
+        return {}
+    first: Dict[str, int] = {}
+    dups: Dict[str, List[int]] = {}
+    for pos, key in enumerate(keys):
+        prev = first.setdefault(key, pos)
+        if prev != pos:
+            dups.setdefault(key, [prev]).append(pos)
+    return dict(sorted(dups.items(), key=lambda kv: kv[1][0]))
+
+
+def find_conflicts(cfg: "BoardConfig", targets: Iterable[str] = ()) -> List[Conflict]:
+    """
+    Index every pin, UART name and timer name and report each one used
+    more than once, plus the target rules for `targets`.
+
+    Pin names are compared case-insensitively ("pa9" clashes with "PA9").
+
+    Returns:
+        Conflicts grouped by kind (pins, UART names, timer names,
+        alt-funcs), each group in order of first appearance.
+    """
+    # GPIO pins first, then tx, rx per UART: a position maps back to its owner
+    n_gpio = len(cfg.gpio)
+    pins = [g.pin.upper() for g in cfg.gpio]
+    pins += [p.upper() for u in cfg.uart for p in (u.tx, u.rx)]
+
+    def pin_owner(pos: int) -> str:
+        if pos < n_gpio:
+            return f"gpio[{pos}]"
+        i, line = divmod(pos - n_gpio, 2)
+        return f"uart[{i}].{('tx', 'rx')[line]} ({cfg.uart[i].name})"
+
+    conflicts = [
+        Conflict("pin", key, tuple(map(pin_owner, positions)))
+        for key, positions in _duplicates(pins).items()
+    ]
+    for kind, field, entries in (("uart-name", "uart", cfg.uart), ("timer-name", "timer", cfg.timer)):
+        conflicts += [
+            Conflict(kind, key, tuple(f"{field}[{i}]" for i in positions))
+            for key, positions in _duplicates([e.name for e in entries]).items()
+        ]
+    return conflicts + find_target_conflicts(cfg, targets)
+
+
+def find_target_conflicts(cfg: "BoardConfig", targets: Iterable[str]) -> List[Conflict]:
+    """GPIO alt-funcs that `targets` do not accept (see TARGET_ALT_FUNCS)."""
+    conflicts = []
+    for target in dict.fromkeys(targets):
+        rule = TARGET_ALT_FUNCS.get(target)
+        if rule is None:
+            continue
+        valid, expected = rule
+        conflicts += [
+            Conflict("alt-func", g.alt_func, (f"gpio[{i}]",), f"{target} expects {expected}")
+            for i, g in enumerate(cfg.gpio)
+            if g.alt_func is not None and not valid.fullmatch(g.alt_func)
+        ]
+    return conflicts
+
+
+def check_conflicts(cfg: "BoardConfig", targets: Iterable[str] = ()) -> None:
+    """
+    Raises:
+        ResourceConflictError: listing every conflict, if there are any.
+    """
+    conflicts = find_conflicts(cfg, targets)
+    if conflicts:
+        raise ResourceConflictError(cfg.name, conflicts)
+    log.debug("No resource conflicts in %r", cfg.name)
+
+
+def check_target_conflicts(cfg: "BoardConfig", targets: Iterable[str]) -> None:
+    """check_conflicts() for the target rules only, e.g. on a config that
+    already passed the board-wide checks."""
+    conflicts = find_target_conflicts(cfg, targets)
+    if conflicts:
+        raise ResourceConflictError(cfg.name, conflicts)
@@ -1,9 +1,18 @@
 import datetime
+import functools
+import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader
+from typing import Dict, List, Optional, Tuple, Union
+from jinja2 import BytecodeCache, Environment, FileSystemLoader, meta
 
 from core.config import BoardConfig
+from core.manifest import Manifest, hash_inputs
+from core.output import link_or_copy, write_atomic
+from core.plugin_cache import PluginCache
+from core import timing
 import core.peripherals 
 from core.peripherals.base import PERIPHERAL_REGISTRY
 
@@ -14,9 +23,102 @@ log = logging.getLogger(__name__)
 Core C & DTS code generator: reads BoardConfig, renders templates.
 """
 
+def make_environment(template_dir: Path, bytecode_cache: BytecodeCache = None) -> Environment:
+    """
+    Build the Jinja2 environment used for C/DTS rendering.
+
+    Callers generating many boards should build one and pass it to every
+    CodeGenerator so compiled templates are reused.
+
+    Args:
+        template_dir: Jinja2 template root.
+        bytecode_cache: Optional persistent compiled-template cache
+            (see core.template_cache.TemplateBytecodeCache).
+    """
+    return Environment(
+        loader=FileSystemLoader(str(template_dir)),
+        trim_blocks=True,
+        lstrip_blocks=True,
+        bytecode_cache=bytecode_cache,
+    )
+
+
+def precompile_templates(env: Environment) -> int:
+    """Compile every template in `env` up front; returns how many were loaded."""
+    names = env.list_templates(extensions=["j2"])
+    for name in names:
+        env.get_template(name)
+    log.debug("Precompiled %d templates", len(names))
+    return len(names)
+
+
+# Context names that carry no board data: `now` only stamps a header comment.
+# Outputs whose templates read nothing else are the same for every board on
+# a target (see Manifest "board_independent" and core.ir.runtime_cache).
+BOARD_INDEPENDENT_VARS = frozenset({"now", "target"})
+
+
+# CodeGenerator `timestamp` default: the wall clock, or SOURCE_DATE_EPOCH
+# when that is set (https://reproducible-builds.org/specs/source-date-epoch/)
+NOW = "now"
+
+
+def source_date_epoch() -> Optional[datetime.datetime]:
+    """SOURCE_DATE_EPOCH as a UTC datetime, or None if it is unset."""
+    value = os.environ.get("SOURCE_DATE_EPOCH")
+    if not value:
+        return None
+    try:
+        return datetime.datetime.fromtimestamp(int(value), tz=datetime.timezone.utc)
+    except (ValueError, OverflowError, OSError):
+        raise ValueError(f"SOURCE_DATE_EPOCH must be a Unix timestamp, got {value!r}") from None
+
+
+def resolve_timestamp(timestamp: Union[str, datetime.datetime, None] = NOW) -> Tuple[Optional[datetime.datetime], bool]:
+    """
+    The `now` passed to templates, and whether it is fixed.
+
+    Args:
+        timestamp: NOW, a datetime to stamp every header with, or None to
+            leave the "Generated on" line out.
+
+    Returns:
+        (value for `now`, True unless it is the wall clock). Only fixed
+        values make outputs byte-identical across runs.
+    """
+    if timestamp != NOW:
+        return timestamp, True
+    epoch = source_date_epoch()
+    if epoch is not None:
+        return epoch, True
+    return datetime.datetime.now(), False
+
+
+@functools.lru_cache(maxsize=256)
+def referenced_variables(env: Environment, source: str) -> frozenset:
+    """
+    Context names a template actually reads. Only these are part of an
+    output's config slice, so e.g. hal.h does not go stale when a pin moves.
+    """
+    return frozenset(meta.find_undeclared_variables(env.parse(source)))
+
+
 class CodeGenerator:
 
     def __init__(
+        self,
+        config: BoardConfig,
+        template_dir: Path,
+        out_dir: Path,
+        target: str,
+        incremental: bool = False,
+        env: Environment = None,
+        jobs: int = None,
+        stream: bool = False,
+        share_from: Manifest = None,
+        timestamp: Union[str, datetime.datetime, None] = NOW,
+        plugin_cache: PluginCache = None,
+    ):
         """
             Initialize with config model, templates dir, output dir, target.
 
@@ -25,20 +127,38 @@ class CodeGenerator:
                 template_dir: Path to Jinja2 root.
                 out_dir: Path where generated files go.
                 target: Target name for DTS injection.
+                incremental: Keep existing outputs and only rewrite files
+                    whose inputs or content changed (see core.manifest).
+                env: Shared Jinja2 environment (see make_environment); a
+                    fresh one is built from template_dir if omitted.
+                jobs: Threads for rendering HAL and peripheral outputs
+                    (default: CPU count; 1 renders serially).
+                stream: Render with Template.generate() straight into the
+                    output file instead of building each file as one string;
+                    keeps peak memory flat for very large boards.
+                share_from: Manifest of another target's finished tree for
+                    the same board; outputs rendered there from identical
+                    inputs are hard-linked (or copied) instead of rendered.
+                timestamp: "Generated on" stamp, see resolve_timestamp
+                    (None omits it; outputs are then byte-identical for
+                    identical inputs).
+                plugin_cache: On-disk cache of peripheral plugin outputs;
+                    a plugin whose config slice and templates are unchanged
+                    is copied from it instead of rendered. Only used with a
+                    fixed timestamp, which is part of the cache key; a
+                    wall-clock stamp would replay old "Generated on" lines.
         """
-        self,
-        config: BoardConfig,
-        template_dir: Path,
-        out_dir: Path,
-        target: str,
-    ):
         self.config = config
+        self.incremental = incremental
+        self.jobs = jobs or os.cpu_count() or 1
+        self.stream = stream
+        self.manifest = None
+        self.share_from = share_from
+        self.timestamp = timestamp
+        self.plugin_cache = plugin_cache
+        self._volatile = ("now",)
         self.target = target
-        self.env = Environment(
-            loader=FileSystemLoader(str(template_dir)),
-            trim_blocks=True,
-            lstrip_blocks=True,
-        )
+        self.env = env if env is not None else make_environment(template_dir)
         self.out_dir = out_dir
         # define output subdirs
         self.dirs = {
@@ -54,11 +174,98 @@ class CodeGenerator:
             log.debug("Ensuring directory %s ->  %s", name, path)
             path.mkdir(parents=True, exist_ok=True)
 
-    def _render(self, template_name: str, dest: Path, **ctx):
-        log.debug("Rendering template %s -> %s", template_name, dest)
+    def _render(self, template_name: str, dest: Path, slice_key: str = None, **ctx) -> int:
+        """
+        Render one output unless an identical one can be reused.
+
+        Args:
+            slice_key: Set for plugin outputs (PeripheralGenerator.slice_key):
+                fingerprints `board` by the plugin's config slice, and makes
+                the output eligible for the plugin cache.
+
+        Returns:
+            Bytes written to `dest`; 0 if it was up to date or shared.
+        """
         tpl = self.env.get_template(template_name)
-        dest.write_text(tpl.render(**ctx))
+        source, _, _ = self.env.loader.get_source(self.env, template_name)
+        used = referenced_variables(self.env, source)
+        fingerprint = {k: v for k, v in ctx.items() if k in used}
+        if slice_key is not None and "board" in fingerprint:
+            fingerprint["board"] = slice_key
+        inputs = hash_inputs(source, fingerprint, self._volatile)
+        board_independent = used <= BOARD_INDEPENDENT_VARS
+
+        if self.incremental and self.manifest.is_current(dest, inputs):
+            log.debug("Up to date: %s", dest)
+            self.manifest.carry_over(dest)
+            return 0
+
+        if self._share(dest, inputs):
+            return 0
+
+        # a volatile (wall-clock) `now` is not in `inputs`: never replay it
+        cache = self.plugin_cache if slice_key is not None and not self._volatile else None
+        content = None
+        if cache is not None:
+            content = cache.get(inputs, dest, keep_if_unchanged=self.incremental)
+        if content is not None:
+            log.debug("Reused cached render of %s -> %s", template_name, dest)
+            self.manifest.record(dest, inputs, content, board_independent=board_independent)
+            return dest.stat().st_size
+
+        log.debug("Rendering template %s -> %s", template_name, dest)
+        name = f"render/{self.manifest.rel(dest)}"
+        with timing.stage(name):
+            chunks = tpl.generate(**ctx) if self.stream else [tpl.render(**ctx)]
+            content = write_atomic(dest, chunks, keep_if_unchanged=self.incremental)
+        size = dest.stat().st_size
+        timing.add_bytes(name, size)
         log.info("Generated %s", dest)
+        self.manifest.record(dest, inputs, content, board_independent=board_independent)
+        if cache is not None:
+            cache.put(inputs, dest)
+        return size
+
+    def _share(self, dest: Path, inputs: str) -> bool:
+        """Link `dest` from the share_from tree if it was rendered from `inputs` there."""
+        if self.share_from is None:
+            return False
+        rel = self.manifest.rel(dest)
+        entry = self.share_from.entries.get(rel)
+        if not entry or entry["inputs"] != inputs:
+            return False
+        link_or_copy(self.share_from.out_dir / rel, dest)
+        log.debug("Shared %s from %s", dest, self.share_from.out_dir)
+        self.manifest.adopt(dest, entry)
+        return True
+
+    @staticmethod
+    def _run_plugin(name: str, gen) -> None:
+        stage = f"plugin/{name}"
+        with timing.stage(stage):
+            gen.generate()
+        timing.add_bytes(stage, gen.bytes_written)
+
+    def _run_all(self, tasks):
+        """
+        Call every task, concurrently when jobs > 1. All of them are waited
+        for; the first failure in submission order is re-raised.
+        """
+        if self.jobs <= 1 or len(tasks) <= 1:
+            for task in tasks:
+                task()
+            return
+        with ThreadPoolExecutor(max_workers=min(self.jobs, len(tasks))) as pool:
+            futures = [pool.submit(task) for task in tasks]
+            for fut in futures:
+                fut.result()
+
+    def _prune(self):
+        """Delete outputs the previous run produced but this one did not."""
+        for path in self.manifest.stale():
+            if path.exists():
+                log.info("Removing stale output %s", path)
+                path.unlink()
 
     def _clean(self):
         for path in self.dirs.values():
@@ -75,41 +282,53 @@ class CodeGenerator:
 
         log.info("Starting C-code generation into %s", self.out_dir)
         # Base directory
-        self.out_dir.mkdir(exist_ok=True)
-        # Clean & recreate
-        self._clean()
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        if self.incremental:
+            self.manifest = Manifest.load(self.out_dir)
+        else:
+            # Clean & recreate
+            self._clean()
+            self.manifest = Manifest(self.out_dir)
         self._mk_dirs()
-        now = datetime.datetime.now()
+        now, fixed = resolve_timestamp(self.timestamp)
+        self._volatile = () if fixed else ("now",)
+
+        # Steps 1 and 2 are independent of each other and run on the pool;
+        # everything from 3) on needs the collected peripheral_meta.
+        tasks = []
 
         # 1) HAL and syscalls
-        self._render(
-            "shared/hal.h.j2", self.dirs["include"] / "hal.h", board=self.config, now=now
-        )
-        self._render(
-            "shared/hal.c.j2", self.dirs["src"] / "hal.c", board=self.config, now=now
-        )
+        tasks.append(partial(
+            self._render, "shared/hal.h.j2", self.dirs["include"] / "hal.h", board=self.config, now=now
+        ))
+        tasks.append(partial(
+            self._render, "shared/hal.c.j2", self.dirs["src"] / "hal.c", board=self.config, now=now
+        ))
         if self.target == "stm32":
-            self._render(
+            tasks.append(partial(
+                self._render,
                 "shared/syscalls.c.j2",
                 self.dirs["src"] / "syscalls.c",
                 board=self.config,
                 now=now,
-            )
+            ))
 
         print("Registered peripherals:", list(PERIPHERAL_REGISTRY.keys()))
 
-        # 2) Peripheral plugins
+        # 2) Peripheral plugins (registry order fixes peripheral_meta order)
         peripheral_meta = []
         for name, GenClass in PERIPHERAL_REGISTRY.items():
-            gen = GenClass(self.config, self.env, self.dirs, now)
+            gen = GenClass(self.config, self.env, self.dirs, now, render=self._render)
             if gen.should_generate():
-                gen.generate()
+                tasks.append(partial(self._run_plugin, name, gen))
                 peripheral_meta.append({
                     "name": name,
                     "header": f"{name.lower()}.h",
                     "func": f"{name.lower()}_init()",
                 })
 
+        self._run_all(tasks)
+
         # 3) config.h
         self._render(
             "shared/config.h.j2",
@@ -146,5 +365,67 @@ class CodeGenerator:
                 now=now,
             )
 
+        if self.incremental:
+            self._prune()
+        self.manifest.save()
+
         log.info("C code + DTS generation complete!")
 
+
+
+def generate_targets(
+    config: BoardConfig,
+    template_dir: Path,
+    out_root: Path,
+    targets: List[str],
+    incremental: bool = False,
+    env: Environment = None,
+    jobs: int = None,
+    stream: bool = False,
+    timestamp: Union[str, datetime.datetime, None] = NOW,
+    plugin_cache: PluginCache = None,
+) -> Dict[str, Path]:
+    """
+    Generate one board for several targets into `out_root/<target>/`.
+
+    The first target renders everything. The others then run concurrently
+    and render only what differs per target (the Makefile, syscalls.c, the
+    DTS); every other output has the same template and config slice, so it
+    is hard-linked (or copied) from the first tree.
+
+    Args:
+        config: BoardConfig instance.
+        template_dir: Jinja2 template root.
+        out_root: Parent of the per-target output trees.
+        targets: Target names; duplicates are ignored.
+        incremental, stream, plugin_cache: Forwarded to every CodeGenerator.
+        timestamp: See resolve_timestamp; resolved once, so a fixed stamp
+            is identical in every tree.
+        env: Jinja2 environment shared by all targets (built if omitted).
+        jobs: Render threads per target.
+
+    Returns:
+        Target name -> its output directory, in `targets` order.
+    """
+    targets = list(dict.fromkeys(targets))
+    now, fixed = resolve_timestamp(timestamp)
+    if fixed:
+        timestamp = now
+    env = env if env is not None else make_environment(template_dir)
+    out_dirs = {t: out_root / t for t in targets}
+
+    def generator(target, share_from=None):
+        return CodeGenerator(
+            config, template_dir, out_dirs[target], target,
+            incremental=incremental, env=env, jobs=jobs, stream=stream,
+            share_from=share_from, timestamp=timestamp, plugin_cache=plugin_cache,
+        )
+
+    first = generator(targets[0])
+    first.generate()
+    rest = targets[1:]
+    if rest:
+        with ThreadPoolExecutor(max_workers=len(rest)) as pool:
+            for fut in [pool.submit(generator(t, first.manifest).generate) for t in rest]:
+                fut.result()
+    return out_dirs
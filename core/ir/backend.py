@@ -1,69 +1,220 @@
-import subprocess
-import tempfile
-import os
-from pathlib import Path
+import asyncio
+import functools
+import logging
+import threading
+from typing import Optional
+
+from core import timing
+from core.ir.object_cache import ObjectCache, object_cache_key
+from core.ir.optimize import codegen_level, normalize_level, opt_command, optimize_module
+from core.ir.target_registry import llvm, target_machine
+from core.toolchain import ToolchainRunner, default_runner, run_tool
+
+log = logging.getLogger(__name__)
 
 
 """
 Initialize LLVM and compile LLVM IR to object code using llvmlite.binding.
 """
 
-def init_llvm():
+BACKENDS = ("auto", "llvmlite", "llc")
+
+_EMIT_LOCK = threading.Lock()
+
+
+def emit_object(
+    llvm_ir: str,
+    target_triple: str,
+    cpu: str = "generic",
+    features: str = "",
+    opt_level: str = None,
+    internalize: bool = False,
+) -> bytes:
     """
-    Initialize the LLVM binding, registering all available targets.
+    Compile IR to object code in-process via the target machine's emit_object,
+    optionally running the `opt_level` pipeline first (see core.ir.optimize).
+
+    Raises:
+        RuntimeError: if llvmlite is missing, the target is not built into
+            LLVM, or the IR does not parse/verify.
     """
-    pass
+    tm = target_machine(target_triple, cpu, features)
+    # cached target machines are shared between threads (daemon, pools);
+    # LLVM codegen on one TargetMachine is not safe to run concurrently
+    with _EMIT_LOCK:
+        mod = llvm.parse_assembly(llvm_ir)
+        mod.verify()
+        if opt_level:
+            optimize_module(mod, target_triple, cpu, features, opt_level, internalize)
+        return tm.emit_object(mod)
+
+
+def _resolve_backend(backend: str, target_triple: str, cpu: str, features: str) -> str:
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}; expected one of {BACKENDS}")
+    if backend != "auto":
+        return backend
+    if llvm is None:
+        return "llc"
+    try:
+        target_machine(target_triple, cpu, features)
+    except RuntimeError:
+        log.debug("llvmlite cannot target %s, falling back to llc", target_triple)
+        return "llc"
+    return "llvmlite"
+
+
+def _toolchain_id(backend: str) -> str:
+    if backend == "llvmlite":
+        return "llvmlite " + ".".join(map(str, llvm.llvm_version_info))
+    return llc_version()
+
+
+@functools.lru_cache(maxsize=None)
+def llc_version() -> str:
+    """Version banner of the `llc` on PATH; part of every object cache key."""
+    return run_tool(["llc", "--version"]).decode("utf-8", errors="replace").strip()
 
 
 def compile_module(
     llvm_ir: str,
     target_triple: str,
     cpu: str = "generic",
-    features: str = ""
+    features: str = "",
+    cache: Optional[ObjectCache] = None,
+    backend: str = "auto",
+    opt_level: str = None,
+    internalize: bool = False,
 ) -> bytes:
     """
-    Emit an object file by invoking the external `llc` tool.
+    Compile IR to an object, in-process via llvmlite or by invoking `llc`.
 
     Args:
         llvm_ir: Textual LLVM IR.
         target_triple: The target triple (e.g. 'x86_64-pc-linux-gnu', 'armv7-none-eabi').
         cpu: CPU identifier for -mcpu.
         features: Comma-separated CPU features for -mattr.
+        cache: Optional ObjectCache; on a hit no compilation happens at all.
+        backend: "llvmlite", "llc", or "auto" (llvmlite when it is installed
+            and supports the triple, else llc).
+        opt_level: O0..O3, Os or Oz to optimize before codegen (None: emit
+            the IR as given). llvmlite optimizes in-process; the llc route
+            pipes through the toolchain's `opt`.
+        internalize: Internalize everything but `main` first (whole-program
+            modules only).
 
     Returns:
         Raw object code bytes.
+
+    Raises:
+        core.toolchain.ToolError: if `opt` or `llc` fails or times out
+            (its stderr is attached).
     """
-    # Write IR to a temporary file
-    with tempfile.NamedTemporaryFile(suffix=".ll", delete=False) as ir_file:
-        ir_file.write(llvm_ir.encode("utf-8"))
-        ir_path = ir_file.name
+    backend = _resolve_backend(backend, target_triple, cpu, features)
+    if opt_level:
+        opt_level = normalize_level(opt_level)
 
-    # Create a temporary file for the output object
-    fd, obj_path = tempfile.mkstemp(suffix=".o")
-    os.close(fd)
+    key = None
+    if cache is not None:
+        key = _cache_key(llvm_ir, target_triple, cpu, features, backend, opt_level, internalize)
+        obj = cache.get(key)
+        if obj is not None:
+            return obj
+
+    with timing.stage(f"compile_module/{backend}"):
+        if backend == "llvmlite":
+            obj = emit_object(llvm_ir, target_triple, cpu, features, opt_level, internalize)
+        else:
+            if opt_level:
+                llvm_ir = _run_opt(llvm_ir, opt_level, internalize)
+            obj = _run_llc(llvm_ir, target_triple, cpu, features, opt_level)
+    timing.add_bytes(f"compile_module/{backend}", len(obj))
+    if cache is not None:
+        cache.put(key, obj)
+    return obj
+
+
+async def compile_module_async(
+    llvm_ir: str,
+    target_triple: str,
+    cpu: str = "generic",
+    features: str = "",
+    cache: Optional[ObjectCache] = None,
+    backend: str = "auto",
+    opt_level: str = None,
+    internalize: bool = False,
+    runner: ToolchainRunner = None,
+) -> bytes:
+    """
+    compile_module() as a coroutine.
+
+    The llc route runs `opt`/`llc` as asyncio subprocesses on `runner`
+    (default: core.toolchain.default_runner()); llvmlite emission runs in
+    the loop's default executor.
+
+    Raises:
+        core.toolchain.ToolError: if `opt` or `llc` fails or times out.
+    """
+    backend = _resolve_backend(backend, target_triple, cpu, features)
+    if opt_level:
+        opt_level = normalize_level(opt_level)
+
+    key = None
+    if cache is not None:
+        key = _cache_key(llvm_ir, target_triple, cpu, features, backend, opt_level, internalize)
+        obj = cache.get(key)
+        if obj is not None:
+            return obj
+
+    runner = runner or default_runner()
+    with timing.stage(f"compile_module/{backend}"):
+        if backend == "llvmlite":
+            obj = await asyncio.get_running_loop().run_in_executor(
+                None, emit_object, llvm_ir, target_triple, cpu, features, opt_level, internalize,
+            )
+        else:
+            if opt_level:
+                cmd = _opt_command(opt_level, internalize)
+                llvm_ir = (await runner.run(cmd, input=llvm_ir.encode("utf-8"))).decode("utf-8")
+            cmd = _llc_command(target_triple, cpu, features, opt_level)
+            obj = await runner.run(cmd, input=llvm_ir.encode("utf-8"))
+    timing.add_bytes(f"compile_module/{backend}", len(obj))
+    if cache is not None:
+        cache.put(key, obj)
+    return obj
+
+
+def _cache_key(llvm_ir, target_triple, cpu, features, backend, opt_level, internalize) -> str:
+    toolchain = _toolchain_id(backend)
+    if opt_level:
+        toolchain += f" -{opt_level}" + (" internalize" if internalize else "")
+    return object_cache_key(llvm_ir, target_triple, cpu, features, toolchain)
+
+
+def _opt_command(opt_level: str, internalize: bool):
+    return opt_command(opt_level, internalize) + ["-S", "-o", "-", "-"]
+
+
+def _run_opt(llvm_ir: str, opt_level: str, internalize: bool) -> str:
+    return run_tool(_opt_command(opt_level, internalize), input=llvm_ir.encode("utf-8")).decode("utf-8")
+
+
+def _llc_command(target_triple: str, cpu: str, features: str, opt_level: str = None):
+    # IR in on stdin, object out on stdout: no temp files on either side
+    cmd = [
+        "llc",
+        "-filetype=obj",
+        "-mtriple", target_triple,
+        "-mcpu", cpu,
+    ]
+    if features:
+        cmd.extend(["-mattr", features])
+    if opt_level:
+        cmd.append(f"-O={codegen_level(opt_level)}")
+    cmd.extend(["-o", "-", "-"])
+    return cmd
 
-    try:
-        # Build llc command
-        cmd = [
-            "llc",
-            "-filetype=obj",
-            "-mtriple", target_triple,
-            "-mcpu", cpu,
-        ]
-        if features:
-            cmd.extend(["-mattr", features])
-        cmd.extend(["-o", obj_path, ir_path])
-
-        # Invoke llc to compile IR to object file
-        subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-
-        # Read and return the generated object code
-        return Path(obj_path).read_bytes()
-    finally:
-        # Clean up temporary files
-        for p in (ir_path, obj_path):
-            try:
-                Path(p).unlink()
-            except OSError:
-                pass
 
+def _run_llc(llvm_ir: str, target_triple: str, cpu: str, features: str, opt_level: str = None) -> bytes:
+    cmd = _llc_command(target_triple, cpu, features, opt_level)
+    return run_tool(cmd, input=llvm_ir.encode("utf-8"))
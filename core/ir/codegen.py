@@ -1,17 +1,141 @@
-from llvmlite import ir, binding as llvm
-from core.ast.nodes import ASTModule, ASTCall
+from dataclasses import dataclass
+from itertools import groupby
+from typing import Dict, List, Tuple
+
+from llvmlite import ir
+from core.ast.nodes import ASTModule, ASTCall, ASTGpioInit, ASTTimerInit, ASTUartInit
+from core.ir.target_registry import data_layout
 
 """
 Lower an ASTModule to LLVM IR using llvmlite.ir.
+
+Per-instance init nodes are lowered through NODE_KINDS: each run of
+same-kind nodes becomes one constant table of argument structs plus a loop
+that calls the kind's HAL function on every row, so IR size and build time
+grow linearly with the board rather than one unrolled call per instance.
 """
+
+I32 = ir.IntType(32)
+CHAR_PTR = ir.IntType(8).as_pointer()
+FIELD_TYPES = {"str": CHAR_PTR, "int": I32}
+
+
+@dataclass(frozen=True)
+class NodeKind:
+    """
+    How one per-instance AST node type lowers to IR.
+
+    Attributes:
+        hal_func: C HAL function called once per instance (see hal.h).
+        fields: (node attribute, "str" | "int") pairs, in argument order.
+    """
+    hal_func: str
+    fields: Tuple[Tuple[str, str], ...]
+
+    def function_type(self) -> ir.FunctionType:
+        return ir.FunctionType(ir.VoidType(), [FIELD_TYPES[t] for _, t in self.fields])
+
+
+# AST node class -> lowering rule
+NODE_KINDS: Dict[type, NodeKind] = {}
+
+
+def register_node_kind(node_cls: type, hal_func: str, fields: Tuple[Tuple[str, str], ...]) -> None:
+    """Make `node_cls` instances lower to table-driven calls of `hal_func`."""
+    NODE_KINDS[node_cls] = NodeKind(hal_func, tuple(fields))
+
+
+register_node_kind(ASTGpioInit, "configure_pin",
+                   (("pin", "str"), ("mode", "str"), ("pull", "str"), ("speed", "str")))
+register_node_kind(ASTUartInit, "configure_uart",
+                   (("name", "str"), ("tx", "str"), ("rx", "str"), ("baudrate", "int")))
+register_node_kind(ASTTimerInit, "configure_timer",
+                   (("name", "str"), ("prescaler", "int"), ("period", "int")))
+
+
+class _Lowering:
+    """Module-level state for one ast_to_llvm_ir call."""
+
+    def __init__(self, llvm_mod: ir.Module):
+        self.mod = llvm_mod
+        self.strings: Dict[str, ir.Constant] = {}
+        self.tables = 0
+
+    def function(self, name: str, fnty: ir.FunctionType) -> ir.Function:
+        fn = self.mod.globals.get(name)
+        if fn is None:
+            fn = ir.Function(self.mod, fnty, name=name)
+        return fn
+
+    def string(self, value) -> ir.Constant:
+        """Pointer to a shared NUL-terminated constant; None lowers to NULL."""
+        if value is None:
+            return ir.Constant(CHAR_PTR, None)
+        ptr = self.strings.get(value)
+        if ptr is None:
+            data = bytearray(value.encode("utf-8") + b"\0")
+            const = ir.Constant(ir.ArrayType(ir.IntType(8), len(data)), data)
+            gv = ir.GlobalVariable(self.mod, const.type, name=f".str.{len(self.strings)}")
+            gv.initializer = const
+            gv.global_constant = True
+            gv.linkage = "private"
+            gv.unnamed_addr = True
+            ptr = gv.gep([I32(0), I32(0)])
+            self.strings[value] = ptr
+        return ptr
+
+    def table(self, kind: NodeKind, nodes: List) -> ir.GlobalVariable:
+        row_ty = ir.LiteralStructType([FIELD_TYPES[t] for _, t in kind.fields])
+        rows = [
+            ir.Constant(row_ty, [
+                self.string(getattr(node, attr)) if t == "str" else I32(getattr(node, attr))
+                for attr, t in kind.fields
+            ])
+            for node in nodes
+        ]
+        arr_ty = ir.ArrayType(row_ty, len(rows))
+        gv = ir.GlobalVariable(self.mod, arr_ty, name=f"{kind.hal_func}.table.{self.tables}")
+        self.tables += 1
+        gv.initializer = ir.Constant(arr_ty, rows)
+        gv.global_constant = True
+        gv.linkage = "private"
+        return gv
+
+    def loop(self, builder: ir.IRBuilder, kind: NodeKind, nodes: List) -> None:
+        """Emit `for (i = 0; i < len(nodes); i++) hal_func(table[i]...)`."""
+        fn = self.function(kind.hal_func, kind.function_type())
+        table = self.table(kind, nodes)
+
+        pre = builder.block
+        body = builder.append_basic_block(name=f"{kind.hal_func}.loop")
+        done = builder.append_basic_block(name=f"{kind.hal_func}.done")
+        builder.branch(body)
+
+        builder.position_at_end(body)
+        i = builder.phi(I32, name="i")
+        i.add_incoming(I32(0), pre)
+        args = [
+            builder.load(builder.gep(table, [I32(0), i, I32(n)], inbounds=True))
+            for n in range(len(kind.fields))
+        ]
+        builder.call(fn, args)
+        nxt = builder.add(i, I32(1), name="i.next")
+        i.add_incoming(nxt, body)
+        builder.cbranch(builder.icmp_unsigned("<", nxt, I32(len(nodes))), body, done)
+
+        builder.position_at_end(done)
+
+
 def ast_to_llvm_ir(ast_mod: ASTModule, module_name: str,
                    target_triple: str = None,
                    cpu: str = None,
                    features: str = None) -> ir.Module:
     """
     Lower our AST to a textual LLVM IR module.
-    Declares externs for gpio_init, uart_init, timer_init,
-    then defines `int main()` which invokes them.
+    Defines `int main()` which runs every statement in order: ASTCall
+    nodes call `void name(void)` externs, and per-instance init nodes are
+    lowered as constant tables plus loops over the HAL functions (see
+    NODE_KINDS).
 
      Args:
         ast_mod (ASTModule): The AST to lower.
@@ -21,48 +145,39 @@ def ast_to_llvm_ir(ast_mod: ASTModule, module_name: str,
 
      Returns:
         ir.Module: LLVM IR module ready to compile or dump.
+
+     Raises:
+        TypeError: for a statement type with no lowering rule.
     """
 
     llvm_mod = ir.Module(name=module_name)
 
     if target_triple:
-        # make sure the binding is initialized
-        llvm.initialize()
-        llvm.initialize_native_target()
-        llvm.initialize_native_asmprinter()
-
-        # pick up the right target and build a TM to get the data layout
-        tgt = llvm.Target.from_triple(target_triple)
-        tm  = tgt.create_target_machine(cpu=cpu, features=features or "")
+        # data layout comes from the process-wide target machine registry
         llvm_mod.triple     = target_triple
-        llvm_mod.data_layout = tm.target_data
+        llvm_mod.data_layout = data_layout(target_triple, cpu, features)
 
-    # declare extern void gpio_init()/uart_init()/timer_init()
-    void = ir.VoidType()
-    extern_ty = ir.FunctionType(void, [])
-    gpio_fn = ir.Function(llvm_mod, extern_ty, name="gpio_init")
-    uart_fn = ir.Function(llvm_mod, extern_ty, name="uart_init")
-    timer_fn = ir.Function(llvm_mod, extern_ty, name="timer_init")
+    lowering = _Lowering(llvm_mod)
+    void_fn = ir.FunctionType(ir.VoidType(), [])
 
     # define `int main() { ... }`
-    i32 = ir.IntType(32)
-    main_ty = ir.FunctionType(i32, [])
+    main_ty = ir.FunctionType(I32, [])
     main_fn = ir.Function(llvm_mod, main_ty, name="main")
     entry_bb = main_fn.append_basic_block(name="entry")
     builder = ir.IRBuilder(entry_bb)
 
-    # walk AST
-    for fn in ast_mod.functions:
-        for stmt in fn.body:
-            if isinstance(stmt, ASTCall):
-                if stmt.func_name == "gpio_init":
-                    builder.call(gpio_fn, [])
-                elif stmt.func_name == "uart_init":
-                    builder.call(uart_fn, [])
-                elif stmt.func_name == "timer_init":
-                    builder.call(timer_fn, [])
+    # walk AST; consecutive nodes of one kind share a table and a loop
+    stmts = (stmt for fn in ast_mod.functions for stmt in fn.body)
+    for node_cls, run in groupby(stmts, key=type):
+        if node_cls is ASTCall:
+            for stmt in run:
+                builder.call(lowering.function(stmt.func_name, void_fn), [])
+            continue
+        kind = NODE_KINDS.get(node_cls)
+        if kind is None:
+            raise TypeError(f"No IR lowering registered for {node_cls.__name__}")
+        lowering.loop(builder, kind, list(run))
 
     # return 0
-    builder.ret(ir.Constant(i32, 0))
+    builder.ret(ir.Constant(I32, 0))
     return llvm_mod
-
@@ -0,0 +1,90 @@
+import hashlib
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from core.cache import evict_lru, touch, user_cache_dir
+
+log = logging.getLogger(__name__)
+
+"""
+Content-addressed cache for object code produced by core.ir.backend.
+"""
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def object_cache_key(
+    llvm_ir: str,
+    target_triple: str,
+    cpu: str,
+    features: str,
+    toolchain: str,
+) -> str:
+    """
+    Hash everything that determines the emitted object.
+
+    Args:
+        llvm_ir: Textual LLVM IR.
+        target_triple, cpu, features: Code generation target.
+        toolchain: Backend identity, e.g. the `llc --version` banner.
+
+    Returns:
+        Hex digest used as the cache entry name.
+    """
+    h = hashlib.sha256()
+    for part in (target_triple, cpu, features, toolchain):
+        h.update((part or "").encode("utf-8"))
+        h.update(b"\0")
+    h.update(hashlib.sha256(llvm_ir.encode("utf-8")).digest())
+    return h.hexdigest()
+
+
+class ObjectCache:
+    """
+    Directory of `<key>.o` files with LRU eviction by total size.
+
+    Attributes:
+        directory: Cache location.
+        max_bytes: Size bound enforced after every store.
+        hits, misses: Lookup counters for this process.
+    """
+
+    def __init__(self, directory: Path = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory) if directory else user_cache_dir("objects")
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.o"
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            self.misses += 1
+            return None
+        touch(path)
+        self.hits += 1
+        log.debug("Object cache hit %s", key[:12])
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        # write-then-rename so concurrent readers never see a partial object
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        evict_lru(self.directory, self.max_bytes, "*.o")
+
+    def stats(self) -> str:
+        return f"{self.hits} hits, {self.misses} misses"
@@ -0,0 +1,169 @@
+import logging
+from typing import Iterable, List
+
+from core.ir.target_registry import llvm, target_machine
+
+log = logging.getLogger(__name__)
+
+"""
+IR optimization between linking and code generation.
+
+Two equivalent routes, picked by who consumes the result:
+
+  * in-process through llvmlite (optimize_module), used when llvmlite also
+    emits the object: the new pass manager where llvmlite has it (0.42+),
+    else the legacy PassManagerBuilder (0.41, the locked version);
+  * the toolchain's `opt` (opt_command), used ahead of an external
+    `llc`/clang. llvmlite bundles its own LLVM, and IR or bitcode written
+    by a newer LLVM is not guaranteed to load in an older llc.
+
+"Internalization" is the LTO step: every definition except the entry
+points in `keep` gets internal linkage, so whole-program passes (global
+DCE, IPSCCP, inlining) may drop or specialize it.
+"""
+
+OPT_LEVELS = ("O0", "O1", "O2", "O3", "Os", "Oz")
+
+# (speed level, size level) as clang maps them
+_LEVELS = {
+    "O0": (0, 0), "O1": (1, 0), "O2": (2, 0), "O3": (3, 0),
+    "Os": (2, 1), "Oz": (2, 2),
+}
+# clang's inliner thresholds for -Os / -Oz
+_SIZE_INLINE_THRESHOLD = {1: 50, 2: 5}
+# ... and for -O1/-O2 / -O3 (the legacy pass manager has no inliner otherwise)
+_SPEED_INLINE_THRESHOLD = {1: 225, 2: 225, 3: 250}
+
+DEFAULT_KEEP = ("main",)
+
+
+def normalize_level(level: str) -> str:
+    """Accept "O2" or "-O2"; raise ValueError for anything else."""
+    norm = level.lstrip("-") if level else level
+    if norm not in _LEVELS:
+        raise ValueError(f"Unknown optimization level {level!r}; expected one of {OPT_LEVELS}")
+    return norm
+
+
+def codegen_level(level: str) -> int:
+    """Back-end (-O0..-O3) level for llc; size levels codegen at -O2."""
+    return _LEVELS[normalize_level(level)][0]
+
+
+def internalize(mod, keep: Iterable[str] = DEFAULT_KEEP) -> int:
+    """
+    Give every defined function/global outside `keep` internal linkage.
+
+    Args:
+        mod: llvmlite.binding ModuleRef (modified in place).
+        keep: Symbols that must stay externally visible.
+
+    Returns:
+        Number of symbols internalized.
+    """
+    keep = set(keep)
+    count = 0
+    for value in list(mod.functions) + list(mod.global_variables):
+        if value.is_declaration or value.name in keep or value.name.startswith("llvm."):
+            continue
+        if value.linkage in (llvm.Linkage.external, llvm.Linkage.weak_any,
+                             llvm.Linkage.weak_odr, llvm.Linkage.common):
+            value.linkage = llvm.Linkage.internal
+            count += 1
+    return count
+
+
+def optimize_module(
+    mod,
+    target_triple: str,
+    cpu: str,
+    features: str,
+    level: str,
+    internalize_symbols: bool = False,
+    keep: Iterable[str] = DEFAULT_KEEP,
+) -> None:
+    """
+    Run the default `level` pipeline over `mod` in-process.
+
+    llvmlite's pass builders only take a speed level, so -Os/-Oz run the -O2
+    pipeline with clang's size tuning: no unrolling or vectorization and a
+    small inliner threshold.
+
+    Raises:
+        RuntimeError: if llvmlite is not installed.
+    """
+    if llvm is None:
+        raise RuntimeError("llvmlite is not installed")
+    level = normalize_level(level)
+    if internalize_symbols:
+        log.debug("Internalized %d symbols", internalize(mod, keep))
+    speed, size = _LEVELS[level]
+    tm = target_machine(target_triple, cpu, features)
+    if hasattr(llvm, "create_pass_builder"):
+        _run_new_pm(mod, tm, speed, size)
+    else:
+        _run_legacy_pm(mod, tm, speed, size)
+
+
+def _run_new_pm(mod, tm, speed: int, size: int) -> None:
+    pto = llvm.create_pipeline_tuning_options(speed_level=speed)
+    if size:
+        pto.loop_unrolling = False
+        pto.loop_vectorization = False
+        pto.slp_vectorization = False
+        pto.inlining_threshold = _SIZE_INLINE_THRESHOLD[size]
+    pb = llvm.create_pass_builder(tm, pto)
+    pb.getModulePassManager().run(mod, pb)
+
+
+def _run_legacy_pm(mod, tm, speed: int, size: int) -> None:
+    pmb = llvm.create_pass_manager_builder()
+    pmb.opt_level = speed
+    pmb.size_level = size
+    if size:
+        pmb.disable_unroll_loops = True
+        pmb.loop_vectorize = False
+        pmb.slp_vectorize = False
+        pmb.inlining_threshold = _SIZE_INLINE_THRESHOLD[size]
+    elif speed:
+        pmb.loop_vectorize = True
+        pmb.slp_vectorize = True
+        pmb.inlining_threshold = _SPEED_INLINE_THRESHOLD[speed]
+    pm = llvm.create_module_pass_manager()
+    tm.add_analysis_passes(pm)
+    pmb.populate(pm)
+    pm.run(mod)
+
+
+def optimize_ir(
+    llvm_ir: str,
+    target_triple: str,
+    cpu: str,
+    features: str,
+    level: str,
+    internalize_symbols: bool = False,
+    keep: Iterable[str] = DEFAULT_KEEP,
+) -> str:
+    """Textual IR in, optimized textual IR out (see optimize_module)."""
+    mod = llvm.parse_assembly(llvm_ir)
+    mod.verify()
+    optimize_module(mod, target_triple, cpu, features, level, internalize_symbols, keep)
+    return str(mod)
+
+
+def opt_command(
+    level: str,
+    internalize_symbols: bool = False,
+    keep: Iterable[str] = DEFAULT_KEEP,
+) -> List[str]:
+    """
+    `opt` invocation (without input/output arguments) for the same pipeline.
+    """
+    level = normalize_level(level)
+    passes = f"default<{level}>"
+    cmd = ["opt"]
+    if internalize_symbols:
+        passes = "internalize," + passes
+        cmd.append("-internalize-public-api-list=" + ",".join(keep))
+    cmd.append(f"-passes={passes}")
+    return cmd
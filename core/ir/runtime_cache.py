@@ -0,0 +1,106 @@
+import functools
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Iterable, Tuple
+
+from core.cache import evict_lru, touch, user_cache_dir
+from core.output import copy_atomic
+from core.toolchain import run_tool
+
+log = logging.getLogger(__name__)
+
+"""
+Per-target cache of the pre-linked runtime library: the generated
+translation units that read no board data (hal.c, syscalls.c, ...; see
+Manifest "board_independent"). Every board on a target links the same
+runtime.bc, so it is compiled once and reused across boards and builds.
+"""
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+LIBRARY_NAME = "runtime.bc"
+
+
+@functools.lru_cache(maxsize=None)
+def tool_version(tool: str) -> str:
+    """First line of `<tool> --version`; part of the runtime cache key."""
+    return run_tool([tool, "--version"]).decode("utf-8", errors="replace").strip()
+
+
+def runtime_key(sources: Iterable[Tuple[str, str]], compile_flags: str, tools: Iterable[str]) -> str:
+    """
+    Hash what determines the runtime library.
+
+    Args:
+        sources: (relative path, manifest "inputs" hash) for every runtime
+            source and header; board-independent, so equal across boards.
+        compile_flags: The compile command with paths left out.
+        tools: Tools whose versions affect the output (clang, llvm-link).
+
+    Returns:
+        Hex digest naming the cache entry.
+    """
+    h = hashlib.sha256()
+    for rel, inputs in sorted(sources):
+        h.update(f"{rel}\0{inputs}\0".encode("utf-8"))
+    h.update(compile_flags.encode("utf-8"))
+    for tool in tools:
+        h.update(b"\0" + tool_version(tool).encode("utf-8"))
+    return h.hexdigest()
+
+
+class RuntimeCache:
+    """
+    Directory of `<key>.bc` runtime libraries with LRU eviction by size.
+
+    Attributes:
+        directory: Cache location.
+        max_bytes: Size bound enforced after every store.
+        hits, misses: Lookup counters for this process.
+    """
+
+    def __init__(self, directory: Path = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory) if directory else user_cache_dir("runtime")
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.bc"
+
+    def fetch(self, key: str, dest: Path) -> bool:
+        """
+        Copy the cached library to `dest`, leaving an identical `dest` alone.
+
+        Returns:
+            False on a miss, including an entry a concurrent build evicted.
+        """
+        path = self._path(key)
+        try:
+            copy_atomic(path, dest, keep_if_unchanged=True)
+        except FileNotFoundError:
+            self.misses += 1
+            return False
+        touch(path)
+        self.hits += 1
+        log.debug("Runtime library cache hit %s", key[:12])
+        return True
+
+    def store(self, key: str, src: Path) -> None:
+        # write-then-rename so concurrent builds never link a partial library
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(src, tmp)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        evict_lru(self.directory, self.max_bytes, "*.bc")
+
+    def stats(self) -> str:
+        return f"{self.hits} hits, {self.misses} misses"
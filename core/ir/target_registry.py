@@ -0,0 +1,76 @@
+import functools
+import logging
+from typing import Iterable
+
+from core.targets import TARGET_CONFIG
+
+try:
+    from llvmlite import binding as llvm
+except ImportError:  # llvmlite is optional; callers fall back to llc
+    llvm = None
+
+log = logging.getLogger(__name__)
+
+"""
+Process-wide LLVM state: one-time initialization plus memoized target
+machines and data layouts per (triple, cpu, features).
+"""
+
+
+@functools.lru_cache(maxsize=None)
+def init_llvm():
+    """
+    Initialize the LLVM binding, registering all available targets.
+    Safe to call repeatedly; the work is done once per process.
+    """
+    if llvm is None:
+        raise RuntimeError("llvmlite is not installed")
+    try:
+        llvm.initialize()
+    except RuntimeError:
+        pass  # newer llvmlite initializes the core itself and rejects this call
+    llvm.initialize_all_targets()
+    llvm.initialize_all_asmprinters()
+
+
+@functools.lru_cache(maxsize=None)
+def _target_machine(target_triple: str, cpu: str, features: str):
+    init_llvm()
+    log.debug("Creating target machine for %s (cpu=%s, features=%s)",
+              target_triple, cpu, features)
+    tgt = llvm.Target.from_triple(target_triple)
+    return tgt.create_target_machine(cpu=cpu, features=features)
+
+
+def target_machine(target_triple: str, cpu: str = "generic", features: str = ""):
+    """
+    Return the cached llvmlite TargetMachine for (triple, cpu, features).
+
+    Raises:
+        RuntimeError: if llvmlite is missing or the triple is unsupported.
+    """
+    return _target_machine(target_triple, cpu or "", features or "")
+
+
+@functools.lru_cache(maxsize=None)
+def _data_layout(target_triple: str, cpu: str, features: str) -> str:
+    return str(_target_machine(target_triple, cpu, features).target_data)
+
+
+def data_layout(target_triple: str, cpu: str = "generic", features: str = "") -> str:
+    """Return the cached data layout string for (triple, cpu, features)."""
+    return _data_layout(target_triple, cpu or "", features or "")
+
+
+def prewarm(targets: Iterable[str] = None) -> None:
+    """
+    Build target machines and data layouts ahead of time, e.g. when a
+    long-running worker starts.
+
+    Args:
+        targets: TARGET_CONFIG keys to warm (default: all of them).
+    """
+    for name in targets or TARGET_CONFIG:
+        tc = TARGET_CONFIG[name]
+        data_layout(tc["triple"], tc["cpu"], tc["features"])
+    log.debug("Pre-warmed LLVM targets: %s", ", ".join(targets or TARGET_CONFIG))
@@ -1,17 +1,68 @@
-import shutil
-import datetime
-import subprocess
+import os
+import re
+from functools import partial
 from pathlib import Path
+from typing import Dict, List
+from core.build_graph import BuildError, BuildGraph, Task
 from core.config import BoardConfig
+from core.ir.optimize import codegen_level, normalize_level, opt_command
+from core.ir.runtime_cache import LIBRARY_NAME, RuntimeCache, runtime_key
+from core.manifest import Manifest
+from core.output import source_digest
+from core.targets import TARGET_CONFIG
+from core.toolchain import ToolchainRunner, default_runner, run_tool
 import logging
 
 log = logging.getLogger(__name__)
 
+BUILD_STATE_NAME = ".build-graph.json"
+
+_INCLUDE_RE = re.compile(r'^[ \t]*#[ \t]*include[ \t]+"([^"]+)"', re.M)
+
+
+class CompileError(BuildError):
+    """
+    One or more translation units failed to compile.
+
+    Attributes:
+        failures: Source path -> error raised for that file.
+    """
+
+    def __init__(self, failures: Dict[Path, Exception]):
+        names = ", ".join(p.name for p in sorted(failures))
+        super().__init__(failures, f"{len(failures)} file(s) failed to compile: {names}")
+
+
 class LLVMIRGenerator:
-    def __init__(self, config: BoardConfig, out_dir: Path, target: str):
+    def __init__(
+        self,
+        config: BoardConfig,
+        out_dir: Path,
+        target: str,
+        jobs: int = None,
+        opt_level: str = None,
+        internalize: bool = True,
+        runtime_cache: RuntimeCache = None,
+    ):
+        """
+        Args:
+            config: BoardConfig instance.
+            out_dir: Codegen output dir (reads src/ + include/, writes ir/ + bin/).
+            target: One of {x86, stm32, imx7}.
+            jobs: Max concurrent build steps (default: CPU count).
+            opt_level: `opt` level for the linked module, O0..O3/Os/Oz
+                (default: the target's TARGET_CONFIG "opt").
+            internalize: Internalize everything but `main` before optimizing.
+            runtime_cache: Where board-independent sources are kept,
+                pre-linked per target (None: compile everything per board).
+        """
         self.config = config
         self.out_dir = out_dir
         self.target = target
+        self.jobs = jobs or os.cpu_count() or 1
+        self.opt_level = normalize_level(opt_level or TARGET_CONFIG[target]["opt"])
+        self.internalize = internalize
+        self.runtime_cache = runtime_cache
 
     def _clang_target(self) -> str:
         return {
@@ -20,67 +71,301 @@ class LLVMIRGenerator:
             "x86":   "x86_64-pc-linux-gnu",
         }[self.target]
 
-    def generate(self):
-        log.info("Starting LLVM-IR pipeline in %s", self.out_dir)
-        now = datetime.datetime.now()
+    def _compile_cmd(self, c_file: Path, inc_dir: Path, bc: Path) -> List[str]:
+        return [
+            "clang",
+            "-target", self._clang_target(),
+            "-I", str(inc_dir),
+            "-emit-llvm",
+            "-c", str(c_file),
+            "-o", str(bc),
+        ]
 
-        # 1) Recreate a clean IR directory
-        ir_dir = self.out_dir / "ir"
-        if ir_dir.exists():
-            shutil.rmtree(ir_dir)
-        ir_dir.mkdir(parents=True)
+    @staticmethod
+    def _run(cmd: List[str], msg: str, *args) -> None:
+        log.info(msg, *args)
+        run_tool(cmd)
 
-        # 2) Ensure bin/ exists
-        bin_dir = self.out_dir / "bin"
-        bin_dir.mkdir(exist_ok=True)
+    @staticmethod
+    async def _run_async(runner: ToolchainRunner, cmd: List[str], msg: str, *args) -> None:
+        log.info(msg, *args)
+        await runner.run(cmd)
+
+    def _step(self, runner: ToolchainRunner, cmd: List[str], msg: str, *args):
+        """Task action running `cmd`: a coroutine on `runner`, else blocking."""
+        if runner is None:
+            return partial(self._run, cmd, msg, *args)
+        return partial(self._run_async, runner, cmd, msg, *args)
+
+    def _link_runtime(self, cmd: List[str], key: str, runtime_bc: Path) -> None:
+        self._run(cmd, "Linking runtime library -> %s", runtime_bc.name)
+        self.runtime_cache.store(key, runtime_bc)
+
+    async def _link_runtime_async(self, runner: ToolchainRunner, cmd: List[str], key: str, runtime_bc: Path) -> None:
+        await self._run_async(runner, cmd, "Linking runtime library -> %s", runtime_bc.name)
+        self.runtime_cache.store(key, runtime_bc)
+
+    @staticmethod
+    def _local_headers(c_file: Path, inc_dir: Path) -> List[Path]:
+        """Headers from `inc_dir` that `c_file` includes, transitively."""
+        seen = set()
+        todo = [c_file]
+        while todo:
+            text = todo.pop().read_text(errors="replace")
+            for name in _INCLUDE_RE.findall(text):
+                hdr = inc_dir / name
+                if hdr not in seen and hdr.is_file():
+                    seen.add(hdr)
+                    todo.append(hdr)
+        return sorted(seen)
+
+    def _runtime_sources(self, c_files: List[Path], headers: Dict[Path, List[Path]]):
+        """
+        Split out the sources that read no board data, per the codegen
+        manifest, provided every local header they include does not either.
+
+        Args:
+            c_files: Every generated source.
+            headers: Source -> its local headers (see _local_headers).
+
+        Returns:
+            (runtime .c files, cache key), or ([], None) when there are none.
+        """
+        entries = Manifest.load(self.out_dir).previous
+        manifest = Manifest(self.out_dir)
+
+        def independent(path: Path) -> bool:
+            return entries.get(manifest.rel(path), {}).get("board_independent", False)
+
+        runtime, parts = [], set()
+        for c_file in c_files:
+            if independent(c_file) and all(independent(h) for h in headers[c_file]):
+                runtime.append(c_file)
+                for path in (c_file, *headers[c_file]):
+                    rel = manifest.rel(path)
+                    parts.add((rel, entries[rel]["inputs"]))
+        if not runtime:
+            return [], None
+        flags = " ".join(self._compile_cmd(Path("X.c"), Path("include"), Path("X.bc")))
+        return runtime, runtime_key(parts, flags, ("clang", "llvm-link"))
+
+    def add_tasks(self, graph: BuildGraph, deps: List[str] = (), runner: ToolchainRunner = None) -> str:
+        """
+        Plan the IR pipeline into `graph`:
 
+            <name>.c + included headers -> ir/<name>.bc   (one task per source)
+            all .bc -> ir/firmware.bc -> ir/firmware.opt.bc (opt)
+                    -> ir/firmware.o -> bin/firmware.elf
+
+        With a runtime cache, board-independent sources are linked into
+        ir/runtime.bc instead: copied from the cache right away when this
+        target's library is already there (no compile tasks at all), else
+        compiled, linked and stored for the next board.
+
+        Sources are read from src/ when this is called, so any codegen
+        task must already have run.
+
+        Args:
+            graph: BuildGraph to add to.
+            deps: Tasks every compile step waits for.
+            runner: Make every tool step a coroutine on this runner (for
+                BuildGraph.arun); None runs them blocking.
+
+        Returns:
+            Name of the final (ELF link) task.
+        """
+        ir_dir = self.out_dir / "ir"
+        bin_dir = self.out_dir / "bin"
         src_dir = self.out_dir / "src"
         inc_dir = self.out_dir / "include"
+        ir_dir.mkdir(parents=True, exist_ok=True)
+        bin_dir.mkdir(exist_ok=True)
 
-        # 3) Compile each C -> LLVM bitcode (.bc)
-        for c_file in sorted(src_dir.glob("*.c")):
-            bc = ir_dir / f"{c_file.stem}.bc"
-            log.info("Compiling %s -> %s", c_file.name, bc.name)
-            subprocess.run([
-                "clang",
-                "-target", self._clang_target(),
-                "-I", str(inc_dir),
-                "-emit-llvm",
-                "-c", str(c_file),
-                "-o", str(bc),
-            ], check=True)
-
-        # 4) Link *only* those fresh .bc files -> firmware.bc
-        leaf_bc = sorted(ir_dir.glob("*.bc"))  # now only *.bc, no firmware.bc yet
+        # 1) Compile each C -> LLVM bitcode (.bc); sorted so the llvm-link
+        # input order never depends on completion order
+        c_files = sorted(src_dir.glob("*.c"))
+        headers = {c: self._local_headers(c, inc_dir) for c in c_files}
+        runtime_c, key = [], None
+        if self.runtime_cache is not None:
+            runtime_c, key = self._runtime_sources(c_files, headers)
+        runtime_bc = ir_dir / LIBRARY_NAME
+        # copied now, while planning: an entry another build evicts before
+        # the graph runs would otherwise leave nothing to link
+        runtime_hit = key is not None and self.runtime_cache.fetch(key, runtime_bc)
+        if runtime_hit:
+            c_files = [c for c in c_files if c not in runtime_c]
+        leaf_bc = [ir_dir / f"{c.stem}.bc" for c in c_files]
         linked_bc = ir_dir / "firmware.bc"
-        log.info("Linking %d BC modules -> firmware.bc", len(linked_bc.name))
-        log.info("Linking %s", linked_bc.name)
-        subprocess.run(
-            ["llvm-link", *map(str, leaf_bc), "-o", str(linked_bc)],
-            check=True
-        )
-
-        # 5) Lower IR -> object file
+        opt_bc = ir_dir / "firmware.opt.bc"
+        keep = set(leaf_bc) | {linked_bc, opt_bc} | ({runtime_bc} if key else set())
+        for stale in set(ir_dir.glob("*.bc")) - keep:
+            log.debug("Removing stale bitcode %s", stale)
+            stale.unlink()
+
+        compile_tasks = []
+        for c_file, bc in zip(c_files, leaf_bc):
+            cmd = self._compile_cmd(c_file, inc_dir, bc)
+            compile_tasks.append(graph.add(Task(
+                name=f"compile {c_file.name}",
+                action=self._step(runner, cmd, "Compiling %s -> %s", c_file.name, bc.name),
+                inputs=[c_file, *headers[c_file]],
+                outputs=[bc],
+                deps=list(deps),
+                fingerprint=" ".join(cmd),
+                key=c_file,
+                digest=source_digest,
+            )).name)
+
+        # 1b) Board-independent sources -> runtime.bc (cached per target)
+        link_inputs, link_deps = leaf_bc, compile_tasks
+        if runtime_hit:
+            link_inputs = leaf_bc + [runtime_bc]
+        elif key is not None:
+            runtime_leaf = [ir_dir / f"{c.stem}.bc" for c in runtime_c]
+            cmd = ["llvm-link", *map(str, runtime_leaf), "-o", str(runtime_bc)]
+            if runner is None:
+                action = partial(self._link_runtime, cmd, key, runtime_bc)
+            else:
+                action = partial(self._link_runtime_async, runner, cmd, key, runtime_bc)
+            graph.add(Task(
+                name="runtime",
+                action=action,
+                inputs=runtime_leaf,
+                outputs=[runtime_bc],
+                deps=[f"compile {c.name}" for c in runtime_c],
+                fingerprint=key,
+            ))
+            link_inputs = [bc for bc in leaf_bc if bc not in runtime_leaf] + [runtime_bc]
+            link_deps = [t for t in compile_tasks
+                         if graph.tasks[t].key not in runtime_c] + ["runtime"]
+
+        # 2) Link *only* those .bc files -> firmware.bc
+        cmd = ["llvm-link", *map(str, link_inputs), "-o", str(linked_bc)]
+        graph.add(Task(
+            name="llvm-link",
+            action=self._step(runner, cmd, "Linking %d BC modules -> %s", len(link_inputs), linked_bc.name),
+            inputs=link_inputs,
+            outputs=[linked_bc],
+            deps=link_deps or list(deps),
+            fingerprint=" ".join(cmd),
+        ))
+
+        # 3) Whole-program optimization of the linked module
+        cmd = opt_command(self.opt_level, self.internalize) + [str(linked_bc), "-o", str(opt_bc)]
+        graph.add(Task(
+            name="opt",
+            action=self._step(runner, cmd, "Optimizing (-%s) -> %s", self.opt_level, opt_bc.name),
+            inputs=[linked_bc],
+            outputs=[opt_bc],
+            deps=["llvm-link"],
+            fingerprint=" ".join(cmd),
+        ))
+
+        # 4) Lower IR -> object file
         obj = ir_dir / "firmware.o"
-        log.info("Lowering IR -> %s", str(obj.name))
-        subprocess.run([
+        cmd = [
             "llc",
             "-filetype=obj",
             "-mtriple=" + self._clang_target(),
-            "-relocation-model=pic", 
-            str(linked_bc),
+            "-relocation-model=pic",
+            f"-O={codegen_level(self.opt_level)}",
+            str(opt_bc),
             "-o", str(obj),
-        ], check=True)
+        ]
+        graph.add(Task(
+            name="llc",
+            action=self._step(runner, cmd, "Lowering IR -> %s", obj.name),
+            inputs=[opt_bc],
+            outputs=[obj],
+            deps=["opt"],
+            fingerprint=" ".join(cmd),
+        ))
 
-        # 6) Link object -> final ELF
+        # 5) Link object -> final ELF
         elf = bin_dir / "firmware.elf"
-        log.info("Linking object -> %s", elf.name)
-        subprocess.run([
+        cmd = [
             "clang",
             "-target", self._clang_target(),
             "-o", str(elf),
             str(obj),
-        ], check=True)
+        ]
+        graph.add(Task(
+            name="link-elf",
+            action=self._step(runner, cmd, "Linking object -> %s", elf.name),
+            inputs=[obj],
+            outputs=[elf],
+            deps=["llc"],
+            fingerprint=" ".join(cmd),
+        ))
+        return "link-elf"
+
+    @staticmethod
+    def _compile_error(e: BuildError) -> BuildError:
+        """CompileError naming the failed sources, or `e` if none failed."""
+        compile_failures = {k: v for k, v in e.failures.items() if isinstance(k, Path)}
+        return CompileError(compile_failures) if compile_failures else e
+
+    def generate(self, graph: BuildGraph = None):
+        """
+        Build ir/ and bin/firmware.elf from the generated sources, skipping
+        steps whose inputs are unchanged since the last build.
+
+        Args:
+            graph: Existing BuildGraph to add to (e.g. one that already ran
+                C codegen); a standalone one is created and saved otherwise.
+
+        Raises:
+            CompileError: naming every source that failed to compile.
+            BuildError: if a link/lowering step failed.
+        """
+        log.info("Starting LLVM-IR pipeline in %s", self.out_dir)
+        own_graph = graph is None
+        if own_graph:
+            graph = BuildGraph(self.out_dir / BUILD_STATE_NAME, jobs=self.jobs)
+
+        self.add_tasks(graph)
+        try:
+            graph.run()
+        except BuildError as e:
+            err = self._compile_error(e)
+            if err is e:
+                raise
+            raise err from e
+        finally:
+            if own_graph:
+                graph.save()
+
+        log.info("LLVM IR pipeline complete: %s", self.out_dir / "bin" / "firmware.elf")
+
+    async def generate_async(self, graph: BuildGraph = None, runner: ToolchainRunner = None):
+        """
+        generate() as a coroutine: every tool runs as an asyncio subprocess
+        on `runner`, so a driver can build many boards in one event loop
+        while the runner bounds the total number of tool processes.
+
+        Args:
+            graph: As for generate().
+            runner: Shared ToolchainRunner (default: default_runner()).
+
+        Raises:
+            CompileError: naming every source that failed to compile.
+            BuildError: if a link/lowering step failed.
+        """
+        log.info("Starting LLVM-IR pipeline in %s", self.out_dir)
+        own_graph = graph is None
+        if own_graph:
+            graph = BuildGraph(self.out_dir / BUILD_STATE_NAME, jobs=self.jobs)
 
-        log.info("LLVM IR pipeline complete: %s", elf)
+        self.add_tasks(graph, runner=runner or default_runner())
+        try:
+            await graph.arun()
+        except BuildError as e:
+            err = self._compile_error(e)
+            if err is e:
+                raise
+            raise err from e
+        finally:
+            if own_graph:
+                graph.save()
 
+        log.info("LLVM IR pipeline complete: %s", self.out_dir / "bin" / "firmware.elf")
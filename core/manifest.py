@@ -0,0 +1,134 @@
+import datetime
+import hashlib
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+from pydantic import BaseModel
+
+from core.output import file_digest
+
+log = logging.getLogger(__name__)
+
+"""
+Output manifest for incremental regeneration.
+
+Records, per generated file, a hash of its inputs (template source plus the
+render context it was produced from) and a hash of the rendered content.
+"""
+
+MANIFEST_NAME = ".codegen-manifest.json"
+
+
+def _json_default(obj: Any):
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, Path):
+        return obj.as_posix()
+    if isinstance(obj, datetime.datetime):
+        return obj.isoformat()
+    raise TypeError(f"Cannot fingerprint object of type {type(obj).__name__}")
+
+
+def hash_bytes(data: bytes) -> str:
+    """Return the hex SHA-256 digest of `data`."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_inputs(template_source: str, ctx: Dict[str, Any], volatile: Iterable[str] = ("now",)) -> str:
+    """
+    Fingerprint a render: template source plus the config slice passed in.
+
+    A wall-clock `now` is excluded, otherwise every run would look dirty; a
+    fixed (reproducible) timestamp is hashed like any other input.
+
+    Args:
+        template_source: Raw Jinja2 source of the template.
+        ctx: Keyword context handed to `Template.render`.
+        volatile: Context names left out of the hash.
+
+    Returns:
+        Hex digest identifying this (template, context) pair.
+    """
+    payload = {k: v for k, v in ctx.items() if k not in volatile}
+    h = hashlib.sha256()
+    h.update(template_source.encode("utf-8"))
+    h.update(b"\0")
+    h.update(json.dumps(payload, sort_keys=True, default=_json_default).encode("utf-8"))
+    return h.hexdigest()
+
+
+class Manifest:
+    """
+    Map of output path (relative to out_dir) -> {"inputs", "content"} hashes,
+    plus "board_independent": true for outputs whose template reads no
+    board data (their "inputs" hash is then the same for every board).
+
+    `previous` holds what the last run produced; `entries` is filled in by
+    the current run. Anything in `previous` but not in `entries` is stale.
+    """
+
+    def __init__(self, out_dir: Path, previous: Dict[str, Dict[str, str]] = None):
+        self.out_dir = out_dir
+        self.previous = previous or {}
+        self.entries: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()  # outputs may be recorded from render threads
+
+    @property
+    def path(self) -> Path:
+        return self.out_dir / MANIFEST_NAME
+
+    @classmethod
+    def load(cls, out_dir: Path) -> "Manifest":
+        path = out_dir / MANIFEST_NAME
+        if not path.exists():
+            log.debug("No manifest at %s, starting fresh", path)
+            return cls(out_dir)
+        try:
+            previous = json.loads(path.read_text())
+        except (OSError, ValueError) as e:
+            log.warning("Ignoring unreadable manifest %s: %s", path, e)
+            return cls(out_dir)
+        return cls(out_dir, previous.get("files", {}))
+
+    def rel(self, dest: Path) -> str:
+        return dest.relative_to(self.out_dir).as_posix()
+
+    def is_current(self, dest: Path, inputs: str) -> bool:
+        """
+        True if `dest` was produced from identical inputs last run and the
+        file on disk still has the recorded content.
+        """
+        entry = self.previous.get(self.rel(dest))
+        if not entry or entry.get("inputs") != inputs or not dest.exists():
+            return False
+        return file_digest(dest) == entry.get("content")
+
+    def carry_over(self, dest: Path) -> None:
+        """Keep last run's entry for an output that was not re-rendered."""
+        rel = self.rel(dest)
+        with self._lock:
+            self.entries[rel] = dict(self.previous[rel])
+
+    def adopt(self, dest: Path, entry: Dict[str, Any]) -> None:
+        """Record `dest` with another manifest's entry for identical content."""
+        with self._lock:
+            self.entries[self.rel(dest)] = dict(entry)
+
+    def record(self, dest: Path, inputs: str, content: str, board_independent: bool = False) -> None:
+        entry = {"inputs": inputs, "content": content}
+        if board_independent:
+            entry["board_independent"] = True
+        with self._lock:
+            self.entries[self.rel(dest)] = entry
+
+    def stale(self) -> List[Path]:
+        """Outputs recorded last run that this run no longer produces."""
+        return [self.out_dir / rel for rel in sorted(self.previous) if rel not in self.entries]
+
+    def save(self) -> None:
+        data = {"files": dict(sorted(self.entries.items()))}
+        self.path.write_text(json.dumps(data, indent=2) + "\n")
+        log.debug("Wrote manifest with %d entries to %s", len(self.entries), self.path)
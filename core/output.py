@@ -0,0 +1,112 @@
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Iterable
+
+"""
+Crash-safe writing of generated files.
+"""
+
+BUFFER_SIZE = 256 * 1024
+
+# the "Generated on" header comment of C/H outputs (see the shared templates)
+_STAMP_RE = re.compile(rb"^// Generated on [^\n]*\n?", re.M)
+
+# read once: os.umask can only be queried by setting it, which is not
+# thread-safe while render threads are writing
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 of a file, read in blocks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(BUFFER_SIZE), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def source_digest(path: Path) -> str:
+    """
+    SHA-256 of a generated C source or header, ignoring its "Generated on"
+    line: a file re-rendered only with a new wall-clock stamp compiles to
+    the same code and hashes the same.
+    """
+    return hashlib.sha256(_STAMP_RE.sub(b"", path.read_bytes(), count=1)).hexdigest()
+
+
+def write_atomic(dest: Path, chunks: Iterable[str], keep_if_unchanged: bool = False) -> str:
+    """
+    Write text chunks to a temp file beside `dest`, then rename it into place.
+
+    Chunks are encoded and hashed as they arrive, so a streamed render
+    (Template.generate) never has to exist in memory as one string, and a
+    crash can never leave a half-written `dest`.
+
+    Args:
+        dest: Final output path.
+        chunks: UTF-8 text pieces, e.g. `[tpl.render(...)]` or `tpl.generate(...)`.
+        keep_if_unchanged: If `dest` already holds identical bytes, discard
+            the temp file so `dest` (and its mtime) stays untouched.
+
+    Returns:
+        Hex SHA-256 of the written content.
+    """
+    return _replace_atomic(dest, (chunk.encode("utf-8") for chunk in chunks), keep_if_unchanged)
+
+
+def copy_atomic(src: Path, dest: Path, keep_if_unchanged: bool = False) -> str:
+    """
+    Copy `src` to `dest` in blocks, like write_atomic.
+
+    Raises:
+        FileNotFoundError: if `src` does not exist; `dest` is left as it was.
+    """
+    with open(src, "rb") as f:
+        return _replace_atomic(dest, iter(lambda: f.read(BUFFER_SIZE), b""), keep_if_unchanged)
+
+
+def _replace_atomic(dest: Path, blocks: Iterable[bytes], keep_if_unchanged: bool) -> str:
+    h = hashlib.sha256()
+    fd, tmp = tempfile.mkstemp(dir=dest.parent, prefix=f".{dest.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb", buffering=BUFFER_SIZE) as f:
+            for data in blocks:
+                h.update(data)
+                f.write(data)
+        digest = h.hexdigest()
+        if keep_if_unchanged and dest.exists() and file_digest(dest) == digest:
+            os.unlink(tmp)
+            return digest
+        # mkstemp creates 0600; give outputs the usual umask-derived mode
+        os.chmod(tmp, 0o666 & ~_UMASK)
+        os.replace(tmp, dest)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return digest
+
+
+def link_or_copy(src: Path, dest: Path) -> None:
+    """
+    Make `dest` a hard link to `src`, or a copy where linking is not
+    possible (other filesystem, no link support), replacing `dest`.
+
+    Safe to share: write_atomic always renames a new file into place, so
+    rewriting either path later never changes the other.
+    """
+    tmp = dest.parent / f".{dest.name}.{os.getpid()}.link"
+    tmp.unlink(missing_ok=True)
+    try:
+        try:
+            os.link(src, tmp)
+        except OSError:
+            shutil.copy2(src, tmp)
+        os.replace(tmp, dest)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
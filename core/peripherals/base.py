@@ -1,7 +1,11 @@
+import functools
 import logging
 from abc import ABC, abstractmethod
+from typing import Optional, Tuple
 from jinja2 import Environment
 from core.config import BoardConfig
+from core.manifest import hash_inputs
+from core.output import write_atomic
 from pathlib import Path
 
 log = logging.getLogger(__name__)
@@ -23,19 +27,57 @@ def register_peripheral(name: str):
 class PeripheralGenerator(ABC):
     """
     Abstract base for all peripheral codegens.
+
+    Attributes:
+        config_fields: BoardConfig fields this plugin's templates read
+            through `board` (e.g. ("gpio",)); None means the whole config.
+            Outputs are fingerprinted from this slice only, so an edit to
+            another peripheral neither re-renders them nor misses the
+            plugin cache (see core.plugin_cache).
     """
 
+    config_fields: Optional[Tuple[str, ...]] = None
+
     def __init__(
         self,
         config: BoardConfig,
         env: Environment,
         dirs: dict[str, Path],
         now,
+        render=None,
     ):
         self.config = config      # Validated board config
         self.env = env            # Jinja2 environment
         self.dirs = dirs          # {"src": Path, "include": Path, ...}
         self.now = now            # Timestamp for headers
+        self._render_fn = render  # CodeGenerator._render, if driven by it
+        self.bytes_written = 0    # by render() this run, for the plugin/<NAME> timing
+
+    def config_slice(self) -> dict:
+        """The part of the board config this plugin renders from."""
+        if self.config_fields is None:
+            return {"board": self.config}
+        return {name: getattr(self.config, name) for name in self.config_fields}
+
+    @functools.cached_property
+    def slice_key(self) -> str:
+        """Hash of config_slice(), computed once per plugin run."""
+        return hash_inputs("", self.config_slice())
+
+    def render(self, template_name: str, dest: Path, **ctx) -> None:
+        """
+        Render `template_name` into `dest`.
+
+        Goes through the owning CodeGenerator when one is attached, so the
+        output is tracked in its manifest, fingerprinted by slice_key in
+        place of `board`; otherwise renders and writes directly.
+        """
+        if self._render_fn is not None:
+            self.bytes_written += self._render_fn(template_name, dest, slice_key=self.slice_key, **ctx)
+            return
+        tpl = self.env.get_template(template_name)
+        write_atomic(dest, [tpl.render(**ctx)])
+        self.bytes_written += dest.stat().st_size
 
     @abstractmethod
     def should_generate(self) -> bool:
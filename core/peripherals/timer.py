@@ -2,15 +2,23 @@ from core.peripherals.base import PeripheralGenerator, register_peripheral
 
 @register_peripheral("TIMER")
 class UARTGenerator(PeripheralGenerator):
+    config_fields = ("timer",)
+
     def should_generate(self) -> bool:
         return bool(self.config.uart)
 
     def generate(self) -> None:
-        tpl = self.env.get_template("shared/peripherals/timer.h.j2")
-        out = tpl.render(board=self.config, now=self.now)
-        (self.dirs["include"] / "timer.h").write_text(out)
+        self.render(
+            "shared/peripherals/timer.h.j2",
+            self.dirs["include"] / "timer.h",
+            board=self.config,
+            now=self.now,
+        )
 
-        tpl = self.env.get_template("shared/peripherals/timer.c.j2")
-        out = tpl.render(board=self.config, now=self.now)
-        (self.dirs["src"] / "timer.c").write_text(out)
+        self.render(
+            "shared/peripherals/timer.c.j2",
+            self.dirs["src"] / "timer.c",
+            board=self.config,
+            now=self.now,
+        )
 
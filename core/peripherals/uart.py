@@ -2,15 +2,23 @@ from core.peripherals.base import PeripheralGenerator, register_peripheral
 
 @register_peripheral("UART")
 class UARTGenerator(PeripheralGenerator):
+    config_fields = ("uart",)
+
     def should_generate(self) -> bool:
         return bool(self.config.uart)
 
     def generate(self) -> None:
-        tpl = self.env.get_template("shared/peripherals/uart.h.j2")
-        out = tpl.render(board=self.config, now=self.now)
-        (self.dirs["include"] / "uart.h").write_text(out)
+        self.render(
+            "shared/peripherals/uart.h.j2",
+            self.dirs["include"] / "uart.h",
+            board=self.config,
+            now=self.now,
+        )
 
-        tpl = self.env.get_template("shared/peripherals/uart.c.j2")
-        out = tpl.render(board=self.config, now=self.now)
-        (self.dirs["src"] / "uart.c").write_text(out)
+        self.render(
+            "shared/peripherals/uart.c.j2",
+            self.dirs["src"] / "uart.c",
+            board=self.config,
+            now=self.now,
+        )
 
@@ -0,0 +1,185 @@
+import asyncio
+import logging
+from pathlib import Path
+from typing import Dict, List
+
+from jinja2 import Environment
+
+from core.build_graph import BuildGraph, Task
+from core.config import BoardConfig
+from core import timing
+from core.generator import NOW, CodeGenerator, generate_targets
+from core.ir_generator import BUILD_STATE_NAME, LLVMIRGenerator
+from core.toolchain import ToolchainRunner, default_runner
+
+log = logging.getLogger(__name__)
+
+"""
+Full C -> IR -> ELF pipeline driven by one BuildGraph.
+"""
+
+
+def _codegen_graph(config, template_dir, out_dir, target, env, jobs, stream, timestamp, plugin_cache) -> BuildGraph:
+    graph = BuildGraph(out_dir / BUILD_STATE_NAME, jobs=jobs)
+    codegen = CodeGenerator(
+        config, template_dir, out_dir, target,
+        incremental=True, env=env, jobs=jobs, stream=stream, timestamp=timestamp,
+        plugin_cache=plugin_cache,
+    )
+    graph.add(Task(name="codegen", action=codegen.generate, always=True))
+    return graph
+
+
+def build_firmware(
+    config: BoardConfig,
+    template_dir: Path,
+    out_dir: Path,
+    target: str,
+    env: Environment = None,
+    jobs: int = None,
+    stream: bool = False,
+    opt_level: str = None,
+    internalize: bool = True,
+    runtime_cache=None,
+    timestamp=NOW,
+    plugin_cache=None,
+) -> BuildGraph:
+    """
+    Generate C/DTS and build bin/firmware.elf, redoing only what changed.
+
+    The codegen node renders incrementally, so only outputs whose template
+    or config slice changed are rewritten (see core.manifest). Compile
+    nodes then skip every .c whose content and included headers hash the
+    same as last build; link/lower steps skip when their inputs did. A
+    UART-only edit thus rebuilds uart.c, uart.bc and the link steps.
+
+    Args:
+        config: BoardConfig instance.
+        template_dir: Jinja2 template root.
+        out_dir: Output directory (graph state in <out_dir>/.build-graph.json).
+        target: One of {x86, stm32, imx7}.
+        env: Shared Jinja2 environment, if any.
+        jobs: Max concurrent renders / build steps.
+        stream, timestamp, plugin_cache: Forwarded to CodeGenerator.
+        opt_level, internalize, runtime_cache: Forwarded to LLVMIRGenerator.
+
+    Returns:
+        The executed graph (see BuildGraph.ran for what was rebuilt).
+    """
+    graph = _codegen_graph(config, template_dir, out_dir, target, env, jobs, stream, timestamp,
+                           plugin_cache)
+    try:
+        # the compile nodes are planned from the sources codegen produced
+        graph.run()
+        LLVMIRGenerator(
+            config, out_dir, target, jobs=jobs, opt_level=opt_level,
+            internalize=internalize, runtime_cache=runtime_cache,
+        ).generate(graph)
+    finally:
+        graph.save()
+    return graph
+
+
+async def build_firmware_async(
+    config: BoardConfig,
+    template_dir: Path,
+    out_dir: Path,
+    target: str,
+    env: Environment = None,
+    jobs: int = None,
+    stream: bool = False,
+    opt_level: str = None,
+    internalize: bool = True,
+    runtime_cache=None,
+    runner: ToolchainRunner = None,
+    timestamp=NOW,
+    plugin_cache=None,
+) -> BuildGraph:
+    """
+    build_firmware() as a coroutine. Codegen runs in the loop's executor
+    and every toolchain step on `runner`, so a batch or daemon driver can
+    gather many boards at once with one global limit on tool processes.
+
+    Args:
+        runner: Shared ToolchainRunner (default: core.toolchain.default_runner()).
+        Others: as for build_firmware().
+
+    Returns:
+        The executed graph.
+    """
+    graph = _codegen_graph(config, template_dir, out_dir, target, env, jobs, stream, timestamp,
+                           plugin_cache)
+    try:
+        await graph.arun()
+        await LLVMIRGenerator(
+            config, out_dir, target, jobs=jobs, opt_level=opt_level,
+            internalize=internalize, runtime_cache=runtime_cache,
+        ).generate_async(graph, runner)
+    finally:
+        graph.save()
+    return graph
+
+
+def build_firmware_targets(
+    config: BoardConfig,
+    template_dir: Path,
+    out_root: Path,
+    targets: List[str],
+    env: Environment = None,
+    jobs: int = None,
+    stream: bool = False,
+    opt_level: str = None,
+    internalize: bool = True,
+    runtime_cache=None,
+    runner: ToolchainRunner = None,
+    timestamp=NOW,
+    plugin_cache=None,
+) -> Dict[str, BuildGraph]:
+    """
+    Build `out_root/<target>/bin/firmware.elf` for every target in one pass.
+
+    C/DTS codegen goes through generate_targets, so target-independent
+    outputs are rendered once and linked into every tree. The per-target
+    IR pipelines then run concurrently on one event loop, with `runner`
+    bounding the tool processes across all of them.
+
+    Args:
+        targets: Target names.
+        runner: Shared ToolchainRunner (default: core.toolchain.default_runner()).
+        Others: as for build_firmware(); `jobs` also bounds each target's graph.
+
+    Returns:
+        Target name -> its executed IR graph.
+
+    Raises:
+        CompileError, BuildError: the first failing target's error, after
+            all targets finished.
+    """
+    with timing.stage("codegen"):
+        out_dirs = generate_targets(
+            config, template_dir, out_root, targets,
+            incremental=True, env=env, jobs=jobs, stream=stream, timestamp=timestamp,
+            plugin_cache=plugin_cache,
+        )
+    runner = runner or default_runner()
+
+    async def build(target: str) -> BuildGraph:
+        graph = BuildGraph(out_dirs[target] / BUILD_STATE_NAME, jobs=jobs)
+        try:
+            await LLVMIRGenerator(
+                config, out_dirs[target], target, jobs=jobs, opt_level=opt_level,
+                internalize=internalize, runtime_cache=runtime_cache,
+            ).generate_async(graph, runner)
+        finally:
+            graph.save()
+        return graph
+
+    async def build_all() -> list:
+        # let every target finish before reporting the first failure
+        return await asyncio.gather(*(build(t) for t in out_dirs), return_exceptions=True)
+
+    results = asyncio.run(build_all())
+    for res in results:
+        if isinstance(res, BaseException):
+            raise res
+    return dict(zip(out_dirs, results))
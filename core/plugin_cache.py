@@ -0,0 +1,78 @@
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from core.cache import evict_lru, touch, user_cache_dir
+from core.output import copy_atomic
+
+log = logging.getLogger(__name__)
+
+"""
+On-disk cache of rendered peripheral plugin outputs.
+
+Entries are keyed on the output's manifest "inputs" hash, which for a plugin
+covers the template source plus the plugin's declared config slice (see
+PeripheralGenerator.config_fields). A board edit therefore re-renders only
+the plugins whose slice changed; every other output is copied from here.
+Entries are copied file to file in blocks, never read into memory whole, so
+the cache keeps --stream's flat memory profile.
+"""
+
+DEFAULT_MAX_BYTES = 128 * 1024 * 1024
+
+
+class PluginCache:
+    """
+    Directory of `<key>.out` rendered files with LRU eviction by total size.
+
+    Attributes:
+        directory: Cache location.
+        max_bytes: Size bound enforced after every store.
+        hits, misses: Lookup counters for this process.
+    """
+
+    def __init__(self, directory: Path = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory) if directory else user_cache_dir("plugins")
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.out"
+
+    def get(self, key: str, dest: Path, keep_if_unchanged: bool = False) -> Optional[str]:
+        """
+        Copy the entry for `key` to `dest` (see core.output.copy_atomic).
+
+        Returns:
+            Hex SHA-256 of the copied content, or None on a miss.
+        """
+        path = self._path(key)
+        try:
+            content = copy_atomic(path, dest, keep_if_unchanged)
+        except OSError:
+            self.misses += 1
+            return None
+        touch(path)
+        self.hits += 1
+        log.debug("Plugin cache hit %s", key[:12])
+        return content
+
+    def put(self, key: str, src: Path) -> None:
+        # write-then-rename so concurrent renders never read a partial file
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(src, tmp)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        evict_lru(self.directory, self.max_bytes, "*.out")
+
+    def stats(self) -> str:
+        return f"{self.hits} hits, {self.misses} misses"
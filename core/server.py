@@ -0,0 +1,263 @@
+import base64
+import json
+import logging
+import os
+import socket
+import socketserver
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from jinja2 import Environment
+
+from core.ast.builder import build_ast
+from core.config import ConfigCache, load_config
+from core.generator import CodeGenerator, make_environment, precompile_templates
+from core.targets import TARGET_CONFIG
+from core.template_cache import TemplateBytecodeCache
+from core.toolchain import ToolError
+
+log = logging.getLogger(__name__)
+
+"""
+Long-running codegen daemon: keeps pydantic models, Jinja2 environments and
+LLVM target machines warm, and serves requests over a Unix domain socket.
+
+Protocol: one JSON object per line in, one JSON object per line out. A
+connection may carry several requests; one left idle for `idle_timeout`
+seconds is closed so it does not keep a pool worker.
+
+    {"op": "ping"}
+    {"op": "generate", "config": PATH, "target": T, "out_dir": PATH,
+     ["template_dir": PATH], ["incremental": bool]}
+    {"op": "emit-ir",  "config": PATH, ["target": T], ["output": PATH]}
+    {"op": "emit-obj", "config": PATH, "target": T, ["output": PATH],
+     ["backend": "auto"|"llvmlite"|"llc"], ["opt_level": "O0".."Oz"|null]}
+
+Replies carry "ok": true plus op-specific fields, or "ok": false and
+"error", plus a "tool" object (cmd, returncode, timeout, stderr) when a
+toolchain binary failed. emit-ir/emit-obj return the written path when
+"output" is given, otherwise the IR text ("ir") or base64 object bytes
+("obj").
+"""
+
+DEFAULT_IDLE_TIMEOUT = 10.0
+
+
+class DaemonRunningError(RuntimeError):
+    """Another daemon is still serving the requested socket path."""
+
+
+class CodegenService:
+    """
+    Request handlers plus the warm state shared between them.
+
+    Args:
+        template_dir: Default template root for "generate" requests.
+        template_cache: Compiled-template cache dir, or None to disable.
+        obj_cache: ObjectCache for "emit-obj", or None to disable.
+        config_cache: ConfigCache for board YAMLs, or None to disable.
+    """
+
+    def __init__(
+        self,
+        template_dir: Path,
+        template_cache: Path = None,
+        obj_cache=None,
+        config_cache: ConfigCache = None,
+    ):
+        self.template_dir = template_dir
+        self.template_cache = template_cache
+        self.obj_cache = obj_cache
+        self.config_cache = config_cache
+        self._envs: Dict[Path, Environment] = {}
+        self._lock = threading.Lock()
+
+    def warm_up(self) -> None:
+        """Build the default environment and every LLVM target machine."""
+        self.env_for(self.template_dir)
+        try:
+            from core.ir.target_registry import prewarm
+            prewarm()
+        except (ImportError, RuntimeError) as e:
+            log.warning("LLVM pre-warm skipped: %s", e)
+
+    def env_for(self, template_dir: Path) -> Environment:
+        key = Path(template_dir).resolve()
+        with self._lock:
+            env = self._envs.get(key)
+            if env is None:
+                bcc = TemplateBytecodeCache(self.template_cache) if self.template_cache else None
+                env = make_environment(key, bytecode_cache=bcc)
+                precompile_templates(env)
+                self._envs[key] = env
+            return env
+
+    def handle(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        op = req.get("op")
+        handler = {
+            "ping": self._ping,
+            "generate": self._generate,
+            "emit-ir": self._emit_ir,
+            "emit-obj": self._emit_obj,
+        }.get(op)
+        if handler is None:
+            raise ValueError(f"Unknown op {op!r}")
+        log.debug("Handling %s request: %s", op, req)
+        return handler(req)
+
+    def _ping(self, req):
+        return {"ok": True}
+
+    def _generate(self, req):
+        cfg = load_config(Path(req["config"]), cache=self.config_cache, targets=(req["target"],))
+        template_dir = Path(req.get("template_dir") or self.template_dir)
+        out_dir = Path(req["out_dir"])
+        cg = CodeGenerator(
+            cfg,
+            template_dir,
+            out_dir,
+            req["target"],
+            incremental=bool(req.get("incremental")),
+            env=self.env_for(template_dir),
+        )
+        cg.generate()
+        return {"ok": True, "out_dir": str(out_dir), "files": sorted(cg.manifest.entries)}
+
+    def _ir_text(self, req) -> str:
+        from core.ir.codegen import ast_to_llvm_ir
+
+        cfg = load_config(Path(req["config"]), cache=self.config_cache,
+                          targets=[req["target"]] if req.get("target") else ())
+        tc = TARGET_CONFIG.get(req.get("target"), {})
+        return str(ast_to_llvm_ir(
+            build_ast(cfg),
+            module_name=cfg.name,
+            target_triple=tc.get("triple"),
+            cpu=tc.get("cpu"),
+            features=tc.get("features"),
+        ))
+
+    def _emit_ir(self, req):
+        ir_text = self._ir_text(req)
+        if req.get("output"):
+            Path(req["output"]).write_text(ir_text)
+            return {"ok": True, "path": req["output"]}
+        return {"ok": True, "ir": ir_text}
+
+    def _emit_obj(self, req):
+        from core.ir.backend import compile_module
+
+        tc = TARGET_CONFIG[req["target"]]
+        obj = compile_module(
+            self._ir_text(req),
+            target_triple=tc["triple"],
+            cpu=tc["cpu"],
+            features=tc["features"],
+            cache=self.obj_cache,
+            backend=req.get("backend", "auto"),
+            opt_level=req.get("opt_level", tc["opt"]),
+        )
+        if req.get("output"):
+            Path(req["output"]).write_bytes(obj)
+            return {"ok": True, "path": req["output"]}
+        return {"ok": True, "obj": base64.b64encode(obj).decode("ascii")}
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        self.connection.settimeout(self.server.idle_timeout)
+
+    def handle(self):
+        # a connection may carry several requests, one per line
+        while True:
+            try:
+                line = self.rfile.readline()
+            except socket.timeout:
+                log.debug("Closing connection idle for %ss", self.server.idle_timeout)
+                return
+            if not line:
+                return
+            if not line.strip():
+                continue
+            try:
+                resp = self.server.service.handle(json.loads(line))
+            except Exception as e:
+                log.debug("Request failed", exc_info=True)
+                resp = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                if isinstance(e, ToolError):
+                    resp["tool"] = e.to_dict()
+            self.wfile.write(json.dumps(resp).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class CodegenServer(socketserver.UnixStreamServer):
+    """
+    Unix socket server that dispatches each connection to a bounded
+    thread pool instead of one thread per client.
+
+    A leftover socket file is replaced only if nothing answers on it;
+    otherwise DaemonRunningError is raised.
+
+    A connection holds its worker while open, so connections idle for
+    `idle_timeout` seconds (None: never) are closed to free the worker.
+    """
+
+    def __init__(
+        self,
+        socket_path: Path,
+        service: CodegenService,
+        workers: int = None,
+        idle_timeout: Optional[float] = DEFAULT_IDLE_TIMEOUT,
+    ):
+        socket_path = Path(socket_path)
+        if socket_path.exists() and stat.S_ISSOCK(socket_path.stat().st_mode):
+            if not _is_stale(socket_path):
+                raise DaemonRunningError(f"A codegen daemon is already running on {socket_path}")
+            log.debug("Removing stale socket %s", socket_path)
+            socket_path.unlink()
+        self.service = service
+        self.idle_timeout = idle_timeout
+        self.pool = ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+        super().__init__(str(socket_path), _RequestHandler)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True)
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+
+def _is_stale(socket_path: Path) -> bool:
+    """True if nothing accepts connections on `socket_path` any more."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(str(socket_path))
+        except ConnectionRefusedError:
+            return True
+    return False
+
+
+def request(socket_path: Path, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Send one request to a running daemon and return its reply."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(socket_path))
+        sock.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as f:
+            return json.loads(f.readline())
@@ -0,0 +1,11 @@
+"""
+Supported target platforms and their LLVM code generation parameters.
+"""
+
+# Predefined target configurations for object emission; "opt" is the
+# default optimization level (see core.ir.optimize), -Oz for flash-bound MCUs
+TARGET_CONFIG = {
+    "x86":   {"triple": "x86_64-pc-linux-gnu",    "cpu": "generic",    "features": "",        "opt": "O2"},
+    "stm32": {"triple": "armv7-none-eabi",       "cpu": "cortex-m3",  "features": "+thumb2", "opt": "Oz"},
+    "imx7":  {"triple": "aarch64-none-linux-gnu","cpu": "generic",    "features": "",        "opt": "O2"},
+}
@@ -0,0 +1,65 @@
+import hashlib
+import logging
+from pathlib import Path
+
+from jinja2.bccache import Bucket, FileSystemBytecodeCache
+
+from core.cache import evict_lru, touch, user_cache_dir
+
+log = logging.getLogger(__name__)
+
+"""
+Persistent compiled-template cache for the Jinja2 environment.
+"""
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+PATTERN = "__jinja2_%s.cache"
+
+
+def default_template_cache_dir() -> Path:
+    return user_cache_dir("templates")
+
+
+class TemplateBytecodeCache(FileSystemBytecodeCache):
+    """
+    FileSystemBytecodeCache keyed on template path + source hash, with
+    LRU eviction by total size and hit/miss counters.
+
+    Because the source hash is part of the file name, an edited template
+    simply misses and its stale entry ages out through eviction.
+
+    Attributes:
+        hits: Templates loaded from cache this process.
+        misses: Templates that had to be compiled.
+    """
+
+    def __init__(self, directory: Path = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        directory = Path(directory) if directory else default_template_cache_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        super().__init__(str(directory), PATTERN)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def get_bucket(self, environment, name, filename, source) -> Bucket:
+        key = hashlib.sha256(
+            f"{filename or name}\0{hashlib.sha256(source.encode('utf-8')).hexdigest()}".encode("utf-8")
+        ).hexdigest()
+        bucket = Bucket(environment, key, self.get_source_checksum(source))
+        self.load_bytecode(bucket)
+        return bucket
+
+    def load_bytecode(self, bucket: Bucket) -> None:
+        super().load_bytecode(bucket)
+        if bucket.code is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            touch(Path(self._get_cache_filename(bucket)))
+
+    def dump_bytecode(self, bucket: Bucket) -> None:
+        super().dump_bytecode(bucket)
+        evict_lru(Path(self.directory), self.max_bytes, PATTERN % "*")
+
+    def stats(self) -> str:
+        return f"{self.hits} hits, {self.misses} misses"
@@ -0,0 +1,148 @@
+import cProfile
+import json
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+log = logging.getLogger(__name__)
+
+"""
+Per-stage timing instrumentation.
+
+Code marks work with `with stage("render/src/gpio.c"): ...` and reports
+output sizes with `add_bytes(...)`. Both are no-ops until a Timings
+recorder is activated with enable(), so instrumented paths cost nothing in
+normal runs. The recorder is process-wide and thread-safe.
+"""
+
+
+@dataclass
+class StageStats:
+    """
+    Accumulated totals for one stage name.
+
+    Attributes:
+        wall: Wall-clock seconds.
+        cpu: CPU seconds of the thread running the stage (child processes
+            such as clang are not included).
+        bytes: Bytes written by the stage.
+        calls: Number of times the stage ran.
+    """
+    wall: float = 0.0
+    cpu: float = 0.0
+    bytes: int = 0
+    calls: int = 0
+
+
+class Timings:
+    """
+    Stage recorder.
+
+    Args:
+        profile_dir: If set, every stage runs under cProfile and its stats
+            are dumped to `<profile_dir>/<stage>-<n>.prof`.
+    """
+
+    def __init__(self, profile_dir: Path = None):
+        self.stages: Dict[str, StageStats] = {}
+        self.profile_dir = Path(profile_dir) if profile_dir else None
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+        if self.profile_dir:
+            self.profile_dir.mkdir(parents=True, exist_ok=True)
+
+    def _get(self, name: str) -> StageStats:
+        with self._lock:
+            return self.stages.setdefault(name, StageStats())
+
+    def _start_profile(self) -> Optional[cProfile.Profile]:
+        if not self.profile_dir:
+            return None
+        prof = cProfile.Profile()
+        try:
+            prof.enable()
+        except ValueError as e:
+            # only one profiler may be active at a time on newer Pythons
+            log.debug("cProfile unavailable for this stage: %s", e)
+            return None
+        return prof
+
+    @contextmanager
+    def stage(self, name: str):
+        st = self._get(name)
+        prof = self._start_profile()
+        w0, c0 = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - w0, time.thread_time() - c0
+            with self._lock:
+                st.wall += wall
+                st.cpu += cpu
+                st.calls += 1
+                n = st.calls
+            if prof is not None:
+                prof.disable()
+                safe = re.sub(r"[^A-Za-z0-9_.-]+", "_", name)
+                prof.dump_stats(str(self.profile_dir / f"{safe}-{n}.prof"))
+
+    def add_bytes(self, name: str, n: int) -> None:
+        st = self._get(name)
+        with self._lock:
+            st.bytes += n
+
+    def to_json(self) -> dict:
+        return {
+            "total_wall": time.perf_counter() - self._t0,
+            "stages": [dict(name=name, **asdict(st)) for name, st in self.stages.items()],
+        }
+
+    def write_json(self, path: Path) -> None:
+        Path(path).write_text(json.dumps(self.to_json(), indent=2) + "\n")
+
+    def table(self) -> str:
+        rows = [f"{'stage':<40} {'calls':>5} {'wall ms':>10} {'cpu ms':>10} {'bytes':>12}"]
+        for name, st in self.stages.items():
+            rows.append(
+                f"{name:<40} {st.calls:>5} {st.wall * 1e3:>10.1f} {st.cpu * 1e3:>10.1f} {st.bytes:>12}"
+            )
+        rows.append(f"{'total':<40} {'':>5} {(time.perf_counter() - self._t0) * 1e3:>10.1f}")
+        return "\n".join(rows)
+
+
+_active: Optional[Timings] = None
+
+
+def enable(profile_dir: Path = None) -> Timings:
+    """Start recording stages process-wide and return the recorder."""
+    global _active
+    _active = Timings(profile_dir)
+    return _active
+
+
+def disable() -> None:
+    global _active
+    _active = None
+
+
+@contextmanager
+def stage(name: str):
+    """Time the enclosed block as `name` if recording is enabled."""
+    rec = _active
+    if rec is None:
+        yield
+        return
+    with rec.stage(name):
+        yield
+
+
+def add_bytes(name: str, n: int) -> None:
+    """Attribute `n` written bytes to stage `name` if recording is enabled."""
+    rec = _active
+    if rec is not None:
+        rec.add_bytes(name, n)
@@ -0,0 +1,241 @@
+import asyncio
+import logging
+import os
+import subprocess
+import threading
+import weakref
+from typing import Dict, List, Optional, Sequence
+
+log = logging.getLogger(__name__)
+
+"""
+Running toolchain binaries (clang, llvm-link, opt, llc).
+
+Every invocation, blocking (run_tool) or asyncio-based (ToolchainRunner),
+gets a per-tool timeout and captures stderr: non-empty stderr of a
+successful run is logged as a warning, and a failure or timeout raises
+ToolError carrying the command, exit status and stderr.
+"""
+
+DEFAULT_TIMEOUT = 300.0
+
+# seconds per tool, by basename; whole-program opt/llc get the most room
+TOOL_TIMEOUTS: Dict[str, float] = {
+    "clang": 120.0,
+    "llvm-link": 120.0,
+    "opt": 600.0,
+    "llc": 600.0,
+}
+
+_STDERR_TAIL = 20  # stderr lines quoted in ToolError messages
+_READ_SIZE = 64 * 1024
+_DRAIN_TIMEOUT = 1.0  # seconds to collect stderr left in the pipe after a kill
+
+
+class ToolError(subprocess.CalledProcessError):
+    """
+    A toolchain command exited non-zero or timed out.
+
+    Subclasses CalledProcessError, so existing handlers keep working.
+
+    Attributes:
+        cmd: The command line (list of str).
+        returncode: Exit status; None if the command timed out.
+        stdout: Captured stdout (bytes), if any.
+        stderr: Captured stderr (str, possibly empty).
+        tool: Basename of the executable.
+        timeout: The limit in seconds, when the command timed out.
+    """
+
+    def __init__(
+        self,
+        cmd: Sequence[str],
+        returncode: Optional[int],
+        stdout: bytes = None,
+        stderr: str = "",
+        timeout: float = None,
+    ):
+        super().__init__(returncode, list(cmd), stdout, stderr or "")
+        self.tool = os.path.basename(self.cmd[0])
+        self.timeout = timeout
+
+    def __str__(self):
+        if self.timeout is not None:
+            head = f"{self.tool} timed out after {self.timeout:g}s"
+        else:
+            head = f"{self.tool} exited with status {self.returncode}"
+        lines = self.stderr.strip().splitlines()[-_STDERR_TAIL:]
+        return head + (":\n" + "\n".join(lines) if lines else "")
+
+    def to_dict(self) -> dict:
+        """JSON-serializable form, e.g. for daemon replies."""
+        return {
+            "tool": self.tool,
+            "cmd": self.cmd,
+            "returncode": self.returncode,
+            "timeout": self.timeout,
+            "stderr": self.stderr,
+        }
+
+
+def timeout_for(tool: str, overrides: Dict[str, float] = None) -> float:
+    """Timeout for `tool` (path or basename), honouring `overrides`."""
+    name = os.path.basename(tool)
+    if overrides and name in overrides:
+        return overrides[name]
+    return TOOL_TIMEOUTS.get(name, DEFAULT_TIMEOUT)
+
+
+def _decode(data: Optional[bytes]) -> str:
+    if not data:
+        return ""
+    if isinstance(data, str):
+        return data
+    return data.decode("utf-8", errors="replace")
+
+
+def _log_stderr(cmd: Sequence[str], stderr: str) -> None:
+    if stderr.strip():
+        log.warning("%s: %s", os.path.basename(cmd[0]), stderr.rstrip())
+
+
+def run_tool(cmd: List[str], input: bytes = None, timeout: float = None) -> bytes:
+    """
+    Run `cmd` to completion, blocking.
+
+    Args:
+        cmd: Command line; cmd[0] selects the timeout (see TOOL_TIMEOUTS).
+        input: Bytes fed to stdin (stdin is closed otherwise).
+        timeout: Seconds before the process is killed (default: per tool).
+
+    Returns:
+        Captured stdout.
+
+    Raises:
+        ToolError: on a non-zero exit or timeout.
+    """
+    timeout = timeout or timeout_for(cmd[0])
+    log.debug("Running %s", " ".join(cmd))
+    try:
+        res = subprocess.run(
+            cmd, input=input, stdin=None if input is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout, check=True,
+        )
+    except subprocess.TimeoutExpired as e:
+        raise ToolError(cmd, None, e.output, _decode(e.stderr), timeout) from None
+    except subprocess.CalledProcessError as e:
+        raise ToolError(cmd, e.returncode, e.output, _decode(e.stderr)) from None
+    _log_stderr(cmd, _decode(res.stderr))
+    return res.stdout
+
+
+async def _collect(stream: asyncio.StreamReader, chunks: List[bytes]) -> None:
+    """Append everything read from `stream` to `chunks` as it arrives, so a
+    timeout still has what was read before it."""
+    while True:
+        chunk = await stream.read(_READ_SIZE)
+        if not chunk:
+            return
+        chunks.append(chunk)
+
+
+async def _feed(stdin: asyncio.StreamWriter, data: bytes) -> None:
+    try:
+        stdin.write(data)
+        await stdin.drain()
+    except (BrokenPipeError, ConnectionResetError):
+        pass  # the tool exited early; its status says why
+    finally:
+        stdin.close()
+
+
+class ToolchainRunner:
+    """
+    Runs toolchain commands as asyncio subprocesses, at most `max_jobs` at
+    a time.
+
+    Share one runner between everything an event loop builds (see
+    default_runner): however many boards are in flight, no more than
+    `max_jobs` tools run at once.
+
+    Args:
+        max_jobs: Concurrent tool processes (default: CPU count).
+        timeouts: Per-tool overrides of TOOL_TIMEOUTS, by basename.
+
+    Attributes:
+        started: Number of processes spawned so far.
+    """
+
+    def __init__(self, max_jobs: int = None, timeouts: Dict[str, float] = None):
+        self.max_jobs = max_jobs or os.cpu_count() or 1
+        self.timeouts = dict(timeouts or {})
+        self.started = 0
+        # asyncio primitives belong to one loop; the limit holds per loop
+        self._limits = weakref.WeakKeyDictionary()
+
+    def _limit(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        sem = self._limits.get(loop)
+        if sem is None:
+            sem = self._limits[loop] = asyncio.Semaphore(self.max_jobs)
+        return sem
+
+    async def run(self, cmd: List[str], input: bytes = None, timeout: float = None) -> bytes:
+        """
+        Coroutine form of run_tool: same arguments, result and errors.
+
+        The process is killed if it times out or the awaiting task is
+        cancelled.
+        """
+        timeout = timeout or timeout_for(cmd[0], self.timeouts)
+        async with self._limit():
+            log.debug("Running %s", " ".join(cmd))
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            )
+            self.started += 1
+            out, err = [], []
+            io = [
+                asyncio.ensure_future(_collect(proc.stdout, out)),
+                asyncio.ensure_future(_collect(proc.stderr, err)),
+            ]
+            if input is not None:
+                io.append(asyncio.ensure_future(_feed(proc.stdin, input)))
+            try:
+                await asyncio.wait_for(asyncio.gather(*io, proc.wait()), timeout)
+            except BaseException as e:
+                for task in io:
+                    task.cancel()
+                await asyncio.gather(*io, return_exceptions=True)
+                if proc.returncode is None:
+                    proc.kill()
+                    await proc.wait()
+                if isinstance(e, asyncio.TimeoutError):
+                    # keep what the tool said before it was killed, as run_tool does
+                    try:
+                        await asyncio.wait_for(_collect(proc.stderr, err), _DRAIN_TIMEOUT)
+                    except asyncio.TimeoutError:
+                        pass
+                    raise ToolError(cmd, None, b"".join(out), _decode(b"".join(err)), timeout) from None
+                raise
+        stdout, stderr = b"".join(out), _decode(b"".join(err))
+        if proc.returncode:
+            raise ToolError(cmd, proc.returncode, stdout, stderr)
+        _log_stderr(cmd, stderr)
+        return stdout
+
+
+_default_runner: Optional[ToolchainRunner] = None
+_default_runner_lock = threading.Lock()
+
+
+def default_runner() -> ToolchainRunner:
+    """The process-wide runner used when callers do not pass one."""
+    global _default_runner
+    if _default_runner is None:
+        with _default_runner_lock:
+            if _default_runner is None:
+                _default_runner = ToolchainRunner()
+    return _default_runner
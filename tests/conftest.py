@@ -3,6 +3,11 @@ import pytest
 from pathlib import Path
 from core.config import load_config, BoardConfig
 
+@pytest.fixture(autouse=True)
+def _isolated_user_cache(tmp_path_factory, monkeypatch):
+    # default cache dirs (also in CLI subprocesses) never touch ~/.cache
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path_factory.mktemp("xdg-cache")))
+
 @pytest.fixture
 def sample_cfg(tmp_path):
     data = {
@@ -0,0 +1,48 @@
+import pytest
+from dataclasses import dataclass
+from core.config import BoardConfig, load_config
+from core.ast.builder import build_ast
+from core.ast.nodes import ASTCall, ASTFunction, ASTGpioInit, ASTModule, ASTStmt, ASTTimerInit, ASTUartInit
+
+llvm = pytest.importorskip("llvmlite.binding")
+from core.ir.codegen import ast_to_llvm_ir
+
+def _board(pins):
+    return BoardConfig(
+        name="big",
+        gpio=[{"pin": f"P{i}", "mode": "output", "pull": "up", "speed": "high"} for i in range(pins)],
+        uart=[{"name": "UART1", "tx": "PA9", "rx": "PA10", "baudrate": 115200}],
+        timer=[{"name": "TIM2", "prescaler": 7999, "period": 1000}],
+    )
+
+def test_build_ast_has_one_node_per_instance(sample_cfg):
+    body = build_ast(load_config(sample_cfg)).functions[0].body
+    assert body == [
+        ASTGpioInit("PA0", "output", "up", "high"),
+        ASTUartInit("UART1", "PA9", "PA10", 115200),
+        ASTTimerInit("TIM2", 0, 100),
+    ]
+
+def test_instances_lower_to_tables_and_loops():
+    ir_text = str(ast_to_llvm_ir(build_ast(_board(5000)), "big",
+                                 target_triple="armv7-none-eabi", cpu="cortex-m3", features="+thumb2"))
+    # one call site per kind, not one per instance
+    assert ir_text.count("call void @\"configure_pin\"") == 1
+    assert ir_text.count("call void @\"configure_uart\"") == 1
+    assert "[5000 x {i8*, i8*, i8*, i8*}]" in ir_text
+    # shared strings are emitted once
+    assert ir_text.count('c"output\\00"') == 1
+    llvm.parse_assembly(ir_text).verify()
+
+def test_plain_calls_still_lower():
+    mod = ASTModule([ASTFunction("main", [], [ASTCall("board_early_init", [])])])
+    ir_text = str(ast_to_llvm_ir(mod, "demo"))
+    assert 'call void @"board_early_init"()' in ir_text
+
+def test_unregistered_node_kind_rejected():
+    @dataclass
+    class ASTMystery(ASTStmt):
+        x: int
+
+    with pytest.raises(TypeError, match="ASTMystery"):
+        ast_to_llvm_ir(ASTModule([ASTFunction("main", [], [ASTMystery(1)])]), "demo")
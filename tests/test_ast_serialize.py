@@ -0,0 +1,73 @@
+import json
+import marshal
+import struct
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from core.ast import serialize
+from core.ast.builder import build_ast
+from core.ast.nodes import ASTCall, ASTFunction, ASTGpioInit, ASTModule
+from core.config import load_config
+
+PY = sys.executable
+SCRIPT = Path(__file__).parent.parent / "cli" / "main.py"
+
+def test_nodes_have_no_instance_dict():
+    node = ASTGpioInit("PA0", "output")
+    assert not hasattr(node, "__dict__")
+    with pytest.raises(AttributeError):
+        node.colour = "red"
+
+def test_roundtrip(sample_cfg):
+    mod = build_ast(load_config(sample_cfg))
+    mod.functions.append(ASTFunction("extra", ["x"], [ASTCall("board_early_init", [1, None, "s"])]))
+    assert serialize.loads(serialize.dumps(mod)) == mod
+
+def test_repeated_strings_stored_once():
+    pins = [ASTGpioInit(f"P{i}", "output", "up", "high") for i in range(1000)]
+    data = serialize.dumps(ASTModule([ASTFunction("main", [], pins)], "b"))
+    assert data.count(b"output") == 1
+
+def test_rejects_foreign_and_future_files():
+    good = serialize.dumps(ASTModule([], "b"))
+    with pytest.raises(serialize.ASTFormatError, match="magic"):
+        serialize.loads(b'{"functions": []}')
+    future = struct.pack("<6sH", serialize.MAGIC, serialize.VERSION + 1) + good[8:]
+    with pytest.raises(serialize.ASTFormatError, match="version"):
+        serialize.loads(future)
+
+@pytest.mark.parametrize("cut", [9, 20, -1])
+def test_rejects_truncated_payload(cut):
+    data = serialize.dumps(ASTModule([ASTFunction("main", [], [ASTGpioInit("PA0", "output")])], "b"))
+    with pytest.raises(serialize.ASTFormatError, match="Corrupt"):
+        serialize.loads(data[:cut])
+
+def test_rejects_corrupt_tree():
+    header = struct.pack("<6sH", serialize.MAGIC, serialize.VERSION)
+    types = (("ASTModule", ("functions", "name")),)
+    for tree in ((5, [], "b"), (0,), 42):
+        with pytest.raises(serialize.ASTFormatError):
+            serialize.loads(header + marshal.dumps((types, tree)))
+
+def test_cli_emit_ast_defaults_to_json(tmp_path, sample_cfg):
+    ast_file = tmp_path / "out.ast"
+    res = subprocess.run(
+        [PY, str(SCRIPT), "--config", str(sample_cfg), "--emit-ast", str(ast_file)],
+        capture_output=True, text=True,
+    )
+    assert res.returncode == 0, res.stderr
+    assert json.loads(ast_file.read_text())["name"]
+
+def test_cli_from_ast_matches_config(tmp_path, sample_cfg):
+    ast_file, from_cfg, from_ast = tmp_path / "board.ast", tmp_path / "a.ll", tmp_path / "b.ll"
+    common = [PY, str(SCRIPT), "--target", "stm32"]
+    for argv in (
+        ["--config", str(sample_cfg), "--emit-ast", str(ast_file), "--ast-format", "binary"],
+        ["--config", str(sample_cfg), "--emit-ir", str(from_cfg)],
+        ["--from-ast", str(ast_file), "--emit-ir", str(from_ast)],
+    ):
+        res = subprocess.run(common + argv, capture_output=True, text=True)
+        assert res.returncode == 0, res.stderr
+    assert from_ast.read_text() == from_cfg.read_text()
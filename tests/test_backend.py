@@ -0,0 +1,74 @@
+import subprocess
+import pytest
+from core.ir import backend
+
+llvm = pytest.importorskip("llvmlite.binding")
+
+IR = "define i32 @main() {\n  ret i32 0\n}\n"
+
+def test_target_machine_is_cached():
+    a = backend.target_machine("x86_64-pc-linux-gnu", "generic", "")
+    b = backend.target_machine("x86_64-pc-linux-gnu", "generic", "")
+    assert a is b
+
+@pytest.mark.parametrize("triple,cpu,features", [
+    ("x86_64-pc-linux-gnu", "generic", ""),
+    ("armv7-none-eabi", "cortex-m3", "+thumb2"),
+])
+def test_llvmlite_backend_emits_elf_without_llc(monkeypatch, triple, cpu, features):
+    def no_llc(*args, **kwargs):
+        raise AssertionError("llc must not be spawned")
+    monkeypatch.setattr(subprocess, "run", no_llc)
+    obj = backend.compile_module(IR, triple, cpu, features, backend="llvmlite")
+    assert obj[:4] == b"\x7fELF"
+
+def test_auto_falls_back_to_llc_for_unknown_triple(monkeypatch):
+    assert backend._resolve_backend("auto", "nonexistent-unknown-none", "generic", "") == "llc"
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        backend.compile_module(IR, "x86_64-pc-linux-gnu", backend="gcc")
+
+def test_registry_shared_with_codegen():
+    from core.ir import target_registry
+    from core.ir.codegen import ast_to_llvm_ir
+    from core.ast.nodes import ASTModule
+
+    target_registry.prewarm(["stm32"])
+    before = target_registry._target_machine.cache_info().misses
+    mod = ast_to_llvm_ir(ASTModule(functions=[]), "demo",
+                         target_triple="armv7-none-eabi", cpu="cortex-m3", features="+thumb2")
+    backend.target_machine("armv7-none-eabi", "cortex-m3", "+thumb2")
+    assert target_registry._target_machine.cache_info().misses == before
+    assert mod.data_layout == target_registry.data_layout("armv7-none-eabi", "cortex-m3", "+thumb2")
+
+def test_llc_route_pipes_ir_through_stdin_and_stdout(monkeypatch):
+    seen = {}
+    def run(cmd, input=None, **kwargs):
+        seen["cmd"], seen["input"] = cmd, input
+        return subprocess.CompletedProcess(cmd, 0, b"\x7fELF-from-pipe", b"")
+    monkeypatch.setattr(subprocess, "run", run)
+    obj = backend.compile_module(IR, "x86_64-pc-linux-gnu", backend="llc")
+    assert obj == b"\x7fELF-from-pipe"
+    assert seen["cmd"][-3:] == ["-o", "-", "-"] and seen["input"] == IR.encode()
+
+@pytest.mark.parametrize("flag,magic", [("--emit-obj", b"\x7fELF"), ("--emit-ir", b"; ModuleID")])
+def test_cli_streams_to_stdout(tmp_path, sample_cfg, flag, magic):
+    import sys
+    from pathlib import Path
+    script = Path(__file__).parent.parent / "cli" / "main.py"
+    res = subprocess.run([sys.executable, str(script), "--config", str(sample_cfg), "--no-obj-cache",
+                          "--obj-backend", "llvmlite", "--target", "x86", flag, "-"],
+                         capture_output=True, cwd=tmp_path)
+    assert res.returncode == 0, res.stderr
+    assert res.stdout.startswith(magic)
+    assert list(tmp_path.iterdir()) == [sample_cfg]
+
+def test_cli_emit_ir_without_target(tmp_path, sample_cfg):
+    import sys
+    from pathlib import Path
+    script = Path(__file__).parent.parent / "cli" / "main.py"
+    res = subprocess.run([sys.executable, str(script), "--config", str(sample_cfg), "--emit-ir", "-"],
+                         capture_output=True, text=True)
+    assert res.returncode == 0, res.stderr
+    assert 'define i32 @"main"()' in res.stdout
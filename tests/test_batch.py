@@ -0,0 +1,45 @@
+import yaml
+from pathlib import Path
+import pytest
+from core.batch import expand_configs, generate_many
+
+GOOD = {
+    "name": "demo",
+    "gpio": [{"pin": "PA0", "mode": "output"}],
+    "uart": [{"name": "UART1", "tx": "PA9", "rx": "PA10", "baudrate": 115200}],
+}
+
+@pytest.fixture
+def boards(tmp_path):
+    d = tmp_path / "boards"
+    d.mkdir()
+    (d / "a.yaml").write_text(yaml.safe_dump(dict(GOOD, name="a")))
+    (d / "b.yml").write_text(yaml.safe_dump(dict(GOOD, name="b")))
+    (d / "bad.yaml").write_text(yaml.safe_dump({"gpio": []}))  # missing name
+    return d
+
+def test_expand_configs_dir_and_glob(boards):
+    assert [p.name for p in expand_configs([str(boards)])] == ["a.yaml", "b.yml", "bad.yaml"]
+    assert [p.name for p in expand_configs([str(boards / "*.yml")])] == ["b.yml"]
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_generate_many_isolates_failures(tmp_path, boards, jobs):
+    out = tmp_path / "out"
+    results = generate_many(
+        expand_configs([str(boards)]), ["x86", "stm32"], Path("core/templates"), out, jobs=jobs
+    )
+    assert len(results) == 6
+    bad = [r for r in results if not r.ok]
+    assert {r.config.name for r in bad} == {"bad.yaml"}
+    assert "ValidationError" in bad[0].error
+    assert (out / "a" / "x86" / "src" / "gpio.c").exists()
+    assert (out / "b" / "stm32" / "dts" / "b_stm32.dts").exists()
+
+def test_duplicate_stems_are_rejected(tmp_path):
+    for sub in ("a", "b"):
+        (tmp_path / sub).mkdir()
+        (tmp_path / sub / "board.yaml").write_text(yaml.safe_dump(GOOD))
+    configs = expand_configs([str(tmp_path / "*" / "board.yaml")])
+    with pytest.raises(ValueError, match="board: .*a/board.yaml, .*b/board.yaml"):
+        generate_many(configs, ["x86"], Path("core/templates"), tmp_path / "out", jobs=2)
+    assert not (tmp_path / "out").exists()
@@ -0,0 +1,195 @@
+import datetime
+import subprocess
+import threading
+import yaml
+from pathlib import Path
+import pytest
+from core.build_graph import BuildError, BuildGraph, Task
+from core.config import load_config
+from core.ir.runtime_cache import RuntimeCache
+from core.output import source_digest
+from core.pipeline import build_firmware
+
+def copy_task(name, src, dst, deps=(), log=None):
+    def action():
+        if log is not None:
+            log.append(name)
+        dst.write_text(src.read_text().upper())
+    return Task(name=name, action=action, inputs=[src], outputs=[dst], deps=list(deps))
+
+def test_skips_unchanged_and_cuts_off_on_equal_output(tmp_path):
+    a, b, c = tmp_path / "a", tmp_path / "b", tmp_path / "c"
+    a.write_text("x")
+    state = tmp_path / "state.json"
+
+    def build():
+        g = BuildGraph(state, jobs=2)
+        g.add(copy_task("ab", a, b))
+        g.add(copy_task("bc", b, c, deps=["ab"]))
+        ran = g.run()
+        g.save()
+        return ran
+
+    assert build() == ["ab", "bc"]
+    assert build() == []
+    a.write_text("X")            # new input, same upper-cased output
+    assert build() == ["ab"]
+    c.unlink()                   # missing output forces a rerun
+    assert build() == ["bc"]
+
+def test_failure_blocks_dependents_only(tmp_path):
+    g = BuildGraph(tmp_path / "state.json", jobs=4)
+    ran = []
+    def boom():
+        raise RuntimeError("nope")
+    g.add(Task(name="bad", action=boom))
+    g.add(Task(name="after-bad", action=lambda: ran.append("after-bad"), deps=["bad"]))
+    g.add(Task(name="after-after", action=lambda: ran.append("after-after"), deps=["after-bad"]))
+    g.add(Task(name="good", action=lambda: ran.append("good")))
+    with pytest.raises(BuildError) as exc:
+        g.run()
+    assert list(exc.value.failures) == ["bad"]
+    assert ran == ["good"]
+
+def test_independent_tasks_run_concurrently(tmp_path):
+    barrier = threading.Barrier(2, timeout=5)
+    g = BuildGraph(tmp_path / "state.json", jobs=2)
+    g.add(Task(name="a", action=barrier.wait))
+    g.add(Task(name="b", action=barrier.wait))
+    assert sorted(g.run()) == ["a", "b"]
+
+
+def fake_tool(cmd):
+    """clang/llvm-link/opt/llc stand-in whose outputs hash their inputs."""
+    if "--version" in cmd:
+        return subprocess.CompletedProcess(cmd, 0, stdout=f"{cmd[0]} fake 1.0\n".encode(), stderr=b"")
+    out = Path(cmd[cmd.index("-o") + 1])
+    if cmd[0] == "clang" and "-emit-llvm" in cmd:
+        src = Path(cmd[cmd.index("-c") + 1])
+        out.write_bytes(b"BC:" + src.read_bytes())
+    elif cmd[0] == "llvm-link":
+        ins = cmd[1:cmd.index("-o")]
+        out.write_bytes(b"".join(Path(p).read_bytes() for p in ins))
+    else:
+        src = next(Path(a) for a in cmd[1:] if a.endswith((".bc", ".o")) and Path(a) != out)
+        out.write_bytes(src.read_bytes())
+    return subprocess.CompletedProcess(cmd, 0, b"", b"")
+
+
+@pytest.fixture
+def fake_toolchain(monkeypatch):
+    monkeypatch.setattr(subprocess, "run", lambda cmd, **kwargs: fake_tool(cmd))
+
+
+class FakeRunner:
+    """Async fake_tool, for the ToolchainRunner code paths."""
+
+    def __init__(self):
+        self.cmds = []
+
+    async def run(self, cmd, input=None, timeout=None):
+        self.cmds.append(cmd)
+        fake_tool(cmd)
+        return b""
+
+def test_uart_change_rebuilds_only_uart_and_links(tmp_path, sample_cfg, fake_toolchain):
+    out = tmp_path / "out"
+    def build():
+        cfg = load_config(sample_cfg)
+        g = build_firmware(cfg, Path("core/templates"), out, "x86", jobs=4)
+        return {n for n in g.tasks if g.ran(n)}
+
+    first = build()
+    assert "compile gpio.c" in first and "link-elf" in first
+    assert build() == {"codegen"}
+
+    data = yaml.safe_load(sample_cfg.read_text())
+    data["uart"][0]["baudrate"] = 9600
+    sample_cfg.write_text(yaml.safe_dump(data))
+    assert build() == {"codegen", "compile uart.c", "llvm-link", "opt", "llc", "link-elf"}
+    assert b"9600" in (out / "bin" / "firmware.elf").read_bytes()
+
+
+def test_source_digest_ignores_generated_stamp(tmp_path):
+    src, out = tmp_path / "gpio.c", tmp_path / "gpio.bc"
+
+    def build():
+        g = BuildGraph(tmp_path / "state.json")
+        g.add(Task(name="compile", action=lambda: out.write_text(src.read_text()),
+                   inputs=[src], outputs=[out], digest=source_digest))
+        ran = g.run()
+        g.save()
+        return ran
+
+    src.write_text("// Generated on 2024-01-01 00:00:00\nint x;\n")
+    assert build() == ["compile"]
+    src.write_text("// Generated on 2025-01-01 00:00:00\nint x;\n")
+    assert build() == []
+    src.write_text("// Generated on 2025-01-01 00:00:00\nint y;\n")
+    assert build() == ["compile"]
+
+
+def test_new_timestamp_alone_does_not_recompile(tmp_path, sample_cfg, fake_toolchain):
+    out = tmp_path / "out"
+    cfg = load_config(sample_cfg)
+    for year in (2024, 2025):
+        # every output re-renders, differing only in its "Generated on" line
+        g = build_firmware(cfg, Path("core/templates"), out, "x86", jobs=4,
+                           timestamp=datetime.datetime(year, 1, 1))
+    assert "// Generated on 2025-01-01" in (out / "src" / "gpio.c").read_text()
+    assert {n for n in g.tasks if g.ran(n)} == {"codegen"}
+
+
+def test_runtime_library_is_shared_between_boards(tmp_path, sample_cfg, fake_toolchain):
+    cache = RuntimeCache(tmp_path / "runtime")
+    other = tmp_path / "other.yaml"
+    data = yaml.safe_load(sample_cfg.read_text())
+    data["name"] = "other"
+    data["gpio"][0]["pin"] = "PB7"
+    other.write_text(yaml.safe_dump(data))
+
+    def build(cfg_path, out):
+        g = build_firmware(load_config(cfg_path), Path("core/templates"), out, "stm32",
+                           jobs=4, runtime_cache=cache)
+        return {n for n in g.tasks if g.ran(n)}, set(g.tasks)
+
+    ran, _ = build(sample_cfg, tmp_path / "a")
+    assert {"compile hal.c", "compile syscalls.c", "runtime"} <= ran
+    assert cache.misses == 1
+
+    ran, planned = build(other, tmp_path / "b")
+    assert cache.hits == 1
+    assert "compile hal.c" not in planned and "compile syscalls.c" not in planned
+    assert "runtime" not in planned  # copied from the cache while planning
+    assert {"compile gpio.c", "llvm-link"} <= ran
+    linked = (tmp_path / "b" / "ir" / "firmware.bc").read_bytes()
+    assert b"configure_pin" in linked and b"_sbrk" in linked
+
+    # evicted by another build: a miss, so the runtime is rebuilt
+    for entry in cache.directory.glob("*.bc"):
+        entry.unlink()
+    ran, _ = build(other, tmp_path / "c")
+    assert cache.misses == 2
+    assert {"compile hal.c", "runtime", "llvm-link"} <= ran
+    assert any(cache.directory.glob("*.bc"))
+
+
+def test_build_all_targets_in_one_pass(tmp_path, sample_cfg):
+    from core.pipeline import build_firmware_targets
+
+    runner = FakeRunner()
+    graphs = build_firmware_targets(load_config(sample_cfg), Path("core/templates"),
+                                    tmp_path / "out", ["x86", "stm32", "imx7"], jobs=4, runner=runner)
+    assert list(graphs) == ["x86", "stm32", "imx7"]
+    for target, graph in graphs.items():
+        assert graph.ran("link-elf")
+        assert (tmp_path / "out" / target / "bin" / "firmware.elf").exists()
+    triples = {c[c.index("-target") + 1] for c in runner.cmds if c[0] == "clang"}
+    assert len(triples) == 3
+    assert (tmp_path / "out" / "stm32" / "src" / "hal.c").samefile(tmp_path / "out" / "x86" / "src" / "hal.c")
+
+    # nothing changed: every target's graph is up to date
+    runner.cmds.clear()
+    build_firmware_targets(load_config(sample_cfg), Path("core/templates"),
+                           tmp_path / "out", ["x86", "stm32", "imx7"], jobs=4, runner=runner)
+    assert runner.cmds == []
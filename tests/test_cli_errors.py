@@ -29,3 +29,13 @@ def test_invalid_target_flag(tmp_path):
     assert res.returncode == 2
     assert "invalid choice: 'mips'" in res.stderr
 
+
+def test_target_list_rejects_unknown_entry(tmp_path):
+    res = run_cli(["--config", "config.yaml", "--target", "x86,mips"], tmp_path)
+    assert res.returncode == 2
+    assert "invalid choice: 'mips'" in res.stderr
+
+def test_emit_obj_needs_single_target(tmp_path):
+    res = run_cli(["--config", "config.yaml", "--target", "all", "--emit-obj", "x.o"], tmp_path)
+    assert res.returncode == 2
+    assert "single --target" in res.stderr
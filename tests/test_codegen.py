@@ -3,6 +3,7 @@ from pathlib import Path
 import pytest
 from core.config import load_config
 from core.generator import CodeGenerator
+from core.manifest import MANIFEST_NAME
 
 def test_codegen_creates_files(tmp_path, sample_cfg, tmp_path_factory):
     out = tmp_path_factory.mktemp("out")
@@ -20,3 +21,40 @@ def test_codegen_creates_files(tmp_path, sample_cfg, tmp_path_factory):
     main = (out / "src" / "main.c").read_text()
     assert "gpio_init" in main and "uart_init" in main and "timer_init" in main
 
+
+def _tree(root):
+    # drop the "Generated on" timestamp lines; everything else must match
+    return {
+        p.relative_to(root).as_posix(): [l for l in p.read_text().splitlines() if "Generated on" not in l]
+        for p in sorted(root.rglob("*")) if p.is_file() and p.name != MANIFEST_NAME
+    }
+
+@pytest.mark.parametrize("target", ["x86", "stm32", "imx7"])
+def test_parallel_render_matches_serial(tmp_path, sample_cfg, target):
+    cfg = load_config(sample_cfg)
+    serial, parallel = tmp_path / "serial", tmp_path / "parallel"
+    CodeGenerator(cfg, Path("core/templates"), serial, target, jobs=1).generate()
+    CodeGenerator(cfg, Path("core/templates"), parallel, target, jobs=8).generate()
+    assert _tree(serial) == _tree(parallel)
+
+
+def test_multi_target_shares_target_independent_outputs(tmp_path, sample_cfg):
+    from core.generator import generate_targets
+
+    cfg = load_config(sample_cfg)
+    out_dirs = generate_targets(cfg, Path("core/templates"), tmp_path / "out", ["x86", "stm32", "imx7"])
+    assert list(out_dirs) == ["x86", "stm32", "imx7"]
+
+    for rel in ("include/hal.h", "src/hal.c", "src/gpio.c", "include/config.h", "src/main.c"):
+        x86 = out_dirs["x86"] / rel
+        assert x86.stat().st_nlink == 3
+        assert (out_dirs["stm32"] / rel).samefile(x86) and (out_dirs["imx7"] / rel).samefile(x86)
+    assert not (out_dirs["stm32"] / "Makefile").samefile(out_dirs["x86"] / "Makefile")
+    assert (out_dirs["stm32"] / "src" / "syscalls.c").exists()
+    assert not (out_dirs["x86"] / "src" / "syscalls.c").exists()
+
+    # every tree matches a standalone render for its target
+    for target, out in out_dirs.items():
+        alone = tmp_path / f"alone-{target}"
+        CodeGenerator(cfg, Path("core/templates"), alone, target).generate()
+        assert _tree(out) == _tree(alone)
@@ -17,3 +17,35 @@ def test_load_flat_config(tmp_path):
     assert cfg.name == "demo"
     assert cfg.gpio == [] and cfg.uart == [] and cfg.timer == []
 
+
+def test_config_cache_roundtrip(tmp_path, sample_cfg):
+    from core.config import ConfigCache
+    cache = ConfigCache(tmp_path / "cache")
+    first = load_config(sample_cfg, cache=cache)
+    second = load_config(sample_cfg, cache=cache)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert second == first and second is not first
+
+def test_config_cache_keyed_on_content(tmp_path, sample_cfg):
+    from core.config import ConfigCache
+    cache = ConfigCache(tmp_path / "cache")
+    load_config(sample_cfg, cache=cache)
+    data = yaml.safe_load(sample_cfg.read_text())
+    data["uart"][0]["baudrate"] = 9600
+    sample_cfg.write_text(yaml.safe_dump(data))
+    cfg = load_config(sample_cfg, cache=cache)
+    assert cache.misses == 2 and cfg.uart[0].baudrate == 9600
+
+@pytest.mark.parametrize("snapshot", [
+    b"cno_such_module\nBoard\n.",           # ImportError
+    b"cbuiltins\nint\n(S'x'\ntR.",          # ValueError
+    b"\x80\x04K\x01.",                      # not a BoardConfig
+])
+def test_config_cache_unreadable_snapshot_is_a_miss(tmp_path, sample_cfg, snapshot):
+    from core.config import ConfigCache
+    cache = ConfigCache(tmp_path / "cache")
+    load_config(sample_cfg, cache=cache)
+    (entry,) = (tmp_path / "cache").glob("*.pickle")
+    entry.write_bytes(snapshot)
+    cfg = load_config(sample_cfg, cache=cache)
+    assert cfg.name == "tst" and cache.misses == 2
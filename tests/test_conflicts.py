@@ -0,0 +1,80 @@
+import pytest
+import yaml
+
+from core.config import BoardConfig, ConfigCache, load_config
+from core.conflicts import Conflict, ResourceConflictError, find_conflicts
+
+
+def board(**kw):
+    data = {"name": "demo", "gpio": [], "uart": [], "timer": []}
+    data.update(kw)
+    return BoardConfig(**data)
+
+
+def gpio(pin, **kw):
+    return {"pin": pin, "mode": "output", **kw}
+
+
+def uart(name, tx, rx):
+    return {"name": name, "tx": tx, "rx": rx, "baudrate": 115200}
+
+
+def test_clean_board_has_no_conflicts():
+    cfg = board(gpio=[gpio("PA0"), gpio("PA1", alt_func="AF7")],
+                uart=[uart("UART1", "PA9", "PA10")],
+                timer=[{"name": "TIM2", "prescaler": 0, "period": 1}])
+    assert find_conflicts(cfg) == []
+
+
+def test_reports_every_conflict():
+    cfg = board(
+        gpio=[gpio("PA9"), gpio("PB0"), gpio("pb0"), gpio("PC0", alt_func="AF16")],
+        uart=[uart("UART1", "PA9", "PA10"), uart("UART1", "PC1", "PC1")],
+        timer=[{"name": "TIM2", "prescaler": 0, "period": 1}] * 2,
+    )
+    found = {(c.kind, c.resource): c.owners for c in find_conflicts(cfg)}
+    assert found == {
+        ("pin", "PA9"): ("gpio[0]", "uart[0].tx (UART1)"),
+        ("pin", "PB0"): ("gpio[1]", "gpio[2]"),
+        ("pin", "PC1"): ("uart[1].tx (UART1)", "uart[1].rx (UART1)"),
+        ("uart-name", "UART1"): ("uart[0]", "uart[1]"),
+        ("timer-name", "TIM2"): ("timer[0]", "timer[1]"),
+    }
+    assert find_conflicts(cfg, ["stm32"])[-1] == Conflict(
+        "alt-func", "AF16", ("gpio[3]",), "stm32 expects AF0..AF15")
+
+
+def test_alt_func_rule_is_stm32_only(tmp_path):
+    path = tmp_path / "cfg.yaml"
+    path.write_text(yaml.safe_dump({"name": "demo", "gpio": [gpio("PA0", alt_func="ALT5")]}))
+    cache = ConfigCache(tmp_path / "cache")
+    for _ in range(2):  # fresh parse, then snapshot hits
+        assert load_config(path, cache=cache, targets=["x86", "imx7"]).name == "demo"
+        with pytest.raises(ResourceConflictError, match="invalid alt_func 'ALT5' at gpio\\[0\\] "
+                                                        "\\(stm32 expects AF0..AF15\\)"):
+            load_config(path, cache=cache, targets=["imx7", "stm32"])
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_load_config_checks_by_default(tmp_path):
+    path = tmp_path / "cfg.yaml"
+    path.write_text(yaml.safe_dump({
+        "name": "demo",
+        "gpio": [gpio("PA9")],
+        "uart": [uart("UART1", "PA9", "PA10")],
+    }))
+    with pytest.raises(ResourceConflictError) as exc:
+        load_config(path)
+    assert "pin PA9 assigned 2 times: gpio[0], uart[0].tx (UART1)" in str(exc.value)
+
+    cache = ConfigCache(tmp_path / "cache")
+    assert load_config(path, cache=cache, check=False).name == "demo"
+    # an unchecked config must not be served to a checking load
+    with pytest.raises(ResourceConflictError):
+        load_config(path, cache=cache)
+    assert cache.hits == 0
+
+
+def test_conflicts_ordered_by_first_claim():
+    cfg = board(gpio=[gpio("PA0"), gpio("PB0"), gpio("PB0"), gpio("PA0")])
+    assert [c.resource for c in find_conflicts(cfg)] == ["PA0", "PB0"]
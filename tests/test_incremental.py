@@ -0,0 +1,80 @@
+import logging
+import os
+import yaml
+from pathlib import Path
+from core.config import load_config
+from core.generator import CodeGenerator
+from core.manifest import MANIFEST_NAME
+
+BASE = {
+    "name": "demo",
+    "gpio": [{"pin": "PA0", "mode": "output", "pull": "up", "speed": "high"}],
+    "uart": [{"name": "UART1", "tx": "PA9", "rx": "PA10", "baudrate": 115200}],
+    "timer": [{"name": "TIM2", "prescaler": 0, "period": 100}],
+}
+
+def generate(tmp_path, cfg_dict, out):
+    p = tmp_path / "cfg.yaml"
+    p.write_text(yaml.safe_dump(cfg_dict))
+    cfg = load_config(p)
+    CodeGenerator(cfg, Path("core/templates"), out, "x86", incremental=True).generate()
+
+def age_outputs(out):
+    # push every mtime into the past so rewrites are detectable
+    for f in out.rglob("*"):
+        if f.is_file():
+            os.utime(f, (1_000_000, 1_000_000))
+
+def test_incremental_writes_manifest(tmp_path):
+    out = tmp_path / "out"
+    generate(tmp_path, BASE, out)
+    assert (out / MANIFEST_NAME).exists()
+    assert (out / "src" / "gpio.c").exists()
+
+def test_incremental_skips_unchanged_outputs(tmp_path):
+    out = tmp_path / "out"
+    generate(tmp_path, BASE, out)
+    age_outputs(out)
+
+    generate(tmp_path, BASE, out)
+    for f in ("src/gpio.c", "src/main.c", "include/config.h", "Makefile"):
+        assert (out / f).stat().st_mtime == 1_000_000, f
+
+def test_incremental_keeps_build_dir(tmp_path):
+    out = tmp_path / "out"
+    generate(tmp_path, BASE, out)
+    (out / "build" / "gpio.o").write_bytes(b"obj")
+    generate(tmp_path, BASE, out)
+    assert (out / "build" / "gpio.o").exists()
+
+def test_incremental_rewrites_changed_and_prunes_removed(tmp_path):
+    out = tmp_path / "out"
+    generate(tmp_path, BASE, out)
+    age_outputs(out)
+
+    changed = dict(BASE, gpio=[])
+    changed["uart"] = [dict(BASE["uart"][0], baudrate=9600)]
+    generate(tmp_path, changed, out)
+
+    assert "9600" in (out / "src" / "uart.c").read_text()
+    assert (out / "src" / "uart.c").stat().st_mtime != 1_000_000
+    assert not (out / "src" / "gpio.c").exists()
+    assert not (out / "include" / "gpio.h").exists()
+
+def test_incremental_restores_edited_output(tmp_path):
+    out = tmp_path / "out"
+    generate(tmp_path, BASE, out)
+    (out / "src" / "gpio.c").write_text("garbage")
+    generate(tmp_path, BASE, out)
+    assert "configure_pin" in (out / "src" / "gpio.c").read_text()
+
+def test_incremental_renders_only_the_edited_slice(tmp_path, caplog):
+    out = tmp_path / "out"
+    generate(tmp_path, BASE, out)
+
+    caplog.set_level(logging.DEBUG, logger="core.generator")
+    changed = dict(BASE, uart=[dict(BASE["uart"][0], baudrate=9600)])
+    generate(tmp_path, changed, out)
+
+    rendered = {r.args[0] for r in caplog.records if r.msg.startswith("Rendering template")}
+    assert rendered == {"shared/peripherals/uart.c.j2"}
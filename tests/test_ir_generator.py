@@ -1,13 +1,16 @@
 import subprocess
 from pathlib import Path
 import pytest
-from core.ir_generator import LLVMIRGenerator
+from core.ir_generator import CompileError, LLVMIRGenerator
 from core.config import BoardConfig
 
 @pytest.fixture(autouse=True)
 def no_subprocess_run(monkeypatch):
     calls = []
-    monkeypatch.setattr(subprocess, "run", lambda *args, **kwargs: calls.append(args[0]))
+    def run(cmd, **kwargs):
+        calls.append(cmd)
+        return subprocess.CompletedProcess(cmd, 0, b"", b"")
+    monkeypatch.setattr(subprocess, "run", run)
     return calls
 
 def test_ir_pipeline_invokes_clang_and_llc(tmp_path, no_subprocess_run):
@@ -29,3 +32,53 @@ def test_ir_pipeline_invokes_clang_and_llc(tmp_path, no_subprocess_run):
     assert any("llvm-link" in cmd[0] for cmd in cmds)
     assert any("llc" in cmd[0] for cmd in cmds)
 
+
+def test_ir_pipeline_links_in_sorted_order(tmp_path, no_subprocess_run):
+    out = tmp_path / "out"
+    (out / "src").mkdir(parents=True)
+    (out / "include").mkdir()
+    for name in ("uart", "main", "gpio", "hal"):
+        (out/"src"/f"{name}.c").write_text("")
+
+    cfg = BoardConfig(name="demo", gpio=[], uart=[], timer=[])
+    LLVMIRGenerator(cfg, out, "x86", jobs=4).generate()
+
+    link = next(cmd for cmd in no_subprocess_run if cmd[0] == "llvm-link")
+    inputs = [Path(a).name for a in link[1:-2]]
+    assert inputs == ["gpio.bc", "hal.bc", "main.bc", "uart.bc"]
+
+def test_ir_pipeline_reports_every_failed_file(tmp_path, monkeypatch):
+    out = tmp_path / "out"
+    (out / "src").mkdir(parents=True)
+    (out / "include").mkdir()
+    for name in ("a", "b", "c"):
+        (out/"src"/f"{name}.c").write_text("")
+
+    def fake_run(cmd, **kwargs):
+        if cmd[0] == "clang" and Path(cmd[-3]).stem in ("a", "c"):
+            raise subprocess.CalledProcessError(1, cmd)
+        return subprocess.CompletedProcess(cmd, 0, b"", b"")
+    monkeypatch.setattr(subprocess, "run", fake_run)
+
+    cfg = BoardConfig(name="demo", gpio=[], uart=[], timer=[])
+    with pytest.raises(CompileError) as exc:
+        LLVMIRGenerator(cfg, out, "x86", jobs=2).generate()
+    assert sorted(p.name for p in exc.value.failures) == ["a.c", "c.c"]
+    assert "a.c" in str(exc.value) and "c.c" in str(exc.value)
+
+def test_ir_pipeline_optimizes_linked_module_with_target_default(tmp_path, no_subprocess_run):
+    out = tmp_path / "out"
+    (out / "src").mkdir(parents=True)
+    (out / "include").mkdir()
+    (out/"src"/"main.c").write_text("int main() { return 0; }")
+
+    cfg = BoardConfig(name="demo", gpio=[], uart=[], timer=[])
+    LLVMIRGenerator(cfg, out, "stm32").generate()
+
+    tools = [cmd[0] for cmd in no_subprocess_run]
+    assert tools.index("llvm-link") < tools.index("opt") < tools.index("llc")
+    opt = no_subprocess_run[tools.index("opt")]
+    assert "-passes=internalize,default<Oz>" in opt
+    assert "-internalize-public-api-list=main" in opt
+    llc = no_subprocess_run[tools.index("llc")]
+    assert str(out / "ir" / "firmware.opt.bc") in llc and "-O=2" in llc
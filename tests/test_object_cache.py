@@ -0,0 +1,39 @@
+import subprocess
+import pytest
+from core.ir import backend
+from core.ir.object_cache import ObjectCache, object_cache_key
+
+IR = "define i32 @main() {\n  ret i32 0\n}\n"
+
+@pytest.fixture
+def fake_llc(monkeypatch):
+    calls = []
+    def run(cmd, **kwargs):
+        calls.append(cmd)
+        obj = b"OBJ:" + "|".join(cmd[1:cmd.index("-o")]).encode()
+        return subprocess.CompletedProcess(cmd, 0, obj, b"")
+    monkeypatch.setattr(subprocess, "run", run)
+    monkeypatch.setattr(backend, "llc_version", lambda: "LLVM version test")
+    return calls
+
+def test_cache_hit_skips_llc(tmp_path, fake_llc):
+    cache = ObjectCache(tmp_path)
+    a = backend.compile_module(IR, "x86_64-pc-linux-gnu", cache=cache, backend="llc")
+    b = backend.compile_module(IR, "x86_64-pc-linux-gnu", cache=cache, backend="llc")
+    assert a == b
+    assert len(fake_llc) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_key_covers_target_and_toolchain():
+    base = object_cache_key(IR, "armv7-none-eabi", "cortex-m3", "+thumb2", "v14")
+    assert base != object_cache_key(IR, "armv7-none-eabi", "cortex-m4", "+thumb2", "v14")
+    assert base != object_cache_key(IR, "armv7-none-eabi", "cortex-m3", "", "v14")
+    assert base != object_cache_key(IR, "armv7-none-eabi", "cortex-m3", "+thumb2", "v15")
+    assert base != object_cache_key(IR + "\n", "armv7-none-eabi", "cortex-m3", "+thumb2", "v14")
+
+def test_lru_eviction_by_size(tmp_path):
+    cache = ObjectCache(tmp_path, max_bytes=10)
+    cache.put("a", b"x" * 6)
+    cache.put("b", b"y" * 6)
+    assert cache.get("a") is None
+    assert cache.get("b") == b"y" * 6
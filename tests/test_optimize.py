@@ -0,0 +1,56 @@
+import shutil
+import pytest
+from core.ir import backend
+from core.ir.object_cache import ObjectCache
+from core.ir.optimize import normalize_level, opt_command
+
+llvm = pytest.importorskip("llvmlite.binding")
+from core.ir.optimize import optimize_ir
+
+X86 = ("x86_64-pc-linux-gnu", "generic", "")
+
+IR = """
+define i32 @helper(i32 %x) {
+  %y = add i32 %x, 1
+  ret i32 %y
+}
+define i32 @main() {
+  %r = call i32 @helper(i32 41)
+  ret i32 %r
+}
+"""
+
+def test_levels_accept_dash_and_reject_unknown():
+    assert normalize_level("-Oz") == "Oz"
+    with pytest.raises(ValueError):
+        normalize_level("O4")
+    assert opt_command("O0") == ["opt", "-passes=default<O0>"]
+
+def test_internalize_lets_unused_definitions_go():
+    kept = optimize_ir(IR, *X86, "O2")
+    assert "define i32 @helper" in kept and "ret i32 42" in kept
+    internal = optimize_ir(IR, *X86, "Oz", internalize_symbols=True)
+    assert "@helper" not in internal and "ret i32 42" in internal
+
+def test_opt_level_is_part_of_object_cache_key(tmp_path):
+    cache = ObjectCache(tmp_path)
+    for level in (None, "O2", "Oz"):
+        backend.compile_module(IR, *X86, cache=cache, backend="llvmlite", opt_level=level)
+    assert cache.misses == 3
+    backend.compile_module(IR, *X86, cache=cache, backend="llvmlite", opt_level="Oz")
+    assert cache.hits == 1
+
+@pytest.mark.skipif(not (shutil.which("opt") and shutil.which("llc")), reason="needs opt and llc")
+def test_llc_route_uses_toolchain_opt():
+    obj = backend.compile_module(IR, "armv7-none-eabi", "cortex-m3", "+thumb2",
+                                 backend="llc", opt_level="Oz", internalize=True)
+    assert obj[:4] == b"\x7fELF"
+
+@pytest.mark.skipif(not hasattr(llvm, "create_pass_manager_builder"),
+                    reason="llvmlite without the legacy pass manager")
+def test_legacy_pass_manager(monkeypatch):
+    # the route taken with the locked llvmlite (0.41), which lacks create_pass_builder
+    monkeypatch.delattr(llvm, "create_pass_builder", raising=False)
+    out = optimize_ir(IR, *X86, "Oz", internalize_symbols=True)
+    assert "@helper" not in out and "ret i32 42" in out
+    assert "ret i32 42" in optimize_ir(IR, *X86, "O2")
@@ -0,0 +1,50 @@
+import pytest
+from pathlib import Path
+from core.config import load_config
+from core.generator import CodeGenerator
+from core.manifest import hash_bytes
+from core.output import copy_atomic, write_atomic
+
+def test_write_atomic_returns_content_hash(tmp_path):
+    dest = tmp_path / "f.c"
+    digest = write_atomic(dest, ["int ", "x;\n"])
+    assert dest.read_text() == "int x;\n"
+    assert digest == hash_bytes(b"int x;\n")
+    assert list(tmp_path.iterdir()) == [dest]
+
+def test_write_atomic_failure_keeps_old_file(tmp_path):
+    dest = tmp_path / "f.c"
+    dest.write_text("old")
+    def chunks():
+        yield "partial"
+        raise RuntimeError("render failed")
+    with pytest.raises(RuntimeError):
+        write_atomic(dest, chunks())
+    assert dest.read_text() == "old"
+    assert list(tmp_path.iterdir()) == [dest]
+
+def test_write_atomic_keeps_unchanged(tmp_path):
+    dest = tmp_path / "f.c"
+    dest.write_text("same")
+    ino = dest.stat().st_ino
+    write_atomic(dest, ["same"], keep_if_unchanged=True)
+    assert dest.stat().st_ino == ino
+
+def test_stream_matches_render(tmp_path, sample_cfg):
+    cfg = load_config(sample_cfg)
+    a, b = tmp_path / "a", tmp_path / "b"
+    CodeGenerator(cfg, Path("core/templates"), a, "stm32", jobs=1).generate()
+    CodeGenerator(cfg, Path("core/templates"), b, "stm32", jobs=1, stream=True).generate()
+    for f in ("src/gpio.c", "src/uart.c", "dts/tst_stm32.dts", "Makefile"):
+        strip = lambda p: [l for l in p.read_text().splitlines() if "Generated on" not in l]
+        assert strip(a / f) == strip(b / f), f
+
+def test_copy_atomic_missing_source_keeps_dest(tmp_path):
+    src, dest = tmp_path / "src.c", tmp_path / "f.c"
+    src.write_text("int x;\n")
+    assert copy_atomic(src, dest) == hash_bytes(b"int x;\n")
+    src.unlink()
+    with pytest.raises(FileNotFoundError):
+        copy_atomic(src, dest)
+    assert dest.read_text() == "int x;\n"
+    assert list(tmp_path.iterdir()) == [dest]
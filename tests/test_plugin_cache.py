@@ -0,0 +1,92 @@
+import shutil
+from pathlib import Path
+
+from core.config import load_config
+from core.generator import CodeGenerator, make_environment
+from core.output import file_digest
+from core.peripherals.base import PeripheralGenerator
+from core.peripherals.gpio import GPIOGenerator
+from core.plugin_cache import PluginCache
+
+TEMPLATES = Path(__file__).parent.parent / "core" / "templates"
+
+
+def generate(cfg, out, cache_dir, templates=TEMPLATES):
+    cache = PluginCache(cache_dir)
+    CodeGenerator(cfg, templates, out, "x86", timestamp=None, plugin_cache=cache).generate()
+    return cache
+
+
+def test_one_field_edit_renders_one_plugin_output(tmp_path, sample_cfg):
+    cfg = load_config(sample_cfg)
+    cache = generate(cfg, tmp_path / "a", tmp_path / "cache")
+    assert (cache.hits, cache.misses) == (0, 6)
+
+    edited = cfg.model_copy(update={"timer": [cfg.timer[0].model_copy(update={"period": 250})]})
+    cache = generate(edited, tmp_path / "b", tmp_path / "cache")
+    # gpio.{h,c}, uart.{h,c} and timer.h reused; only timer.c rendered
+    assert (cache.hits, cache.misses) == (5, 1)
+    assert "configure_timer(\"TIM2\", 0, 250)" in (tmp_path / "b" / "src" / "timer.c").read_text()
+
+    CodeGenerator(edited, TEMPLATES, tmp_path / "c", "x86", timestamp=None).generate()
+    for rel in ("src/gpio.c", "src/uart.c", "include/uart.h", "src/timer.c"):
+        assert (tmp_path / "b" / rel).read_bytes() == (tmp_path / "c" / rel).read_bytes(), rel
+
+
+def test_edited_template_misses(tmp_path, sample_cfg):
+    cfg = load_config(sample_cfg)
+    templates = tmp_path / "tpl"
+    shutil.copytree(TEMPLATES, templates)
+    generate(cfg, tmp_path / "a", tmp_path / "cache", templates)
+
+    gpio_c = templates / "shared" / "peripherals" / "gpio.c.j2"
+    gpio_c.write_text(gpio_c.read_text() + "// edited\n")
+    cache = generate(cfg, tmp_path / "b", tmp_path / "cache", templates)
+    assert (cache.hits, cache.misses) == (5, 1)
+    assert (tmp_path / "b" / "src" / "gpio.c").read_text().rstrip().endswith("// edited")
+
+
+def test_config_slice(sample_cfg, tmp_path):
+    cfg = load_config(sample_cfg)
+    env = make_environment(TEMPLATES)
+
+    class WholeBoard(PeripheralGenerator):
+        def should_generate(self):
+            return True
+
+        def generate(self):
+            pass
+
+    gpio = GPIOGenerator(cfg, env, {}, None)
+    assert gpio.config_slice() == {"gpio": cfg.gpio}
+    assert WholeBoard(cfg, env, {}, None).config_slice() == {"board": cfg}
+
+    other = cfg.model_copy(update={"name": "other", "uart": []})
+    assert GPIOGenerator(other, env, {}, None).slice_key == gpio.slice_key
+
+
+def test_wall_clock_stamp_bypasses_cache(tmp_path, sample_cfg):
+    cfg = load_config(sample_cfg)
+    generate(cfg, tmp_path / "a", tmp_path / "cache")
+    cache = PluginCache(tmp_path / "cache")
+    CodeGenerator(cfg, TEMPLATES, tmp_path / "b", "x86", plugin_cache=cache).generate()
+    assert (cache.hits, cache.misses) == (0, 0)
+    stamp = (tmp_path / "b" / "src" / "main.c").read_text().splitlines()[1]
+    assert stamp.startswith("// Generated on ")
+    assert stamp in (tmp_path / "b" / "src" / "gpio.c").read_text()
+
+
+def test_entries_are_copied_file_to_file(tmp_path):
+    cache = PluginCache(tmp_path / "cache")
+    src, dest = tmp_path / "gpio.c", tmp_path / "out.c"
+    src.write_bytes(b"int x;\n" * 1000)
+    cache.put("k", src)
+    assert cache.get("k", dest) == file_digest(src)
+    assert dest.read_bytes() == src.read_bytes()
+
+    for entry in cache.directory.glob("*.out"):
+        entry.unlink()  # evicted by another build
+    dest.write_text("old")
+    assert cache.get("k", dest) is None
+    assert dest.read_text() == "old"
+    assert (cache.hits, cache.misses) == (1, 1)
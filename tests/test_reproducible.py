@@ -0,0 +1,72 @@
+import datetime
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from core.config import load_config
+from core.generator import CodeGenerator
+from core.manifest import MANIFEST_NAME
+
+PY = sys.executable
+SCRIPT = Path(__file__).parent.parent / "cli" / "main.py"
+TEMPLATES = Path(__file__).parent.parent / "core" / "templates"
+
+
+def _files(root):
+    return {p.relative_to(root).as_posix(): p.read_bytes() for p in sorted(root.rglob("*")) if p.is_file()}
+
+
+def _cli(args, seed, env_extra=None):
+    env = {k: v for k, v in os.environ.items() if k != "SOURCE_DATE_EPOCH"}
+    env.update(PYTHONHASHSEED=str(seed), **(env_extra or {}))
+    res = subprocess.run([PY, str(SCRIPT), "--no-config-cache", "--no-template-cache", *args],
+                         capture_output=True, text=True, env=env)
+    assert res.returncode == 0, res.stderr
+
+
+def test_reproducible_runs_are_byte_identical(tmp_path, sample_cfg):
+    for seed in (1, 2):
+        out = tmp_path / f"run{seed}"
+        _cli(["--config", str(sample_cfg), "--template-dir", str(TEMPLATES),
+              "--out-dir", str(out), "--target", "all", "--reproducible"], seed)
+        _cli(["--config", str(sample_cfg), "--emit-ir", str(out / "board.ll"), "--target", "stm32"], seed)
+    a, b = _files(tmp_path / "run1"), _files(tmp_path / "run2")
+    assert a == b
+    assert "stm32/Makefile" in a and "stm32/dts/tst_stm32.dts" in a and "board.ll" in a
+    assert not any(b"Generated on" in data for data in a.values())
+
+
+def test_source_date_epoch_stamps_headers(tmp_path, sample_cfg):
+    out = tmp_path / "out"
+    _cli(["--config", str(sample_cfg), "--template-dir", str(TEMPLATES),
+          "--out-dir", str(out), "--target", "x86", "--reproducible"], 0,
+         {"SOURCE_DATE_EPOCH": "1700000000"})
+    assert "// Generated on 2023-11-14 22:13:20" in (out / "src" / "hal.c").read_text()
+
+
+def test_fixed_timestamp_is_part_of_incremental_inputs(tmp_path, sample_cfg):
+    cfg = load_config(sample_cfg)
+    out = tmp_path / "out"
+    CodeGenerator(cfg, TEMPLATES, out, "x86", incremental=True, timestamp=None).generate()
+    assert "Generated on" not in (out / "src" / "hal.c").read_text()
+
+    stamp = datetime.datetime(2024, 1, 2, 3, 4, 5)
+    CodeGenerator(cfg, TEMPLATES, out, "x86", incremental=True, timestamp=stamp).generate()
+    assert "// Generated on 2024-01-02 03:04:05" in (out / "src" / "hal.c").read_text()
+    manifest = (out / MANIFEST_NAME).read_bytes()
+
+    # same stamp again: nothing to rewrite
+    for p in out.rglob("*"):
+        if p.is_file():
+            os.utime(p, (1_000_000, 1_000_000))
+    CodeGenerator(cfg, TEMPLATES, out, "x86", incremental=True, timestamp=stamp).generate()
+    assert (out / "src" / "hal.c").stat().st_mtime == 1_000_000
+    assert (out / MANIFEST_NAME).read_bytes() == manifest
+
+
+def test_invalid_timestamp_flag(tmp_path):
+    res = subprocess.run([PY, str(SCRIPT), "--config", "x.yaml", "--target", "x86",
+                          "--timestamp", "yesterday"], capture_output=True, text=True)
+    assert res.returncode == 2
+    assert "invalid timestamp 'yesterday'" in res.stderr
@@ -0,0 +1,82 @@
+import base64
+import socket
+import threading
+from pathlib import Path
+import pytest
+from core.server import CodegenServer, CodegenService, DaemonRunningError, request
+
+@pytest.fixture
+def server(tmp_path):
+    sock = tmp_path / "cg.sock"
+    srv = CodegenServer(sock, CodegenService(Path("core/templates")), workers=2)
+    t = threading.Thread(target=srv.serve_forever, daemon=True)
+    t.start()
+    yield sock
+    srv.shutdown()
+    srv.server_close()
+
+def test_ping(server):
+    assert request(server, {"op": "ping"}) == {"ok": True}
+
+def test_generate(server, tmp_path, sample_cfg):
+    out = tmp_path / "out"
+    resp = request(server, {"op": "generate", "config": str(sample_cfg),
+                            "target": "stm32", "out_dir": str(out)})
+    assert resp["ok"], resp
+    assert "src/gpio.c" in resp["files"]
+    assert (out / "src" / "gpio.c").exists()
+
+def test_emit_ir_inline(server, sample_cfg):
+    resp = request(server, {"op": "emit-ir", "config": str(sample_cfg), "target": "x86"})
+    assert resp["ok"], resp
+    assert "define i32 @\"main\"" in resp["ir"]
+
+def test_emit_obj_bytes(server, sample_cfg):
+    pytest.importorskip("llvmlite.binding")
+    resp = request(server, {"op": "emit-obj", "config": str(sample_cfg),
+                            "target": "x86", "backend": "llvmlite"})
+    assert resp["ok"], resp
+    assert base64.b64decode(resp["obj"])[:4] == b"\x7fELF"
+
+def test_errors_are_reported_not_fatal(server, tmp_path):
+    resp = request(server, {"op": "generate", "config": str(tmp_path / "missing.yaml"),
+                            "target": "x86", "out_dir": str(tmp_path / "o")})
+    assert resp["ok"] is False and "FileNotFoundError" in resp["error"]
+    assert request(server, {"op": "bogus"})["ok"] is False
+    assert request(server, {"op": "ping"}) == {"ok": True}
+
+def test_idle_connection_releases_worker(tmp_path):
+    sock = tmp_path / "cg.sock"
+    srv = CodegenServer(sock, CodegenService(Path("core/templates")), workers=1,
+                        idle_timeout=0.2)
+    t = threading.Thread(target=srv.serve_forever, daemon=True)
+    t.start()
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as idle:
+            idle.connect(str(sock))
+            idle.settimeout(5)
+            # the only worker is held by `idle` until its timeout closes it
+            assert request(sock, {"op": "ping"}) == {"ok": True}
+            assert idle.recv(1) == b""
+    finally:
+        srv.shutdown()
+        srv.server_close()
+
+def test_second_server_does_not_take_a_live_socket(server):
+    with pytest.raises(DaemonRunningError):
+        CodegenServer(server, CodegenService(Path("core/templates")))
+    assert request(server, {"op": "ping"}) == {"ok": True}
+
+def test_stale_socket_is_replaced(tmp_path):
+    sock = tmp_path / "cg.sock"
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(sock))
+    stale.close()  # socket file left behind, nobody listening
+    srv = CodegenServer(sock, CodegenService(Path("core/templates")), workers=1)
+    t = threading.Thread(target=srv.serve_forever, daemon=True)
+    t.start()
+    try:
+        assert request(sock, {"op": "ping"}) == {"ok": True}
+    finally:
+        srv.shutdown()
+        srv.server_close()
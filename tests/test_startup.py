@@ -0,0 +1,25 @@
+import subprocess
+import sys
+from pathlib import Path
+
+PY = sys.executable
+SCRIPT = Path(__file__).parent.parent / "cli" / "main.py"
+
+def test_cli_import_is_light():
+    code = (
+        "import sys, cli.main\n"
+        "print(','.join(m for m in cli.main.HEAVY_MODULES if m in sys.modules))"
+    )
+    res = subprocess.run([PY, "-c", code], capture_output=True, text=True, check=True)
+    assert res.stdout.strip() == ""
+
+def test_emit_ast_skips_jinja_and_llvmlite(tmp_path, sample_cfg):
+    res = subprocess.run(
+        [PY, str(SCRIPT), "--config", str(sample_cfg),
+         "--emit-ast", str(tmp_path / "ast.json"), "--profile-startup"],
+        capture_output=True, text=True,
+    )
+    assert res.returncode == 0, res.stderr
+    heavy = next(l for l in res.stderr.splitlines() if "heavy modules:" in l)
+    assert "jinja2" not in heavy and "llvmlite" not in heavy
+    assert "startup profile" in res.stderr
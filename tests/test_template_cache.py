@@ -0,0 +1,38 @@
+import pytest
+from core.generator import make_environment
+from core.template_cache import PATTERN, TemplateBytecodeCache
+
+def load(tpl_dir, cache_dir, name="a.j2", **kw):
+    bcc = TemplateBytecodeCache(cache_dir, **kw)
+    env = make_environment(tpl_dir, bytecode_cache=bcc)
+    out = env.get_template(name).render(x=1)
+    return bcc, out
+
+@pytest.fixture
+def tpl_dir(tmp_path):
+    d = tmp_path / "tpl"
+    d.mkdir()
+    (d / "a.j2").write_text("a={{ x }}")
+    (d / "b.j2").write_text("b={{ x }}")
+    return d
+
+def test_second_environment_hits(tmp_path, tpl_dir):
+    cache = tmp_path / "cache"
+    bcc, out = load(tpl_dir, cache)
+    assert (bcc.hits, bcc.misses) == (0, 1)
+    bcc, out = load(tpl_dir, cache)
+    assert (bcc.hits, bcc.misses) == (1, 0)
+    assert out == "a=1"
+
+def test_edited_template_misses(tmp_path, tpl_dir):
+    cache = tmp_path / "cache"
+    load(tpl_dir, cache)
+    (tpl_dir / "a.j2").write_text("A={{ x }}")
+    bcc, out = load(tpl_dir, cache)
+    assert bcc.misses == 1 and out == "A=1"
+
+def test_eviction_bounds_size(tmp_path, tpl_dir):
+    cache = tmp_path / "cache"
+    load(tpl_dir, cache, "a.j2", max_bytes=1)
+    load(tpl_dir, cache, "b.j2", max_bytes=1)
+    assert len(list(cache.glob(PATTERN % "*"))) <= 1
@@ -0,0 +1,48 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from core import timing
+
+PY = sys.executable
+SCRIPT = Path(__file__).parent.parent / "cli" / "main.py"
+TEMPLATES = Path(__file__).parent.parent / "core" / "templates"
+
+def test_stage_is_noop_when_disabled():
+    timing.disable()
+    with timing.stage("anything"):
+        pass
+    timing.add_bytes("anything", 10)  # must not raise
+
+def test_stage_accumulates_calls_and_bytes(tmp_path):
+    rec = timing.enable(tmp_path / "prof")
+    try:
+        for _ in range(2):
+            with timing.stage("work"):
+                sum(range(10000))
+        timing.add_bytes("work", 42)
+    finally:
+        timing.disable()
+    st = rec.stages["work"]
+    assert st.calls == 2 and st.bytes == 42 and st.wall > 0
+    assert sorted(p.name for p in (tmp_path / "prof").iterdir()) == ["work-1.prof", "work-2.prof"]
+    assert "work" in rec.table()
+
+def test_cli_timings_json(tmp_path, sample_cfg):
+    report = tmp_path / "timings.json"
+    res = subprocess.run(
+        [PY, str(SCRIPT), "--config", str(sample_cfg), "--target", "stm32",
+         "--template-dir", str(TEMPLATES), "--out-dir", str(tmp_path / "out"),
+         "--no-template-cache", "--no-config-cache", "--no-plugin-cache",
+         "--timings", "--timings-json", str(report)],
+        capture_output=True, text=True,
+    )
+    assert res.returncode == 0, res.stderr
+    stages = {s["name"]: s for s in json.loads(report.read_text())["stages"]}
+    assert {"config", "codegen", "plugin/GPIO", "render/src/gpio.c"} <= set(stages)
+    gpio_c = tmp_path / "out" / "src" / "gpio.c"
+    assert stages["render/src/gpio.c"]["bytes"] == gpio_c.stat().st_size
+    gpio_h = tmp_path / "out" / "include" / "gpio.h"
+    assert stages["plugin/GPIO"]["bytes"] == gpio_c.stat().st_size + gpio_h.stat().st_size
+    assert "wall ms" in res.stderr
@@ -0,0 +1,175 @@
+import asyncio
+import shutil
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from core.build_graph import BuildError, BuildGraph, Task
+from core.config import BoardConfig
+from core.ir_generator import CompileError, LLVMIRGenerator
+from core import toolchain
+from core.toolchain import ToolchainRunner, ToolError, run_tool
+
+PY = sys.executable
+
+
+def py(code):
+    return [PY, "-c", code]
+
+
+def test_run_tool_attaches_stderr_to_error():
+    with pytest.raises(ToolError) as exc:
+        run_tool(py("import sys; sys.stderr.write('bad input\\n'); sys.exit(3)"))
+    err = exc.value
+    assert err.returncode == 3 and err.timeout is None
+    assert err.stderr == "bad input\n"
+    assert "exited with status 3" in str(err) and "bad input" in str(err)
+    assert err.to_dict()["stderr"] == "bad input\n"
+
+
+def test_run_tool_timeout():
+    with pytest.raises(ToolError) as exc:
+        run_tool(py("import time; time.sleep(5)"), timeout=0.2)
+    assert exc.value.returncode is None and exc.value.timeout == 0.2
+    assert "timed out" in str(exc.value)
+
+
+def test_runner_pipes_stdin_and_logs_stderr(caplog):
+    runner = ToolchainRunner()
+    code = "import sys; sys.stderr.write('note\\n'); sys.stdout.write(sys.stdin.read().upper())"
+    out = asyncio.run(runner.run(py(code), input=b"ir"))
+    assert out == b"IR"
+    assert any("note" in r.getMessage() for r in caplog.records if r.levelname == "WARNING")
+
+
+def test_runner_bounds_concurrency():
+    runner = ToolchainRunner(max_jobs=2)
+
+    async def main():
+        await asyncio.gather(*(runner.run(py("import time; time.sleep(0.3)")) for _ in range(4)))
+
+    start = time.perf_counter()
+    asyncio.run(main())
+    assert time.perf_counter() - start >= 0.6
+    assert runner.started == 4
+
+
+def test_runner_kills_on_timeout():
+    runner = ToolchainRunner(timeouts={Path(PY).name: 0.2})
+    start = time.perf_counter()
+    with pytest.raises(ToolError) as exc:
+        asyncio.run(runner.run(py("import time; time.sleep(5)")))
+    assert exc.value.timeout == 0.2
+    assert time.perf_counter() - start < 3
+
+
+PARTIAL = "import sys, time; sys.stderr.write('warning: partial\\n'); sys.stderr.flush(); time.sleep(5)"
+
+
+def test_timeout_keeps_partial_stderr_on_both_paths():
+    with pytest.raises(ToolError) as sync:
+        run_tool(py(PARTIAL), timeout=0.5)
+    runner = ToolchainRunner(timeouts={Path(PY).name: 0.5})
+    with pytest.raises(ToolError) as aio:
+        asyncio.run(runner.run(py(PARTIAL)))
+    for exc in (sync, aio):
+        assert exc.value.timeout == 0.5 and exc.value.stderr == "warning: partial\n"
+        assert "timed out after 0.5s:\nwarning: partial" in str(exc.value)
+
+
+def test_default_runner_is_created_once(monkeypatch):
+    monkeypatch.setattr(toolchain, "_default_runner", None)
+    barrier = threading.Barrier(8)
+    seen = []
+
+    def get():
+        barrier.wait()
+        seen.append(toolchain.default_runner())
+
+    threads = [threading.Thread(target=get) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len({id(r) for r in seen}) == 1
+
+
+def test_arun_awaits_coroutines_and_respects_deps(tmp_path):
+    order = []
+
+    async def b():
+        await asyncio.sleep(0.01)
+        order.append("b")
+
+    async def c():
+        order.append("c")
+
+    g = BuildGraph(tmp_path / "state.json", jobs=2)
+    g.add(Task(name="a", action=lambda: order.append("a")))
+    g.add(Task(name="b", action=b, deps=["a"]))
+    g.add(Task(name="c", action=c, deps=["b"]))
+    assert asyncio.run(g.arun()) == ["a", "b", "c"]
+    assert order == ["a", "b", "c"]
+
+
+def test_arun_reports_failures(tmp_path):
+    async def boom():
+        raise RuntimeError("boom")
+
+    g = BuildGraph(tmp_path / "state.json")
+    g.add(Task(name="a", action=boom))
+    g.add(Task(name="b", action=lambda: None, deps=["a"]))
+    with pytest.raises(BuildError) as exc:
+        asyncio.run(g.arun())
+    assert list(exc.value.failures) == ["a"]
+    assert not g.ran("b")
+
+
+class FakeRunner:
+    def __init__(self, fail=()):
+        self.cmds = []
+        self.fail = fail
+
+    async def run(self, cmd, input=None, timeout=None):
+        self.cmds.append(cmd)
+        if cmd[0] == "clang" and Path(cmd[-3]).stem in self.fail:
+            raise ToolError(cmd, 1, stderr="error: boom")
+        return b""
+
+
+def test_generate_async_runs_tools_on_runner(tmp_path):
+    out = tmp_path / "out"
+    (out / "src").mkdir(parents=True)
+    (out / "include").mkdir()
+    for name in ("a", "b"):
+        (out / "src" / f"{name}.c").write_text("")
+    cfg = BoardConfig(name="demo", gpio=[], uart=[], timer=[])
+
+    runner = FakeRunner()
+    asyncio.run(LLVMIRGenerator(cfg, out, "x86").generate_async(runner=runner))
+    assert [c[0] for c in runner.cmds[2:]] == ["llvm-link", "opt", "llc", "clang"]
+
+    runner = FakeRunner(fail=("b",))
+    (out / "src" / "b.c").write_text("int x;")
+    with pytest.raises(CompileError) as exc:
+        asyncio.run(LLVMIRGenerator(cfg, out, "x86").generate_async(runner=runner))
+    assert [p.name for p in exc.value.failures] == ["b.c"]
+    assert "error: boom" in str(exc.value.failures[out / "src" / "b.c"])
+
+
+@pytest.mark.skipif(shutil.which("llc") is None, reason="llc not installed")
+def test_compile_module_async_llc():
+    from core.ir import backend
+
+    ir = "define i32 @main() {\n  ret i32 0\n}\n"
+    runner = ToolchainRunner(max_jobs=2)
+    obj = asyncio.run(backend.compile_module_async(ir, "x86_64-pc-linux-gnu", backend="llc", runner=runner))
+    assert obj[:4] == b"\x7fELF" and runner.started == 1
+
+    with pytest.raises(ToolError) as exc:
+        asyncio.run(backend.compile_module_async("garbage", "x86_64-pc-linux-gnu",
+                                                 backend="llc", runner=runner))
+    assert exc.value.tool == "llc" and "error" in exc.value.stderr